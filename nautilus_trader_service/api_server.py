@@ -3,17 +3,35 @@ Nautilus Trader API Server
 Node.js와 통신하기 위한 FastAPI 서버
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import asyncio
+import numpy as np
 import uvicorn
 
 from config import config
-from mt5_data_client import mt5_data_client
-from strategies.technical_strategy import TechnicalStrategy
+from startup import startup_profiler
+
+with startup_profiler.phase('import_data_client'):
+    from mt5_data_client import mt5_data_client, TIMEFRAME_MAP
+    from backtest_costs import ExecutionCostModel
+    from price_snapshot import price_snapshot_service
+    from position_tracker import position_tracker
+    from risk_analytics import risk_analytics, position_exposures
+    from backtest_store import backtest_store, run_key, EQUITY_DTYPE
+    from indicator_cache import data_fingerprint, series_label
+    from market_capture import market_capture
+    from shadow_trading import shadow_trading_engine
+    from market_depth import market_depth_service
+    from screener import screener
+    from model_scoring import model_scorer, blend_confidence
+    from http_cache import response_cache
+    from bulk_export import EXPORT_FORMATS, negotiate, encode_chunks, encode_stream, bar_columns, signal_stream
+    from trading_calendar import trading_calendar
 
 app = FastAPI(title="Nautilus Trader API", version="1.0.0")
 
@@ -28,7 +46,6 @@ app.add_middleware(
 
 # 전역 변수
 strategies = {}
-backtest_results = {}
 
 
 class BacktestRequest(BaseModel):
@@ -37,12 +54,32 @@ class BacktestRequest(BaseModel):
     period: str = "30d"
     capital: float = 10000
     risk_per_trade: float = 0.02
+    include_costs: bool = True
+    commission_per_lot: float = config.BACKTEST_COMMISSION_PER_LOT
+    slippage_model: str = config.BACKTEST_SLIPPAGE_MODEL
+    slippage_points: float = config.BACKTEST_SLIPPAGE_POINTS
+
+
+class PortfolioBacktestRequest(BaseModel):
+    symbols: Optional[List[str]] = None
+    timeframe: str = config.DEFAULT_TIMEFRAME
+    period: str = "30d"
+    capital: float = 10000
+    risk_per_trade: float = config.MAX_RISK_PER_TRADE
+    max_open_positions: int = config.MAX_OPEN_POSITIONS
+    max_daily_loss: float = config.MAX_DAILY_LOSS
+    leverage: float = config.DEFAULT_LEVERAGE
+    include_costs: bool = True
+    commission_per_lot: float = config.BACKTEST_COMMISSION_PER_LOT
+    slippage_model: str = config.BACKTEST_SLIPPAGE_MODEL
+    slippage_points: float = config.BACKTEST_SLIPPAGE_POINTS
 
 
 class SignalResponse(BaseModel):
     symbol: str
     action: str  # BUY, SELL, HOLD
     confidence: float
+    model_score: Optional[float] = None
     indicators: Dict
     timestamp: datetime
 
@@ -51,9 +88,31 @@ class SignalResponse(BaseModel):
 async def startup_event():
     """서버 시작 시 MT5 연결"""
     print("🚀 Starting Nautilus Trader API Server...")
-    connected = await mt5_data_client.connect()
+    if config.LAZY_STARTUP:
+        # MT5 연결은 백그라운드에서 진행하고 /health는 즉시 응답
+        asyncio.create_task(connect_mt5())
+        startup_profiler.mark_ready()
+    else:
+        await connect_mt5()
+        startup_profiler.mark_ready()
+
+
+async def connect_mt5():
+    """MT5 연결 (시작 단계 시간 측정)"""
+    if config.CAPTURE_ENABLED:
+        market_capture.start(mt5_data_client)
+    with startup_profiler.phase('mt5_connect'):
+        connected = await mt5_data_client.connect()
     if connected:
         print("✅ MT5 Connected")
+        price_snapshot_service.start(config.SYMBOLS)
+        position_tracker.start()
+        risk_analytics.start()
+        market_depth_service.start()
+        if config.SHADOW_TRADING_ENABLED:
+            shadow_trading_engine.start()
+        if config.MODEL_PATH:
+            model_scorer.start()
     else:
         print("❌ MT5 Connection Failed")
 
@@ -61,7 +120,15 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     """서버 종료 시 정리"""
+    await price_snapshot_service.stop()
+    await position_tracker.stop()
+    await risk_analytics.stop()
+    await shadow_trading_engine.stop()
+    await market_depth_service.stop()
+    await screener.stop()
+    await model_scorer.stop()
     await mt5_data_client.disconnect()
+    market_capture.stop(mt5_data_client)
     print("✅ Server shutdown complete")
 
 
@@ -71,23 +138,28 @@ async def health_check():
     return {
         "status": "healthy",
         "mt5_connected": mt5_data_client.mt5_initialized,
+        "startup": startup_profiler.report(),
         "timestamp": datetime.now()
     }
 
 
 @app.get("/status")
-async def get_status():
-    """시스템 상태 조회"""
-    account_info = await mt5_data_client.get_account_info()
-    positions = await mt5_data_client.get_positions()
+async def get_status(request: Request):
+    """시스템 상태 조회 (포지션 트래커 캐시 사용, 상태 버전이 바뀔 때만 다시 직렬화)"""
+    await position_tracker.ensure_fresh()
     
-    return {
-        "status": "connected" if mt5_data_client.mt5_initialized else "disconnected",
-        "account": account_info,
-        "open_positions": len(positions),
-        "active_strategies": len(strategies),
-        "timestamp": datetime.now()
-    }
+    validity = (position_tracker.version, mt5_data_client.mt5_initialized, len(strategies))
+    entry = response_cache.lookup('status', validity)
+    if entry is None:
+        entry = response_cache.store('status', validity, {
+            "status": "connected" if mt5_data_client.mt5_initialized else "disconnected",
+            "account": position_tracker.account,
+            "open_positions": len(position_tracker.positions),
+            "state_version": position_tracker.version,
+            "active_strategies": len(strategies),
+            "timestamp": datetime.now()
+        })
+    return response_cache.respond(request, entry)
 
 
 @app.post("/backtest")
@@ -103,101 +175,489 @@ async def run_backtest(request: BacktestRequest):
         historical_data = await mt5_data_client.get_historical_bars(
             request.symbol,
             'M15',
-            bars_needed
+            bars_needed + 1
         )
+        # 형성 중인 봉 제외 (같은 마감 봉이면 같은 지문으로 저장소 재사용)
+        historical_data = historical_data.iloc[:-1].copy()
         
         if historical_data.empty:
             raise HTTPException(status_code=404, detail=f"No data for {request.symbol}")
         
+        # 거래 비용 모델 (스프레드/수수료/슬리피지/스왑)
+        cost_model = None
+        if request.include_costs:
+            symbol_info = mt5_data_client.get_symbol_info(request.symbol) or {}
+            cost_model = ExecutionCostModel.from_symbol_info(
+                symbol_info,
+                commission_per_lot=request.commission_per_lot,
+                slippage_model=request.slippage_model,
+                slippage_points=request.slippage_points
+            )
+        
+        # 같은 데이터/파라미터로 실행한 결과가 있으면 저장소에서 반환
+        params = request.model_dump(exclude={'symbol', 'strategy'})
+        fingerprint = data_fingerprint(
+            historical_data.index.values.view('int64'),
+            historical_data[['open', 'high', 'low', 'close']].to_numpy()
+        )
+        cached = backtest_store.get(run_key(request.symbol, request.strategy, params, fingerprint))
+        if cached is not None:
+            return {**cached, "cached": True}
+        
         # 백테스트 실행 (간단한 시뮬레이션)
-        results = simulate_backtest(historical_data, request)
+        results = simulate_backtest(historical_data, request, cost_model)
+        
+        # 결과 저장 (SQLite + 자산 곡선 파일)
+        curve = np.empty(len(historical_data), dtype=EQUITY_DTYPE)
+        curve['time'] = historical_data.index.values.astype('datetime64[s]').astype(np.int64)
+        curve['equity'] = historical_data['equity'].fillna(request.capital).to_numpy()
+        results['run_id'] = backtest_store.put(
+            request.symbol, request.strategy, params, fingerprint, results, curve
+        )
+        
+        return results
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/backtest/portfolio")
+async def run_portfolio_backtest(request: PortfolioBacktestRequest):
+    """포트폴리오 백테스트 (공유 자본, 포지션/리스크/증거금 한도 적용)"""
+    from portfolio_backtest import PortfolioBacktester
+    
+    try:
+        symbols = request.symbols or config.SYMBOLS
+        print(f"📊 Running portfolio backtest for {len(symbols)} symbols...")
+        
+        days = int(request.period.replace('d', ''))
+        bars_needed = days * 86400 // mt5_data_client._get_timeframe_seconds(request.timeframe)
+        
+        history = await mt5_data_client.backfill_history(symbols, [request.timeframe], bars_needed + 1)
+        # 형성 중인 봉 제외 (같은 마감 봉이면 같은 지문으로 저장소 재사용)
+        closed = {symbol: rates[:-1] for (symbol, _), rates in history.items() if len(rates) > 1}
+        bars = {
+            symbol: {
+                'time': rates['time'],
+                'high': rates['high'],
+                'low': rates['low'],
+                'close': rates['close'],
+                'spread': rates['spread'].astype(float)
+            }
+            for symbol, rates in closed.items()
+        }
+        if not bars:
+            raise HTTPException(status_code=404, detail="No data for requested symbols")
         
-        # 결과 저장
-        backtest_results[request.symbol] = results
+        params = request.model_dump(exclude={'symbols'})
+        params['symbols'] = sorted(bars)
+        fingerprint = data_fingerprint(*[closed[symbol] for symbol in sorted(bars)])
+        cached = backtest_store.get(run_key('PORTFOLIO', 'portfolio', params, fingerprint))
+        if cached is not None:
+            return {**cached, "cached": True}
         
+        specs = {symbol: mt5_data_client.get_symbol_info(symbol) or {} for symbol in bars}
+        cost_models = None
+        if request.include_costs:
+            cost_models = {
+                symbol: ExecutionCostModel.from_symbol_info(
+                    spec,
+                    commission_per_lot=request.commission_per_lot,
+                    slippage_model=request.slippage_model,
+                    slippage_points=request.slippage_points
+                )
+                for symbol, spec in specs.items()
+            }
+        
+        backtester = PortfolioBacktester(
+            request.capital,
+            max_open_positions=request.max_open_positions,
+            risk_per_trade=request.risk_per_trade,
+            max_daily_loss=request.max_daily_loss,
+            leverage=request.leverage
+        )
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(
+            None, lambda: backtester.run(bars, specs, cost_models=cost_models, timeframe=request.timeframe)
+        )
+        results.update({
+            "symbols_requested": symbols,
+            "timeframe": request.timeframe,
+            "period": request.period
+        })
+        
+        curve = np.array(
+            [(point['time'], point['equity']) for point in results['equity_curve']],
+            dtype=EQUITY_DTYPE
+        )
+        results['run_id'] = backtest_store.put('PORTFOLIO', 'portfolio', params, fingerprint, results, curve)
         return results
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/backtests/rank")
+async def rank_backtests(
+    metric: str = "sharpe_ratio",
+    symbol: Optional[str] = None,
+    strategy: Optional[str] = None,
+    limit: int = 20,
+    ascending: bool = False
+):
+    """저장된 백테스트 순위 조회 (인덱스 기반)"""
+    try:
+        runs = backtest_store.rank(metric, symbol, strategy, limit, ascending)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"metric": metric, "total_runs": backtest_store.count(), "runs": runs}
+
+
+@app.get("/backtests/{run_id}/equity")
+async def get_backtest_equity(run_id: str):
+    """저장된 백테스트의 자산 곡선 조회"""
+    curve = backtest_store.equity_curve(run_id)
+    if curve is None:
+        raise HTTPException(status_code=404, detail=f"No equity curve for {run_id}")
+    return {
+        "run_id": run_id,
+        "time": curve['time'].tolist(),
+        "equity": curve['equity'].tolist()
+    }
+
+
+def export_format(request: Request, fmt: Optional[str]) -> str:
+    """Accept 헤더(또는 format 파라미터)로 내보내기 형식 결정"""
+    try:
+        return negotiate(request.headers.get('accept'), fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+
+def export_response(request: Request, columns: Dict, fmt: Optional[str], filename: str) -> StreamingResponse:
+    """Accept 헤더(또는 format 파라미터)에 맞춰 청크 단위로 스트리밍"""
+    fmt = export_format(request, fmt)
+    return StreamingResponse(
+        encode_chunks(fmt, columns),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
+
+
+async def export_stream_response(request: Request, parts, fmt: Optional[str], filename: str, symbol: str) -> StreamingResponse:
+    """가져오는 대로 청크 단위로 인코딩해 스트리밍 (전체 기록을 메모리에 올리지 않음)"""
+    if not mt5_data_client.mt5_initialized:
+        raise HTTPException(status_code=503, detail="MT5 not connected")
+    fmt = export_format(request, fmt)
+    first = await anext(parts, None)
+    if first is None:
+        raise HTTPException(status_code=404, detail=f"No data for {symbol}")
+    return StreamingResponse(
+        encode_stream(fmt, first, parts),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
+
+
+def export_count(count: Optional[int]) -> int:
+    """내보낼 최신 봉 수 (기본값 및 상한 적용)"""
+    return min(count or config.EXPORT_DEFAULT_BARS, config.EXPORT_MAX_BARS)
+
+
+@app.get("/export/bars/{symbol}")
+async def export_bars(
+    request: Request,
+    symbol: str,
+    timeframe: str = "M1",
+    count: Optional[int] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    format: Optional[str] = None
+):
+    """봉 데이터 대량 내보내기 (Arrow IPC / msgpack / NDJSON, 시간은 epoch 초, start/end는 기간 조회)"""
+    chunks = mt5_data_client.iter_rates(symbol, timeframe, export_count(count), start, end)
+    parts = (bar_columns(rates) async for rates in chunks)
+    return await export_stream_response(request, parts, format, f"{symbol}_{timeframe}", symbol)
+
+
+@app.get("/export/signals/{symbol}")
+async def export_signals(
+    request: Request,
+    symbol: str,
+    timeframe: str = "M15",
+    count: Optional[int] = None,
+    format: Optional[str] = None
+):
+    """마감된 봉별 규칙 신호 대량 내보내기 (/indicators와 동일한 점수)"""
+    chunks = mt5_data_client.iter_rates(symbol, timeframe, export_count(count), closed=True)
+    return await export_stream_response(request, signal_stream(chunks), format, f"{symbol}_{timeframe}_signals", symbol)
+
+
+@app.get("/export/equity/{run_id}")
+async def export_equity(request: Request, run_id: str, format: Optional[str] = None):
+    """백테스트 자산 곡선 대량 내보내기 (메모리 매핑된 파일에서 스트리밍)"""
+    curve = backtest_store.equity_curve(run_id)
+    if curve is None:
+        raise HTTPException(status_code=404, detail=f"No equity curve for {run_id}")
+    return export_response(request, {"time": curve['time'], "equity": curve['equity']}, format, f"equity_{run_id}")
+
+
+@app.get("/shadow/leaderboard")
+async def get_shadow_leaderboard(
+    metric: str = "net_pnl",
+    symbol: Optional[str] = None,
+    limit: int = 20,
+    ascending: bool = False
+):
+    """섀도우 페이퍼 트레이딩 변형 전략 순위 (메모리)"""
+    try:
+        rows = shadow_trading_engine.leaderboard(metric, symbol, limit, ascending)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "metric": metric,
+        "timeframe": shadow_trading_engine.timeframe,
+        "variants": shadow_trading_engine.variant_count,
+        "symbols": list(shadow_trading_engine.books),
+        "running_since": shadow_trading_engine.started_at,
+        "leaderboard": rows
+    }
+
+
 @app.get("/performance/{symbol}")
-async def get_performance(symbol: str):
-    """성과 지표 조회"""
-    if symbol not in backtest_results:
+async def get_performance(request: Request, symbol: str, strategy: Optional[str] = None):
+    """성과 지표 조회 (가장 최근 저장된 백테스트, 새 실행이 저장될 때만 다시 직렬화)"""
+    run = backtest_store.latest_run(symbol, strategy)
+    if run is None:
         raise HTTPException(status_code=404, detail=f"No backtest results for {symbol}")
     
-    results = backtest_results[symbol]
+    key = ('performance', symbol, strategy)
+    run_id, created_at = run
+    entry = response_cache.lookup(key, run)
+    if entry is None:
+        results = backtest_store.get(run_id)
+        entry = response_cache.store(key, run, {
+            "symbol": symbol,
+            "run_id": results.get("run_id"),
+            "sharpe_ratio": results.get("sharpe_ratio", 0),
+            "sortino_ratio": results.get("sortino_ratio", 0),
+            "max_drawdown": results.get("max_drawdown", 0),
+            "win_rate": results.get("win_rate", 0),
+            "profit_factor": results.get("profit_factor", 0),
+            "total_return": results.get("total_return", 0),
+            "total_trades": results.get("total_trades", 0)
+        }, version=run_id, last_modified=created_at)
+    return response_cache.respond(request, entry)
+
+
+@app.get("/risk/correlation")
+async def get_correlation_matrix(symbols: Optional[List[str]] = Query(None)):
+    """롤링 상관계수 행렬 조회 (메모리)"""
+    return {
+        "timeframe": risk_analytics.timeframe,
+        "window": risk_analytics.cov.count,
+        "correlation": risk_analytics.correlation_matrix(symbols)
+    }
+
+
+@app.get("/risk/portfolio")
+async def get_portfolio_risk(
+    confidence: float = Query(config.VAR_CONFIDENCE, gt=0, lt=1),
+    horizon: int = Query(1, ge=1)
+):
+    """현재 포지션 기준 포트폴리오 변동성 및 VaR/CVaR 조회 (historical/parametric/monte_carlo)"""
+    await position_tracker.ensure_fresh()
+    
+    specs = {
+        symbol: mt5_data_client.get_symbol_info(symbol)
+        for symbol in set(position_tracker.positions['symbol'].tolist())
+    }
+    equity = position_tracker.account.get('equity', 0)
+    exposures = position_exposures(position_tracker.positions, specs, equity)
     
     return {
-        "symbol": symbol,
-        "sharpe_ratio": results.get("sharpe_ratio", 0),
-        "sortino_ratio": results.get("sortino_ratio", 0),
-        "max_drawdown": results.get("max_drawdown", 0),
-        "win_rate": results.get("win_rate", 0),
-        "profit_factor": results.get("profit_factor", 0),
-        "total_return": results.get("total_return", 0),
-        "total_trades": results.get("total_trades", 0)
+        "equity": equity,
+        "exposures": exposures,
+        "portfolio_volatility": risk_analytics.portfolio_volatility(exposures),
+        "value_at_risk": risk_analytics.value_at_risk(exposures, equity, confidence, horizon),
+        "confidence": confidence,
+        "horizon_bars": horizon,
+        "betas": {symbol: risk_analytics.beta(symbol) for symbol in exposures},
+        "benchmark": risk_analytics.benchmark
     }
 
 
 @app.get("/risk/{symbol}")
-async def get_risk_metrics(symbol: str):
-    """리스크 지표 조회"""
-    if symbol not in backtest_results:
-        raise HTTPException(status_code=404, detail=f"No backtest results for {symbol}")
+async def get_risk_metrics(symbol: str, benchmark: Optional[str] = None):
+    """리스크 지표 조회 (베타/상관계수는 롤링 공분산 엔진에서 계산)"""
+    results = backtest_store.latest(symbol)
+    if results is None and symbol not in risk_analytics.index:
+        raise HTTPException(status_code=404, detail=f"No risk data for {symbol}")
     
-    results = backtest_results[symbol]
+    results = results or {}
+    live_volatility = risk_analytics.volatility(symbol)
     
     return {
         "symbol": symbol,
         "var_95": results.get("var_95", 0),
         "cvar_95": results.get("cvar_95", 0),
-        "volatility": results.get("volatility", 0),
-        "beta": results.get("beta", 1.0),
-        "correlation": results.get("correlation", {}),
+        "volatility": live_volatility if live_volatility is not None else results.get("volatility", 0),
+        "beta": risk_analytics.beta(symbol, benchmark),
+        "benchmark": benchmark or risk_analytics.benchmark,
+        "correlation": risk_analytics.correlations(symbol),
         "downside_deviation": results.get("downside_deviation", 0)
     }
 
 
 @app.get("/indicators/{symbol}")
-async def get_current_indicators(symbol: str):
-    """현재 기술 지표 조회"""
+async def get_current_indicators(request: Request, symbol: str):
+    """현재 기술 지표 조회 (마감된 봉 기준, 새 봉이 마감될 때만 다시 계산)"""
     try:
-        # 최신 데이터 가져오기
-        bars = await mt5_data_client.get_historical_bars(symbol, 'M15', 100)
+        # 마지막으로 마감된 봉이 바뀌지 않았으면 저장된 응답 사용
+        seconds = mt5_data_client._get_timeframe_seconds('M15')
+        now = mt5_data_client.clock()
+        expected = int(now // seconds) * seconds - seconds
+        key = ('indicators', symbol)
+        validity = (expected, model_scorer.batches)
+        entry = response_cache.lookup(key, validity)
+        if entry is not None:
+            return response_cache.respond(request, entry)
+        
+        # 최신 데이터 가져오기 (형성 중인 봉 제외)
+        bars = await mt5_data_client.get_historical_bars(symbol, 'M15', 101)
+        bars = bars.iloc[:-1]
         
         if bars.empty:
             raise HTTPException(status_code=404, detail=f"No data for {symbol}")
         
         # 지표 계산
-        indicators = calculate_indicators(bars)
+        indicators = calculate_indicators(bars, label=series_label(symbol, 'M15'))
         
-        # 신호 생성
+        # 신호 생성 (모델 점수가 있으면 신뢰도에 반영)
         signal = generate_signal(indicators)
+        model_score = model_scorer.score(symbol)
         
-        return SignalResponse(
+        # 마감 직후 MT5에 새 봉이 아직 없으면 저장하지 않고 다음 요청에서 다시 계산
+        bar_time = int(bars.index[-1].timestamp())
+        complete = bar_time >= expected or not trading_calendar.is_open(
+            symbol, mt5_data_client.get_symbol_info(symbol), now
+        )
+        entry = response_cache.store(key, validity if complete else None, SignalResponse(
             symbol=symbol,
             action=signal['action'],
-            confidence=signal['confidence'],
+            confidence=blend_confidence(signal['action'], signal['confidence'], model_score),
+            model_score=model_score,
             indicators=indicators,
             timestamp=datetime.now()
-        )
+        ), version=(bar_time, model_score), last_modified=bar_time + seconds)
+        return response_cache.respond(request, entry)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/chart/{symbol}")
+async def get_chart_data(
+    symbol: str,
+    timeframe: str = config.DEFAULT_TIMEFRAME,
+    points: int = 1000,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    mode: str = "ohlc"
+):
+    """차트용 다운샘플 데이터 (ohlc 버킷 / lttb / minmax, 줌 피라미드 캐시)"""
+    from chart_data import chart_data_service
+    
+    if mode not in ('ohlc', 'lttb', 'minmax'):
+        raise HTTPException(status_code=400, detail=f"Unknown mode: {mode}")
+    
+    chart = await chart_data_service.get_chart(symbol, timeframe, points, start, end, mode)
+    if chart is None:
+        raise HTTPException(status_code=404, detail=f"No data for {symbol}")
+    return chart
+
+
 @app.get("/prices")
-async def get_current_prices(symbols: Optional[List[str]] = None):
-    """현재 가격 조회"""
+async def get_current_prices(
+    symbols: Optional[List[str]] = Query(None),
+    max_age: Optional[float] = None
+):
+    """현재 가격 조회 (메모리 스냅샷, max_age초보다 오래되면 갱신)"""
+    if not mt5_data_client.mt5_initialized:
+        raise HTTPException(status_code=503, detail="MT5 not connected")
     if not symbols:
         symbols = config.SYMBOLS
     
-    prices = await mt5_data_client.get_current_prices(symbols)
+    prices = await price_snapshot_service.get_prices(symbols, max_age)
     return prices
 
 
+@app.get("/screener")
+async def get_screener(
+    timeframe: str = "M15",
+    metric: str = "signal_strength",
+    direction: Optional[str] = None,
+    min_strength: int = 0,
+    limit: int = 50,
+    ascending: bool = False
+):
+    """전체 종목 스크리너 (첫 요청 시 전체 스캔, 이후 봉 마감마다 증분 갱신)"""
+    if not mt5_data_client.mt5_initialized:
+        raise HTTPException(status_code=503, detail="MT5 not connected")
+    if timeframe not in TIMEFRAME_MAP:
+        raise HTTPException(status_code=400, detail=f"Unknown timeframe: {timeframe}")
+    
+    universe = await screener.get(timeframe)
+    try:
+        rows = universe.rank(metric, direction, min_strength, limit, ascending)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "timeframe": timeframe,
+        "metric": metric,
+        "symbols_scanned": len(universe.symbols),
+        "scanned_at": universe.scanned_at,
+        "scan_seconds": round(universe.scan_seconds, 4),
+        "results": rows
+    }
+
+
+@app.get("/model/metrics")
+async def get_model_metrics():
+    """모델 스코어링 지연 시간 및 배치 통계 조회"""
+    return {
+        **model_scorer.metrics(),
+        "scores": model_scorer.scores
+    }
+
+
+@app.get("/depth/{symbol}")
+async def get_market_depth(symbol: str, levels: int = 10, points: Optional[float] = None):
+    """호가창(시장 심도) 특성 조회 (첫 요청 시 구독)"""
+    if symbol not in market_depth_service.books:
+        if not mt5_data_client.mt5_initialized:
+            raise HTTPException(status_code=503, detail="MT5 not connected")
+        if not market_depth_service.subscribe(symbol):
+            raise HTTPException(status_code=404, detail=f"No market depth for {symbol}")
+    
+    book = market_depth_service.books[symbol]
+    return {
+        "symbol": symbol,
+        "features": book.feature_dict(),
+        "available_volume": {
+            side: market_depth_service.available_volume(symbol, side, points)
+            for side in ('BUY', 'SELL')
+        },
+        **book.levels(levels)
+    }
+
+
 @app.post("/subscribe/{symbol}")
 async def subscribe_to_symbol(symbol: str):
     """심볼 구독 시작"""
@@ -219,15 +679,24 @@ async def unsubscribe_from_symbol(symbol: str):
     return {"status": "unsubscribed", "symbol": symbol}
 
 
-def simulate_backtest(data, request):
-    """간단한 백테스트 시뮬레이션"""
+def simulate_backtest(data, request, cost_model=None):
+    """간단한 백테스트 시뮬레이션 (cost_model이 있으면 거래 비용 차감)"""
     import numpy as np
     import pandas as pd
     
-    # 지표 계산
+    from indicator_cache import indicator_graph
+    
+    # 지표 계산 (동일 데이터의 반복 요청은 캐시 재사용)
+    values = indicator_graph.compute(
+        data['high'].to_numpy(),
+        data['low'].to_numpy(),
+        data['close'].to_numpy(),
+        {'sma': [20], 'rsi': [14]},
+        label=series_label(request.symbol, 'M15')
+    )
     data['returns'] = data['close'].pct_change()
-    data['sma_20'] = data['close'].rolling(window=20).mean()
-    data['rsi'] = calculate_rsi(data['close'])
+    data['sma_20'] = values['sma_20']
+    data['rsi'] = values['rsi_14']
     
     # 신호 생성
     data['signal'] = 0
@@ -237,6 +706,23 @@ def simulate_backtest(data, request):
     # 포지션 및 수익 계산
     data['position'] = data['signal'].shift(1)
     data['strategy_returns'] = data['position'] * data['returns']
+    gross_return = (1 + data['strategy_returns']).prod() - 1
+    
+    # 거래 비용 차감 (배열 연산)
+    costs = {}
+    if cost_model is not None:
+        times = data.index.values.astype('datetime64[s]').astype(np.int64)
+        spread = data['spread'].to_numpy() if 'spread' in data else None
+        cost_arrays = cost_model.compute(
+            times,
+            data['close'].to_numpy(),
+            data['position'].to_numpy(),
+            spread=spread,
+            high=data['high'].to_numpy(),
+            low=data['low'].to_numpy()
+        )
+        data['strategy_returns'] = data['strategy_returns'] - cost_arrays['total']
+        costs = {name: float(values.sum() * 100) for name, values in cost_arrays.items()}
     
     # 성과 지표 계산
     total_return = (1 + data['strategy_returns']).prod() - 1
@@ -244,6 +730,7 @@ def simulate_backtest(data, request):
     
     # 낙폭 계산
     cumulative = (1 + data['strategy_returns']).cumprod()
+    data['equity'] = cumulative * request.capital
     running_max = cumulative.cummax()
     drawdown = (cumulative - running_max) / running_max
     max_drawdown = drawdown.min()
@@ -261,6 +748,8 @@ def simulate_backtest(data, request):
         "period": request.period,
         "capital": request.capital,
         "total_return": float(total_return * 100),
+        "gross_return": float(gross_return * 100),
+        "costs": costs,
         "sharpe_ratio": float(sharpe_ratio),
         "sortino_ratio": float(sharpe_ratio * 0.8),  # 간단한 추정
         "max_drawdown": float(max_drawdown * 100),
@@ -270,52 +759,43 @@ def simulate_backtest(data, request):
         "var_95": float(data['returns'].quantile(0.05) * 100),
         "cvar_95": float(data['returns'][data['returns'] <= data['returns'].quantile(0.05)].mean() * 100),
         "volatility": float(data['returns'].std() * np.sqrt(252) * 100),
-        "beta": 1.0,
         "downside_deviation": float(data[data['returns'] < 0]['returns'].std() * np.sqrt(252) * 100)
     }
 
 
 def calculate_rsi(prices, period=14):
-    """RSI 계산"""
-    delta = prices.diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-def calculate_indicators(data):
-    """기술 지표 계산"""
-    close = data['close']
-    
-    # 이동평균
-    sma_20 = close.rolling(window=20).mean().iloc[-1]
-    ema_12 = close.ewm(span=12).mean().iloc[-1]
-    ema_26 = close.ewm(span=26).mean().iloc[-1]
-    
-    # RSI
-    rsi = calculate_rsi(close).iloc[-1]
+    """RSI 계산 (Wilder, 전략과 동일한 커널)"""
+    import pandas as pd
+    from indicators import rsi
     
-    # MACD
-    macd_line = ema_12 - ema_26
+    return pd.Series(rsi(prices.to_numpy(), period), index=prices.index)
+
+
+def calculate_indicators(data, label=''):
+    """기술 지표 계산 (TechnicalStrategy와 동일한 지표 커널, 메모이즈된 지표 그래프)"""
+    from indicator_cache import indicator_graph
     
-    # ATR
-    high_low = data['high'] - data['low']
-    high_close = abs(data['high'] - close.shift())
-    low_close = abs(data['low'] - close.shift())
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = ranges.max(axis=1)
-    atr = true_range.rolling(window=14).mean().iloc[-1]
+    values = indicator_graph.compute(
+        data['high'].to_numpy(),
+        data['low'].to_numpy(),
+        data['close'].to_numpy(),
+        label=label
+    )
+    latest = {name: float(series[-1]) for name, series in values.items()}
     
     return {
-        "sma_20": float(sma_20),
-        "ema_12": float(ema_12),
-        "ema_26": float(ema_26),
-        "rsi": float(rsi),
-        "macd": float(macd_line),
-        "atr": float(atr),
-        "current_price": float(close.iloc[-1])
+        "sma_20": latest['sma_20'],
+        "ema_12": latest['ema_12'],
+        "ema_26": latest['ema_26'],
+        "rsi": latest['rsi_14'],
+        "macd": latest['macd_12_26_9'],
+        "macd_signal": latest['macd_signal_12_26_9'],
+        "macd_hist": latest['macd_hist_12_26_9'],
+        "bb_upper": latest['bb_upper_20_2.0'],
+        "bb_middle": latest['bb_middle_20_2.0'],
+        "bb_lower": latest['bb_lower_20_2.0'],
+        "atr": latest['atr_14'],
+        "current_price": float(data['close'].iloc[-1])
     }
 
 
@@ -0,0 +1,175 @@
+"""
+Backtest Execution Cost Model
+Vectorized spread, commission, slippage and swap costs for bar backtests
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+
+SECONDS_PER_DAY = 86400
+EPOCH_WEEKDAY = 3  # 1970-01-01 was a Thursday (Monday = 0)
+
+
+def _count_weekday(first_day: np.ndarray, last_day: np.ndarray, weekday: int) -> np.ndarray:
+    """
+    Count days with the given weekday in [first_day, last_day)
+
+    Args:
+        first_day: Epoch day numbers (inclusive)
+        last_day: Epoch day numbers (exclusive)
+        weekday: Weekday to count (Monday = 0)
+
+    Returns:
+        Number of matching days per element
+    """
+    offset = (weekday - EPOCH_WEEKDAY) % 7
+    
+    def below(day):
+        return (day - offset + 6) // 7
+    
+    return below(last_day) - below(first_day)
+
+
+class ExecutionCostModel:
+    """
+    Per-bar execution costs for a position series
+
+    Costs are expressed in return units (fraction of notional), so they
+    can be subtracted directly from the close-to-close strategy returns.
+    Positions are signed fractions of capital, e.g. -1, 0 or 1.
+
+    Slippage models:
+    - 'none': no slippage
+    - 'fixed': slippage_points per unit traded
+    - 'range': slippage_range_fraction of the bar high-low range per unit traded
+    """
+
+    SLIPPAGE_MODELS = ('none', 'fixed', 'range')
+
+    def __init__(
+        self,
+        point: float,
+        contract_size: float,
+        spread_points: float = 0.0,
+        commission_per_lot: float = 0.0,
+        slippage_model: str = 'fixed',
+        slippage_points: float = 0.0,
+        slippage_range_fraction: float = 0.1,
+        swap_long: float = 0.0,
+        swap_short: float = 0.0,
+        triple_swap_weekday: int = 2
+    ):
+        if slippage_model not in self.SLIPPAGE_MODELS:
+            raise ValueError(f"Unknown slippage model: {slippage_model}")
+
+        self.point = point
+        self.contract_size = contract_size
+        self.spread_points = spread_points
+        self.commission_per_lot = commission_per_lot
+        self.slippage_model = slippage_model
+        self.slippage_points = slippage_points
+        self.slippage_range_fraction = slippage_range_fraction
+        self.swap_long = swap_long
+        self.swap_short = swap_short
+        self.triple_swap_weekday = triple_swap_weekday
+
+    @classmethod
+    def from_symbol_info(cls, spec: Dict, **overrides) -> 'ExecutionCostModel':
+        """
+        Build a cost model from a cached MT5 symbol specification
+
+        Args:
+            spec: Entry of MT5DataClient.symbol_info_cache
+            **overrides: Constructor arguments taking precedence over spec
+
+        Returns:
+            ExecutionCostModel instance
+        """
+        params = {
+            'point': spec.get('point', 0.0),
+            'contract_size': spec.get('contract_size', 1.0),
+            'spread_points': spec.get('spread', 0.0),
+            'swap_long': spec.get('swap_long', 0.0),
+            'swap_short': spec.get('swap_short', 0.0)
+        }
+        params.update(overrides)
+        return cls(**params)
+
+    def swap_nights(self, times: np.ndarray) -> np.ndarray:
+        """
+        Number of swap charges incurred while holding into each bar
+
+        Weekend nights are not charged; the triple swap weekday is charged
+        three times instead, as MT5 brokers do.
+
+        Args:
+            times: Bar open times in epoch seconds
+
+        Returns:
+            Swap multiplier per bar (0 for the first bar)
+        """
+        days = times.astype(np.int64) // SECONDS_PER_DAY
+        first, last = days[:-1], days[1:]
+
+        nights = np.zeros(len(times))
+        for weekday in range(5):
+            count = _count_weekday(first, last, weekday)
+            nights[1:] += count * (3 if weekday == self.triple_swap_weekday else 1)
+        return nights
+
+    def compute(
+        self,
+        times: np.ndarray,
+        close: np.ndarray,
+        position: np.ndarray,
+        spread: Optional[np.ndarray] = None,
+        high: Optional[np.ndarray] = None,
+        low: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Compute per-bar costs for a position series
+
+        Args:
+            times: Bar times in epoch seconds
+            close: Close prices
+            position: Position held over each bar (already shifted)
+            spread: Recorded spread per bar in points (defaults to spread_points)
+            high: Bar highs (required for 'range' slippage)
+            low: Bar lows (required for 'range' slippage)
+
+        Returns:
+            Dictionary of 'spread', 'commission', 'slippage', 'swap' and
+            'total' cost arrays in return units (swap credits are negative)
+        """
+        close = np.asarray(close, dtype=np.float64)
+        position = np.nan_to_num(np.asarray(position, dtype=np.float64))
+
+        # Units traded at each bar (entering, exiting or reversing)
+        turnover = np.abs(np.diff(position, prepend=0.0))
+
+        if spread is None:
+            spread = self.spread_points
+        spread_cost = turnover * 0.5 * np.asarray(spread, dtype=np.float64) * self.point / close
+
+        commission_cost = turnover * self.commission_per_lot / (self.contract_size * close)
+
+        if self.slippage_model == 'fixed':
+            slippage_cost = turnover * self.slippage_points * self.point / close
+        elif self.slippage_model == 'range':
+            slippage_cost = turnover * self.slippage_range_fraction * (high - low) / close
+        else:
+            slippage_cost = np.zeros_like(close)
+
+        # Swap is charged on the position carried over rollover into the bar
+        swap_points = np.where(position > 0, self.swap_long, self.swap_short)
+        swap_cost = -np.abs(position) * swap_points * self.point * self.swap_nights(times) / close
+
+        return {
+            'spread': spread_cost,
+            'commission': commission_cost,
+            'slippage': slippage_cost,
+            'swap': swap_cost,
+            'total': spread_cost + commission_cost + slippage_cost + swap_cost
+        }
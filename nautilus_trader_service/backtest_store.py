@@ -0,0 +1,217 @@
+"""
+Backtest Result Store
+Persistent, indexed backtest runs (SQLite) with columnar equity-curve files
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import config
+
+
+# Metrics stored as indexed columns (everything else stays in the JSON blob)
+METRIC_COLUMNS = (
+    'total_return', 'sharpe_ratio', 'sortino_ratio', 'max_drawdown', 'win_rate',
+    'total_trades', 'volatility', 'var_95', 'cvar_95'
+)
+
+EQUITY_DTYPE = np.dtype([('time', np.int64), ('equity', np.float64)])
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    symbol TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    params TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    {', '.join(f'{column} REAL' for column in METRIC_COLUMNS)},
+    results TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_symbol_created ON runs(symbol, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_strategy_created ON runs(strategy, created_at);
+{''.join(
+    f'CREATE INDEX IF NOT EXISTS idx_runs_{column} ON runs({column});'
+    f'CREATE INDEX IF NOT EXISTS idx_runs_symbol_{column} ON runs(symbol, {column});'
+    for column in METRIC_COLUMNS
+)}
+"""
+
+
+def run_key(symbol: str, strategy: str, params: Dict, fingerprint: str) -> str:
+    """
+    Deterministic run id for a backtest
+
+    Args:
+        symbol: Trading symbol (or 'PORTFOLIO')
+        strategy: Strategy name
+        params: Backtest parameters (JSON serializable)
+        fingerprint: Fingerprint of the input data
+
+    Returns:
+        Hex run id
+    """
+    payload = json.dumps([symbol, strategy, params, fingerprint], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class BacktestStore:
+    """
+    Backtest results keyed by symbol, strategy, parameters and data fingerprint
+
+    Summary metrics live in indexed SQLite columns so runs can be filtered
+    and ranked without loading them; full results are a JSON column and
+    equity curves are separate ``.npy`` files (time, equity) read on demand.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory or config.BACKTEST_STORE_DIR)
+        self.curve_dir = self.directory / 'equity'
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.curve_dir.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.directory / 'backtests.db', check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def get(self, run_id: str) -> Optional[Dict]:
+        """Full results of a stored run, or None"""
+        with self._lock:
+            row = self.conn.execute('SELECT results FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        return json.loads(row['results']) if row else None
+
+    def put(
+        self,
+        symbol: str,
+        strategy: str,
+        params: Dict,
+        fingerprint: str,
+        results: Dict,
+        equity_curve: Optional[np.ndarray] = None
+    ) -> str:
+        """
+        Store a run (replacing an identical run)
+
+        Args:
+            symbol: Trading symbol (or 'PORTFOLIO')
+            strategy: Strategy name
+            params: Backtest parameters
+            fingerprint: Fingerprint of the input data
+            results: Result dictionary (JSON serializable)
+            equity_curve: EQUITY_DTYPE array, stored as a separate file
+
+        Returns:
+            Run id
+        """
+        run_id = run_key(symbol, strategy, params, fingerprint)
+        results = {**results, 'run_id': run_id}
+
+        if equity_curve is not None:
+            self.curve_dir.mkdir(parents=True, exist_ok=True)
+            np.save(self.curve_dir / f'{run_id}.npy', np.asarray(equity_curve, dtype=EQUITY_DTYPE))
+
+        metrics = [results.get(column) for column in METRIC_COLUMNS]
+        with self._lock:
+            self.conn.execute(
+                f'INSERT OR REPLACE INTO runs (run_id, symbol, strategy, params, fingerprint, created_at, '
+                f'{", ".join(METRIC_COLUMNS)}, results) '
+                f'VALUES ({", ".join("?" * (len(METRIC_COLUMNS) + 7))})',
+                (run_id, symbol, strategy, json.dumps(params, sort_keys=True, default=str), fingerprint,
+                 time.time(), *metrics, json.dumps(results, default=str))
+            )
+            self.conn.commit()
+        return run_id
+
+    def latest_run(self, symbol: str, strategy: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """(run_id, created_at) of the most recent run, without loading results"""
+        query = 'SELECT run_id, created_at FROM runs WHERE symbol = ?'
+        args = [symbol]
+        if strategy:
+            query += ' AND strategy = ?'
+            args.append(strategy)
+        query += ' ORDER BY created_at DESC LIMIT 1'
+        with self._lock:
+            row = self.conn.execute(query, args).fetchone()
+        return (row['run_id'], row['created_at']) if row else None
+
+    def latest(self, symbol: str, strategy: Optional[str] = None) -> Optional[Dict]:
+        """Most recent run for a symbol (optionally for one strategy)"""
+        query = 'SELECT results FROM runs WHERE symbol = ?'
+        args = [symbol]
+        if strategy:
+            query += ' AND strategy = ?'
+            args.append(strategy)
+        query += ' ORDER BY created_at DESC LIMIT 1'
+        with self._lock:
+            row = self.conn.execute(query, args).fetchone()
+        return json.loads(row['results']) if row else None
+
+    def rank(
+        self,
+        metric: str = 'sharpe_ratio',
+        symbol: Optional[str] = None,
+        strategy: Optional[str] = None,
+        limit: int = 20,
+        ascending: bool = False
+    ) -> List[Dict]:
+        """
+        Rank stored runs by a metric
+
+        Args:
+            metric: One of METRIC_COLUMNS
+            symbol: Filter by symbol
+            strategy: Filter by strategy
+            limit: Maximum rows
+            ascending: Sort lowest first (e.g. for max_drawdown magnitude)
+
+        Returns:
+            Run summaries (run id, key fields, params and metrics)
+        """
+        if metric not in METRIC_COLUMNS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        conditions, args = [f'{metric} IS NOT NULL'], []
+        if symbol:
+            conditions.append('symbol = ?')
+            args.append(symbol)
+        if strategy:
+            conditions.append('strategy = ?')
+            args.append(strategy)
+
+        query = (
+            f'SELECT run_id, symbol, strategy, params, fingerprint, created_at, {", ".join(METRIC_COLUMNS)} '
+            f'FROM runs WHERE {" AND ".join(conditions)} '
+            f'ORDER BY {metric} {"ASC" if ascending else "DESC"} LIMIT ?'
+        )
+        with self._lock:
+            rows = self.conn.execute(query, [*args, int(limit)]).fetchall()
+        return [{**dict(row), 'params': json.loads(row['params'])} for row in rows]
+
+    def equity_curve(self, run_id: str) -> Optional[np.ndarray]:
+        """Equity curve of a run (memory-mapped), or None"""
+        path = self.curve_dir / f'{run_id}.npy'
+        if not path.exists():
+            return None
+        return np.load(path, mmap_mode='r')
+
+    def count(self) -> int:
+        """Number of stored runs"""
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+
+
+# Singleton instance
+backtest_store = BacktestStore()
@@ -0,0 +1,291 @@
+"""
+Bulk Export
+Chunked Arrow IPC, msgpack and NDJSON encoding of NumPy columns for large downloads
+"""
+
+import importlib.util
+import json
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from config import config
+from indicators import compute_indicators
+
+
+# Format name to media type
+EXPORT_FORMATS = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'msgpack': 'application/msgpack',
+    'ndjson': 'application/x-ndjson'
+}
+MEDIA_TYPE_ALIASES = {
+    'application/x-msgpack': 'msgpack',
+    'application/vnd.msgpack': 'msgpack',
+    'application/jsonl': 'ndjson'
+}
+
+# Optional packages behind each binary format
+FORMAT_MODULES = {'arrow': 'pyarrow', 'msgpack': 'msgpack'}
+
+BAR_FIELDS = ('time', 'open', 'high', 'low', 'close', 'tick_volume', 'spread', 'real_volume')
+SIGNAL_SPEC = {'ema': [12, 26], 'rsi': [14], 'macd': [(12, 26, 9)]}
+# Bars of the previous chunk replayed before each chunk of signals; the
+# recursive indicators converge to the same floats well within it
+SIGNAL_WARMUP_BARS = 1000
+
+# Arrow IPC end-of-stream marker (continuation token, zero length)
+ARROW_EOS = b'\xff\xff\xff\xff\x00\x00\x00\x00'
+
+
+def available(fmt: str) -> bool:
+    """Whether the package a format needs is installed"""
+    module = FORMAT_MODULES.get(fmt)
+    return module is None or importlib.util.find_spec(module) is not None
+
+
+def negotiate(accept: Optional[str], requested: Optional[str] = None) -> str:
+    """
+    Pick an export format
+
+    Args:
+        accept: Accept header
+        requested: Explicit format query parameter (wins over Accept)
+
+    Returns:
+        Key of EXPORT_FORMATS ('ndjson' when the client accepts anything);
+        formats whose package is missing are never chosen
+
+    Raises:
+        ValueError: No acceptable format
+    """
+    if requested:
+        if requested not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown format: {requested}")
+        if not available(requested):
+            raise ValueError(f"{requested} export needs the {FORMAT_MODULES[requested]} package")
+        return requested
+
+    ranges = []
+    for position, part in enumerate((accept or '*/*').split(',')):
+        media, _, params = part.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            ranges.append((-q, position, media.strip().lower()))
+
+    media_names = {**{media_type: name for name, media_type in EXPORT_FORMATS.items()}, **MEDIA_TYPE_ALIASES}
+    for _, _, media in sorted(ranges):
+        if media in ('*/*', 'application/*'):
+            return 'ndjson'
+        name = media_names.get(media)
+        if name is not None and available(name):
+            return name
+    raise ValueError(f"Supported formats: {', '.join(EXPORT_FORMATS.values())}")
+
+
+def _slices(rows: int, chunk_rows: int) -> Iterator[slice]:
+    for start in range(0, rows, chunk_rows):
+        yield slice(start, min(start + chunk_rows, rows))
+
+
+def _ndjson_chunk(names, columns) -> bytes:
+    finite = all(not c.dtype.kind == 'f' or np.isfinite(c).all() for c in columns)
+    if not finite:
+        # NaN/inf are not JSON; fall back to per-row encoding with nulls
+        values = [[None if v != v or v in (np.inf, -np.inf) else v for v in c.tolist()] for c in columns]
+        return ''.join(json.dumps(dict(zip(names, row)), separators=(',', ':')) + '\n'
+                       for row in zip(*values)).encode('utf-8')
+
+    # One format string per chunk; floats use repr like json.dumps
+    template = '{' + ','.join(
+        f'"{name}":' + ('%r' if c.dtype.kind == 'f' else '%d') for name, c in zip(names, columns)
+    ) + '}\n'
+    return ''.join(template % row for row in zip(*(c.tolist() for c in columns))).encode('utf-8')
+
+
+def _encoder(fmt: str, names: List[str], dtypes: List[np.dtype], rows: Optional[int]):
+    """(header, chunk encoder, trailer) of a format for the given columns"""
+    if fmt == 'arrow':
+        import pyarrow as pa
+
+        schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in zip(names, dtypes)])
+
+        def encode(columns):
+            return pa.RecordBatch.from_arrays(
+                [pa.array(np.ascontiguousarray(column)) for column in columns], schema=schema
+            ).serialize().to_pybytes()
+
+        return schema.serialize().to_pybytes(), encode, ARROW_EOS
+
+    if fmt == 'msgpack':
+        import msgpack
+
+        header = msgpack.packb({
+            'columns': names,
+            'dtypes': [dtype.str for dtype in dtypes],
+            'rows': rows
+        }, use_bin_type=True)
+
+        def encode(columns):
+            return msgpack.packb({
+                'rows': len(columns[0]) if columns else 0,
+                'data': [np.ascontiguousarray(column).tobytes() for column in columns]
+            }, use_bin_type=True)
+
+        return header, encode, b''
+
+    if fmt == 'ndjson':
+        return b'', lambda columns: _ndjson_chunk(names, columns), b''
+
+    raise ValueError(f"Unknown format: {fmt}")
+
+
+def encode_chunks(
+    fmt: str,
+    columns: Dict[str, np.ndarray],
+    chunk_rows: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Encode equal-length columns as a stream of byte chunks
+
+    Only one chunk of rows is encoded at a time, so the full payload is
+    never held in memory. Arrow yields an IPC stream (schema, one record
+    batch per chunk, end marker); msgpack yields a header map with column
+    names and NumPy dtype strings followed by one map per chunk holding
+    each column's raw bytes; NDJSON yields one object per row.
+
+    Args:
+        fmt: Key of EXPORT_FORMATS
+        columns: Column name to 1-D array (views into larger buffers are fine)
+        chunk_rows: Rows per chunk (defaults to EXPORT_CHUNK_ROWS)
+
+    Yields:
+        Encoded bytes
+    """
+    chunk_rows = chunk_rows or config.EXPORT_CHUNK_ROWS
+    names = list(columns)
+    rows = len(next(iter(columns.values()))) if columns else 0
+    header, encode, trailer = _encoder(fmt, names, [columns[name].dtype for name in names], rows)
+
+    if header:
+        yield header
+    for part in _slices(rows, chunk_rows):
+        yield encode([columns[name][part] for name in names])
+    if trailer:
+        yield trailer
+
+
+async def encode_stream(
+    fmt: str,
+    first: Dict[str, np.ndarray],
+    rest: AsyncIterator[Dict[str, np.ndarray]],
+    chunk_rows: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Encode column chunks as they are fetched
+
+    Same byte layout as encode_chunks, but the rows arrive as a series of
+    column dicts, so only one fetched chunk is in memory at a time. The
+    total is unknown up front: the msgpack header carries rows=None.
+
+    Args:
+        fmt: Key of EXPORT_FORMATS
+        first: First chunk; its columns set the names and dtypes
+        rest: Remaining chunks with the same columns
+        chunk_rows: Rows per encoded chunk (defaults to EXPORT_CHUNK_ROWS)
+
+    Yields:
+        Encoded bytes
+    """
+    chunk_rows = chunk_rows or config.EXPORT_CHUNK_ROWS
+    names = list(first)
+    header, encode, trailer = _encoder(fmt, names, [first[name].dtype for name in names], None)
+
+    if header:
+        yield header
+    columns = first
+    while columns is not None:
+        for part in _slices(len(columns[names[0]]), chunk_rows):
+            yield encode([columns[name][part] for name in names])
+        columns = await anext(rest, None)
+    if trailer:
+        yield trailer
+
+
+def bar_columns(rates: np.ndarray) -> Dict[str, np.ndarray]:
+    """Columns of an MT5 rates array (views, no copy)"""
+    return {name: rates[name] for name in BAR_FIELDS if name in rates.dtype.names}
+
+
+def signal_columns(rates: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Rule signals of the /indicators endpoint for every closed bar
+
+    Same scoring as generate_signal, vectorized over the history; bars
+    before the indicators are defined are left out.
+
+    Args:
+        rates: MT5 rates array of closed bars
+
+    Returns:
+        time, close, indicator, score, action (1 buy, -1 sell, 0 hold) and
+        confidence columns
+    """
+    ind = compute_indicators(rates['high'], rates['low'], rates['close'], SIGNAL_SPEC)
+    rsi = ind['rsi_14']
+    ema_fast, ema_slow, macd = ind['ema_12'], ind['ema_26'], ind['macd_12_26_9']
+
+    score = (
+        2 * (rsi < 30).astype(np.int8) - 2 * (rsi > 70).astype(np.int8)
+        + np.where(ema_fast > ema_slow, 1, -1).astype(np.int8)
+        + np.where(macd > 0, 1, -1).astype(np.int8)
+    )
+    action = ((score >= 2).astype(np.int8) - (score <= -2).astype(np.int8))
+    confidence = np.where(action != 0, np.minimum(np.abs(score) * 20, 100), 50).astype(np.float64)
+
+    ready = np.isfinite(rsi)
+    return {
+        'time': rates['time'][ready].astype(np.int64),
+        'close': rates['close'][ready],
+        'rsi': rsi[ready],
+        'ema_12': ema_fast[ready],
+        'ema_26': ema_slow[ready],
+        'macd': macd[ready],
+        'score': score[ready],
+        'action': action[ready],
+        'confidence': confidence[ready]
+    }
+
+
+async def signal_stream(chunks: AsyncIterator[np.ndarray]) -> AsyncIterator[Dict[str, np.ndarray]]:
+    """
+    signal_columns over a history fetched in chunks
+
+    Each chunk is evaluated after the last SIGNAL_WARMUP_BARS bars of the
+    previous one, so its signals match a single pass over the whole
+    history while only one chunk is held.
+
+    Args:
+        chunks: MT5 rates arrays of closed bars in time order
+
+    Yields:
+        signal_columns of each chunk's bars
+    """
+    tail = None
+    async for rates in chunks:
+        if tail is not None:
+            rates = np.concatenate([tail, rates])
+        signals = signal_columns(rates)
+        if tail is not None:
+            fresh = signals['time'] > tail['time'][-1]
+            signals = {name: column[fresh] for name, column in signals.items()}
+        tail = rates[-SIGNAL_WARMUP_BARS:].copy()
+        if len(signals['time']):
+            yield signals
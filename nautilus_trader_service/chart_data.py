@@ -0,0 +1,270 @@
+"""
+Chart Data
+Downsampled OHLC for dashboards: bucket decimation, LTTB and zoom pyramids
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import config
+from mt5_data_client import mt5_data_client
+
+
+OHLC_FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+
+def ohlc_buckets(bars: Dict[str, np.ndarray], points: int) -> Dict[str, np.ndarray]:
+    """
+    Aggregate bars into at most `points` OHLC buckets of equal bar count
+
+    Highs and lows are the bucket extremes, so spikes survive decimation.
+
+    Args:
+        bars: Columns in OHLC_FIELDS
+        points: Maximum number of output bars
+
+    Returns:
+        Aggregated columns (the input itself if it already fits)
+    """
+    n = len(bars['time'])
+    if n <= points:
+        return bars
+
+    starts = (np.arange(points) * n) // points
+    ends = np.append(starts[1:], n) - 1
+    return {
+        'time': bars['time'][starts],
+        'open': bars['open'][starts],
+        'high': np.maximum.reduceat(bars['high'], starts),
+        'low': np.minimum.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(bars['volume'], starts)
+    }
+
+
+def minmax_buckets(x: np.ndarray, y: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Min/max decimation of a line: keep the lowest and highest point per bucket
+
+    Args:
+        x: Sample positions (e.g. times)
+        y: Values
+        points: Maximum number of output points (two per bucket)
+
+    Returns:
+        (x, y) of the kept points in their original order
+    """
+    n = len(y)
+    buckets = points // 2
+    if n <= points or buckets < 1:
+        return x, y
+
+    starts = (np.arange(buckets) * n) // buckets
+    lengths = np.diff(np.append(starts, n))
+    bucket_id = np.repeat(np.arange(buckets), lengths)
+
+    # Position of min/max within each bucket via lexsort on (value, bucket)
+    order = np.lexsort((y, bucket_id))
+    lowest = order[starts]
+    highest = order[np.append(starts[1:], n) - 1]
+    keep = np.unique(np.concatenate([lowest, highest]))
+    return x[keep], y[keep]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Largest-Triangle-Three-Buckets downsampling of a line
+
+    The bucket loop is inherent to LTTB (each pick depends on the previous
+    one); the triangle areas inside a bucket are computed with arrays.
+
+    Args:
+        x: Sample positions (e.g. times)
+        y: Values
+        points: Number of output points (>= 3)
+
+    Returns:
+        (x, y) of the selected points
+    """
+    n = len(y)
+    if n <= points or points < 3:
+        return x, y
+
+    xf = x.astype(np.float64)
+    yf = y.astype(np.float64)
+    edges = 1 + ((np.arange(points - 1) * (n - 2)) // (points - 2))
+    edges[-1] = n - 1
+
+    # Average of each bucket, used as the third vertex for the previous bucket
+    sums_x = np.add.reduceat(xf[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(yf[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, xf[-1])
+    avg_y = np.append(sums_y / counts, yf[-1])
+
+    keep = np.empty(points, dtype=np.intp)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs(
+            (xf[a] - avg_x[i + 1]) * (yf[lo:hi] - yf[a]) -
+            (xf[a] - xf[lo:hi]) * (avg_y[i + 1] - yf[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+class ChartPyramid:
+    """
+    Zoom-level pyramid of OHLC bars for one symbol/timeframe
+
+    Level 0 holds the raw bars; each higher level aggregates `factor` bars
+    of the level below. A request picks the finest level whose bar count in
+    the requested range is within a few multiples of the point budget and
+    aggregates only that slice, so work per request is bounded regardless
+    of how much history is cached.
+    """
+
+    def __init__(self, bars: Dict[str, np.ndarray], factor: Optional[int] = None):
+        self.factor = factor or config.CHART_PYRAMID_FACTOR
+        self.levels: List[Dict[str, np.ndarray]] = [bars]
+        while len(self.levels[-1]['time']) > self.factor * 2:
+            previous = self.levels[-1]
+            points = -(-len(previous['time']) // self.factor)
+            self.levels.append(ohlc_buckets(previous, points))
+        self.built_at = time.time()
+
+    def query(
+        self,
+        points: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        oversample: int = 4
+    ) -> Tuple[Dict[str, np.ndarray], int]:
+        """
+        Bars in [start, end] reduced to at most `points`
+
+        Args:
+            points: Point budget
+            start: Range start in epoch seconds (inclusive)
+            end: Range end in epoch seconds (inclusive)
+            oversample: Accept a level with up to points * oversample bars
+
+        Returns:
+            (columns, pyramid level used)
+        """
+        for level, bars in enumerate(self.levels):
+            times = bars['time']
+            lo = 0 if start is None else np.searchsorted(times, start, side='left')
+            hi = len(times) if end is None else np.searchsorted(times, end, side='right')
+            if hi - lo <= points * oversample or level == len(self.levels) - 1:
+                window = {field: column[lo:hi] for field, column in bars.items()}
+                return ohlc_buckets(window, points), level
+        return {field: column[:0] for field, column in self.levels[0].items()}, 0
+
+
+class ChartDataService:
+    """
+    Cached chart pyramids per symbol/timeframe
+
+    Pyramids are built from the data client's history and rebuilt once they
+    are older than one bar of their timeframe.
+    """
+
+    def __init__(self, data_client, history_bars: Optional[int] = None):
+        self.data_client = data_client
+        self.history_bars = history_bars or config.CHART_HISTORY_BARS
+        self._pyramids: Dict[Tuple[str, str], ChartPyramid] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    async def get_pyramid(self, symbol: str, timeframe: str) -> Optional[ChartPyramid]:
+        """
+        Pyramid for a symbol/timeframe, building or refreshing it if stale
+
+        Returns:
+            ChartPyramid, or None if MT5 returned no bars
+        """
+        key = (symbol, timeframe)
+        max_age = self.data_client._get_timeframe_seconds(timeframe)
+        pyramid = self._pyramids.get(key)
+        if pyramid is not None and time.time() - pyramid.built_at < max_age:
+            return pyramid
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            pyramid = self._pyramids.get(key)
+            if pyramid is not None and time.time() - pyramid.built_at < max_age:
+                return pyramid
+
+            rates = await self.data_client.get_historical_rates(symbol, timeframe, self.history_bars)
+            if len(rates) == 0:
+                return None
+
+            bars = {
+                'time': rates['time'].astype(np.int64),
+                'open': rates['open'],
+                'high': rates['high'],
+                'low': rates['low'],
+                'close': rates['close'],
+                'volume': rates['tick_volume'].astype(np.float64)
+            }
+            loop = asyncio.get_running_loop()
+            pyramid = await loop.run_in_executor(None, ChartPyramid, bars)
+            self._pyramids[key] = pyramid
+            return pyramid
+
+    async def get_chart(
+        self,
+        symbol: str,
+        timeframe: str,
+        points: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        mode: str = 'ohlc'
+    ) -> Optional[Dict]:
+        """
+        Downsampled chart data
+
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe string
+            points: Point budget (capped at CHART_MAX_POINTS)
+            start: Range start in epoch seconds
+            end: Range end in epoch seconds
+            mode: 'ohlc' (bucket OHLC), 'lttb' or 'minmax' (close line)
+
+        Returns:
+            Columnar chart data, or None if there is no history
+        """
+        points = max(3, min(points, config.CHART_MAX_POINTS))
+        pyramid = await self.get_pyramid(symbol, timeframe)
+        if pyramid is None:
+            return None
+
+        if mode == 'ohlc':
+            bars, level = pyramid.query(points, start, end)
+            columns = {field: bars[field].tolist() for field in OHLC_FIELDS}
+        else:
+            # Line modes start from a level with more bars than points
+            bars, level = pyramid.query(points * 4, start, end)
+            reducer = lttb if mode == 'lttb' else minmax_buckets
+            x, y = reducer(bars['time'], bars['close'], points)
+            columns = {'time': x.tolist(), 'close': y.tolist()}
+
+        return {
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'mode': mode,
+            'level': level,
+            'points': len(columns['time']),
+            **columns
+        }
+
+
+# Singleton instance
+chart_data_service = ChartDataService(mt5_data_client)
@@ -18,6 +18,8 @@ class Config:
     MT5_PASSWORD = os.getenv('MT5_PASSWORD', '')
     MT5_SERVER = os.getenv('MT5_SERVER', '')
     MT5_PATH = os.getenv('MT5_PATH', '')
+    # Extra terminal installations for parallel downloads, separated by ';'
+    MT5_TERMINAL_PATHS = [p for p in os.getenv('MT5_TERMINAL_PATHS', '').split(';') if p]
     
     # Nautilus Trader Settings
     DATA_ENGINE_CACHE = True
@@ -45,19 +47,71 @@ class Config:
     MAX_RISK_PER_TRADE = 0.02  # 2% per trade
     MAX_DAILY_LOSS = 0.06  # 6% daily loss limit
     MAX_OPEN_POSITIONS = 5
+    POSITION_POLL_INTERVAL = 1.0  # Seconds between position/account polls
+    PNL_CHANGE_THRESHOLD = 1.0  # Minimum P&L change (account currency) to publish
+    CORRELATION_WINDOW = 500  # Bars in the rolling covariance window
+    BETA_BENCHMARK = os.getenv('BETA_BENCHMARK', 'US30')
+    VAR_CONFIDENCE = 0.95
+    VAR_SIMULATIONS = 10000  # Monte Carlo scenarios
     
     # Data Settings
     HISTORICAL_BARS = 1000
     TICK_BUFFER_SIZE = 10000
+    POOL_CHUNK_BARS = 50000  # Bars per terminal pool download job
+    POOL_JOB_TIMEOUT = 120.0  # Seconds before a pool terminal is considered hung
+    INDICATOR_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Memoized indicator results
+    PRICE_SAMPLE_INTERVAL = 0.5  # Seconds between background price samples
+    HISTORY_RETRY_INITIAL = 60.0  # Seconds before re-requesting history for a symbol that had none
+    HISTORY_RETRY_MAX = 3600.0  # Retry delay cap (doubled after every failed attempt)
+    TICK_POLL_MIN_INTERVAL = 0.05  # Tick polling interval while ticks are flowing
+    TICK_POLL_MAX_INTERVAL = 2.0  # Tick polling interval for quiet symbols
+    CALENDAR_MAX_SLEEP = 300  # Re-check closed symbols at least this often (seconds)
+    # Symbols with a depth-of-market subscription, separated by ';'
+    DEPTH_SYMBOLS = [s for s in os.getenv('DEPTH_SYMBOLS', 'SOLUSD;XRPUSD').split(';') if s]
+    DEPTH_MAX_LEVELS = 32  # Book levels kept per side
+    DEPTH_FEATURE_LEVELS = 5  # Levels per side used for imbalance and weighted mid
+    DEPTH_POLL_INTERVAL = 0.1  # Seconds between market_book_get polls
+    DEPTH_SIZING_POINTS = 50  # Strategies cap volume at the book depth within this distance
+    CHART_HISTORY_BARS = 100000  # Bars cached per symbol/timeframe for charts
+    CHART_PYRAMID_FACTOR = 4  # Bars merged per chart zoom level
+    CHART_MAX_POINTS = 5000  # Upper bound on points per chart request
+    SCREENER_BARS = 300  # Closed bars per symbol in a screener window
+    SCREENER_CONCURRENCY = 16  # History requests queued on the MT5 thread while screening (run serially; use MT5_TERMINAL_PATHS for parallel downloads)
+    SCREENER_CLOSE_DELAY = 2.0  # Seconds after a bar close before re-scanning
     
     # API Settings
     API_HOST = '0.0.0.0'
     API_PORT = 8000
+    LAZY_STARTUP = os.getenv('LAZY_STARTUP', 'true').lower() == 'true'  # Connect MT5 in background
+    HTTP_CACHE_MAX_ENTRIES = 1024  # Pre-serialized responses kept for ETag revalidation
+    EXPORT_CHUNK_ROWS = 65536  # Rows encoded per streamed export chunk
+    EXPORT_DEFAULT_BARS = 100000  # Bars exported when no count is given
+    EXPORT_MAX_BARS = 5000000  # Upper bound on bars per export request
+    
+    # Runtime control API of the trading app (main.py)
+    CONTROL_ENABLED = os.getenv('CONTROL_ENABLED', 'true').lower() == 'true'
+    CONTROL_HOST = os.getenv('CONTROL_HOST', '127.0.0.1')
+    CONTROL_PORT = int(os.getenv('CONTROL_PORT', 8001))
+    CONTROL_STATE_PATH = os.path.join(os.getenv('SNAPSHOT_DIR', 'state'), 'runtime_control.json')
+    
+    # Symbol cache mode: 'all' (every broker symbol), 'configured' (SYMBOLS only)
+    # or 'lazy' (fetched on first use)
+    SYMBOL_CACHE_MODE = os.getenv('SYMBOL_CACHE_MODE', 'configured')
     
     # Database Settings
     REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
     REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
     REDIS_DB = int(os.getenv('REDIS_DB', 0))
+    DATABASE_URL = os.getenv('DATABASE_URL', '')  # PostgreSQL/Supabase; event writer disabled if empty
+    PERSIST_USER_ID = os.getenv('PERSIST_USER_ID', 'nautilus')
+    PERSIST_STRATEGY_ID = os.getenv('PERSIST_STRATEGY_ID', '')  # user_trading_strategies.id
+    PERSIST_POOL_SIZE = 4
+    PERSIST_BATCH_SIZE = 500
+    PERSIST_FLUSH_INTERVAL = 1.0  # Seconds to wait for a batch to fill
+    PERSIST_QUEUE_SIZE = 10000  # Queued records before spilling to disk
+    PERSIST_SPILL_PATH = os.path.join(os.getenv('SNAPSHOT_DIR', 'state'), 'event_spill.jsonl')
+    # Rows the database rejects (constraint violations, bad values); never retried
+    PERSIST_DEAD_LETTER_PATH = os.path.join(os.getenv('SNAPSHOT_DIR', 'state'), 'event_dead_letter.jsonl')
     
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -67,6 +121,48 @@ class Config:
     BACKTEST_START_DATE = '2023-01-01'
     BACKTEST_END_DATE = '2024-01-01'
     BACKTEST_CAPITAL = 10000.0
+    BACKTEST_COMMISSION_PER_LOT = float(os.getenv('BACKTEST_COMMISSION_PER_LOT', '0'))  # Per side
+    BACKTEST_SLIPPAGE_MODEL = 'fixed'  # none, fixed, range
+    BACKTEST_SLIPPAGE_POINTS = 0.0
+    BACKTEST_STORE_DIR = os.getenv('BACKTEST_STORE_DIR', os.path.join(os.getenv('SNAPSHOT_DIR', 'state'), 'backtests'))
+    
+    # State Snapshot Settings
+    SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', 'state')
+    SNAPSHOT_INTERVAL = 300  # Seconds between periodic snapshots
+    SNAPSHOT_MAX_AGE = 86400  # Ignore snapshots older than this (seconds)
+    WARMUP_BARS = 200  # Bars kept for indicator warm-up
+    
+    # Market Data Capture Settings
+    CAPTURE_ENABLED = os.getenv('CAPTURE_ENABLED', 'false').lower() == 'true'  # Record MT5 responses
+    CAPTURE_DIR = os.getenv('CAPTURE_DIR', os.path.join(os.getenv('SNAPSHOT_DIR', 'state'), 'capture'))
+    CAPTURE_SEGMENT_SECONDS = 3600  # New segment file every hour
+    CAPTURE_BATCH_RECORDS = 1000  # Records per compressed batch
+    
+    # Feature Pipeline Settings (training data for the strategy learning system)
+    FEATURE_CACHE_DIR = os.getenv('FEATURE_CACHE_DIR', os.path.join(os.getenv('SNAPSHOT_DIR', 'state'), 'features'))
+    FEATURE_HISTORY_BARS = 100000  # Bars of history per training set
+    FEATURE_CHUNK_BARS = 10000  # Bars per cached chunk
+    FEATURE_LOOKBACK_BARS = 500  # Context bars before each chunk so indicators converge
+    
+    # Model Scoring Settings (online scoring with a trained model)
+    MODEL_PATH = os.getenv('MODEL_PATH', '')  # .npz weights or joblib scikit-learn model; off if empty
+    MODEL_TIME_BUDGET = 0.05  # Seconds per inference batch before it is dropped
+    MODEL_CONFIDENCE_WEIGHT = 0.3  # Share of the model score in signal confidence
+    MODEL_CLOSE_DELAY = 1.0  # Seconds after a bar close before scoring
+    MODEL_LATENCY_WINDOW = 500  # Batches kept for latency percentiles
+    
+    # Shadow Trading Settings (paper trading of strategy variants)
+    SHADOW_TRADING_ENABLED = os.getenv('SHADOW_TRADING_ENABLED', 'false').lower() == 'true'
+    SHADOW_CAPITAL = 10000.0  # Starting balance of each virtual account
+    SHADOW_SLIPPAGE_POINTS = 1.0  # Adverse fill slippage per order
+    SHADOW_VARIANT_GRID = {  # Parameters not listed use TechnicalStrategy defaults
+        'fast_ema': [8, 12, 16],
+        'slow_ema': [21, 26, 34],
+        'bb_std': [1.5, 2.0, 2.5],
+        'entry_threshold': [2, 3],
+        'stop_atr': [1.5, 2.0, 3.0],
+        'take_atr': [2.0, 3.0, 4.0]
+    }
     
     @classmethod
     def validate(cls):
@@ -0,0 +1,367 @@
+"""
+Event Writer
+Batched asyncpg persistence for trades, signals and risk logs with a file spill
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from config import config
+
+
+# Columns written per table (ids and created_at use database defaults)
+TABLE_COLUMNS = {
+    'strategy_trades': (
+        'strategy_id', 'session_id', 'user_id', 'symbol', 'action', 'volume',
+        'entry_price', 'exit_price', 'signal_strength', 'entry_reason', 'exit_reason',
+        'rsi_value', 'macd_value', 'macd_signal', 'macd_histogram',
+        'sma_20', 'sma_50', 'ema_12', 'ema_26',
+        'realized_pnl', 'unrealized_pnl', 'commission', 'swap',
+        'entry_time', 'exit_time', 'holding_time_minutes', 'status'
+    ),
+    'strategy_signal_logs': (
+        'strategy_id', 'user_id', 'symbol', 'timeframe', 'signal_type', 'signal_strength',
+        'market_data', 'indicator_values', 'pattern_detected', 'decision_factors',
+        'confidence_score', 'risk_assessment', 'action_taken', 'action_reason'
+    ),
+    'risk_analysis_logs': (
+        'user_id', 'session_id', 'analysis_type', 'risk_level', 'risk_score',
+        'risk_factors', 'analysis_result', 'recommendations',
+        'market_conditions', 'account_metrics'
+    ),
+    'position_risk_monitoring': (
+        'session_id', 'current_price', 'unrealized_pnl', 'unrealized_pnl_percent',
+        'distance_to_stop_loss', 'distance_to_take_profit', 'current_risk_level',
+        'time_held_minutes', 'market_volatility', 'updated_at'
+    )
+}
+
+JSON_COLUMNS = {
+    'market_data', 'indicator_values', 'risk_assessment', 'analysis_result',
+    'market_conditions', 'account_metrics'
+}
+TIMESTAMP_COLUMNS = {'entry_time', 'exit_time', 'updated_at'}
+
+# Tables holding one row per key are upserted instead of copied
+UPSERT_KEYS = {'position_risk_monitoring': 'session_id'}
+
+
+def _column_value(column: str, value):
+    """Convert a record value to what asyncpg expects for the column"""
+    if column in JSON_COLUMNS:
+        return json.dumps(value if value is not None else {}, default=str)
+    if isinstance(value, float):
+        # DECIMAL columns take Decimal in binary COPY
+        return Decimal(repr(value))
+    return value
+
+
+def _is_row_error(error: Exception) -> bool:
+    """
+    Whether the rows themselves were rejected, as opposed to the connection
+
+    SQLSTATE class 22 (data exception, e.g. DECIMAL overflow) and 23
+    (integrity constraint violation, e.g. CHECK) are asyncpg's DataError
+    and IntegrityConstraintViolationError families. Values asyncpg cannot
+    encode fail client-side with ValueError/TypeError, or with the
+    decimal or overflow error of the conversion (ArithmeticError).
+    """
+    sqlstate = getattr(error, 'sqlstate', None) or ''
+    return sqlstate[:2] in ('22', '23') or isinstance(error, (ValueError, TypeError, ArithmeticError))
+
+
+def _encode_spill(table: str, record: Dict, error: Optional[str] = None) -> str:
+    """Serialize a record for the spill or dead-letter file"""
+    row = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in record.items()
+    }
+    item = {'table': table, 'record': row}
+    if error is not None:
+        item['error'] = error
+    return json.dumps(item, default=str)
+
+
+def _decode_spill(line: str):
+    """Parse a spill file line back into (table, record)"""
+    item = json.loads(line)
+    record = item['record']
+    for key in TIMESTAMP_COLUMNS & record.keys():
+        if record[key]:
+            record[key] = datetime.fromisoformat(record[key])
+    return item['table'], record
+
+
+class EventWriter:
+    """
+    Asynchronous, batched database writer
+
+    Producers call write() (non-blocking, for synchronous strategy code) or
+    await put() (waits for queue space up to put_timeout). A background task
+    drains the queue in batches: append-only tables go through COPY, keyed
+    tables through a batched upsert that keeps the latest row per key.
+
+    When the queue is full or the database is unreachable, records are
+    appended to a local JSONL spill file instead of being dropped; the
+    spill is replayed once the database accepts writes again. A batch the
+    database rejects for its contents is bisected until the offending rows
+    are isolated; those go to a dead-letter file and the rest are written.
+
+    Args:
+        dsn: PostgreSQL connection string (DATABASE_URL); disabled if empty
+        batch_size: Maximum records per flush
+        flush_interval: Seconds to wait for a batch to fill
+        max_queue: Queue capacity before backpressure
+        spill_path: JSONL file for records that could not be written
+        dead_letter_path: JSONL file for records the database rejected
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_queue: Optional[int] = None,
+        spill_path: Optional[str] = None,
+        dead_letter_path: Optional[str] = None,
+        put_timeout: float = 0.5
+    ):
+        self.dsn = dsn if dsn is not None else config.DATABASE_URL
+        self.batch_size = batch_size or config.PERSIST_BATCH_SIZE
+        self.flush_interval = flush_interval or config.PERSIST_FLUSH_INTERVAL
+        self.max_queue = max_queue or config.PERSIST_QUEUE_SIZE
+        self.spill_path = spill_path or config.PERSIST_SPILL_PATH
+        self.dead_letter_path = dead_letter_path or config.PERSIST_DEAD_LETTER_PATH
+        self.put_timeout = put_timeout
+        self.pool = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task = None
+        self._healthy = True
+        self.stats = {'written': 0, 'spilled': 0, 'replayed': 0, 'failed_flushes': 0, 'dead_lettered': 0}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the writer is running"""
+        return self._queue is not None
+
+    async def start(self, pool=None):
+        """
+        Open the connection pool and start the flush loop
+
+        Args:
+            pool: Existing asyncpg pool (a new one is created from dsn otherwise)
+        """
+        if self._task is not None:
+            return
+        if pool is None:
+            if not self.dsn:
+                return
+            import asyncpg
+
+            pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=config.PERSIST_POOL_SIZE)
+        self.pool = pool
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+        print("✅ Event writer started")
+
+    async def stop(self):
+        """Flush what is queued and close the pool"""
+        if self._task is None:
+            return
+        # The flush loop exits after writing everything queued before the sentinel
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+        self._queue = None
+
+    def write(self, table: str, record: Dict):
+        """
+        Queue a record without waiting (spills to disk when the queue is full)
+
+        Args:
+            table: Target table (key of TABLE_COLUMNS)
+            record: Column values (columns missing from a whole batch get
+                their database default, otherwise NULL)
+        """
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait((table, record))
+        except asyncio.QueueFull:
+            self._spill([(table, record)])
+
+    async def put(self, table: str, record: Dict):
+        """
+        Queue a record, waiting for space up to put_timeout before spilling
+
+        Args:
+            table: Target table (key of TABLE_COLUMNS)
+            record: Column values
+        """
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.put((table, record)), self.put_timeout)
+        except asyncio.TimeoutError:
+            self._spill([(table, record)])
+
+    async def _run(self):
+        """Flush loop (returns after the stop sentinel)"""
+        stopping = False
+        while not stopping:
+            try:
+                batch = []
+                item = await self._queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+
+                await self._flush(batch)
+                if self._healthy and os.path.exists(self.spill_path):
+                    await self.replay_spill()
+            except Exception as e:
+                print(f"❌ Event writer error: {e}")
+
+    async def _flush(self, batch: List):
+        """
+        Write one batch
+
+        Rejected rows are isolated by splitting the batch in halves and
+        retrying each half, so every good row is written and only the bad
+        ones are dead-lettered. If the database becomes unreachable, the
+        part not yet written is spilled.
+        """
+        parts = [batch] if batch else []
+        while parts:
+            part = parts.pop()
+            try:
+                await self._write_batch(part)
+                self.stats['written'] += len(part)
+            except Exception as e:
+                if not _is_row_error(e):
+                    unwritten = part + [item for rest in reversed(parts) for item in rest]
+                    self.stats['failed_flushes'] += 1
+                    self._healthy = False
+                    print(f"⚠️ Database write failed ({e}); spilling {len(unwritten)} records")
+                    self._spill(unwritten)
+                    return
+                if len(part) == 1:
+                    self._dead_letter(part, e)
+                else:
+                    # Left half is popped first, keeping write order
+                    middle = len(part) // 2
+                    parts.extend((part[middle:], part[:middle]))
+        self._healthy = True
+
+    async def _write_batch(self, batch: List):
+        """Write records of any tables in one transaction"""
+        by_table = defaultdict(list)
+        for table, record in batch:
+            by_table[table].append(record)
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                for table, records in by_table.items():
+                    await self._write_table(conn, table, records)
+
+    @staticmethod
+    async def _write_table(conn, table: str, records: List[Dict]):
+        """COPY append-only rows, upsert keyed rows"""
+        # Columns no record sets are left out so database defaults apply
+        columns = [column for column in TABLE_COLUMNS[table] if any(column in record for record in records)]
+        key = UPSERT_KEYS.get(table)
+        if key is not None:
+            # Keep only the latest row per key within the batch
+            records = list({record[key]: record for record in records}.values())
+
+        rows = [tuple(_column_value(column, record.get(column)) for column in columns) for record in records]
+
+        if key is None:
+            await conn.copy_records_to_table(table, records=rows, columns=columns)
+            return
+
+        placeholders = ', '.join(f'${i}' for i in range(1, len(columns) + 1))
+        updates = ', '.join(f'{column} = EXCLUDED.{column}' for column in columns if column != key)
+        await conn.executemany(
+            f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders}) '
+            f'ON CONFLICT ({key}) DO UPDATE SET {updates}',
+            rows
+        )
+
+    def _spill(self, batch: List):
+        """Append records to the spill file"""
+        os.makedirs(os.path.dirname(self.spill_path) or '.', exist_ok=True)
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            for table, record in batch:
+                f.write(_encode_spill(table, record) + '\n')
+        self.stats['spilled'] += len(batch)
+
+    def _dead_letter(self, batch: List, error: Exception):
+        """Set aside records the database rejected, with the reason"""
+        os.makedirs(os.path.dirname(self.dead_letter_path) or '.', exist_ok=True)
+        with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+            for table, record in batch:
+                f.write(_encode_spill(table, record, error=repr(error)) + '\n')
+        self.stats['dead_lettered'] += len(batch)
+        print(f"⚠️ Database rejected {len(batch)} record(s) ({error}); moved to {self.dead_letter_path}")
+
+    async def replay_spill(self):
+        """
+        Write spilled records back to the database in batches
+
+        Records the database rejects are dead-lettered by _flush rather
+        than spilled again, so one bad row cannot block the replay.
+        """
+        replaying = self.spill_path + '.replay'
+        try:
+            os.replace(self.spill_path, replaying)
+        except FileNotFoundError:
+            return
+
+        with open(replaying, encoding='utf-8') as f:
+            records = [_decode_spill(line) for line in f if line.strip()]
+        os.remove(replaying)
+
+        for start in range(0, len(records), self.batch_size):
+            batch = records[start:start + self.batch_size]
+            await self._flush(batch)
+            if not self._healthy:
+                # The failed batch was spilled again; keep the rest for later
+                self._spill(records[start + self.batch_size:])
+                return
+            self.stats['replayed'] += len(batch)
+        print(f"♻️ Replayed {len(records)} spilled records")
+
+    def get_stats(self) -> Dict:
+        """Writer statistics"""
+        return {
+            **self.stats,
+            'enabled': self.enabled,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'healthy': self._healthy
+        }
+
+
+# Singleton instance
+event_writer = EventWriter()
@@ -0,0 +1,339 @@
+"""
+Feature Pipeline
+Labeled feature matrices for the strategy learning system, cached on disk by data fingerprint
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import config
+from indicator_cache import data_fingerprint
+from indicators import compute_indicators, sma
+from mt5_data_client import mt5_data_client
+
+
+# Bump when a feature or label definition changes; old cache entries are then ignored
+PIPELINE_VERSION = 1
+
+FEATURE_INDICATORS = {
+    'sma': [20],
+    'ema': [12, 26],
+    'rsi': [14],
+    'atr': [14],
+    'macd': [(12, 26, 9)],
+    'bollinger': [(20, 2.0)],
+    'adx': [14]
+}
+FEATURE_LAGS = (1, 2, 3, 5, 10, 20)  # One-bar log returns this many bars back
+LABEL_HORIZONS = (1, 4, 16)  # Forward log return horizons in bars
+
+FEATURE_NAMES = tuple(f'ret_lag_{lag}' for lag in FEATURE_LAGS) + (
+    'ema_12_dist', 'ema_26_dist', 'sma_20_dist', 'rsi_14', 'atr_14_pct',
+    'macd_hist_pct', 'bb_position', 'bb_width', 'adx_14', 'di_spread',
+    'range_pct', 'volume_ratio'
+)
+LABEL_NAMES = tuple(f'fwd_ret_{h}' for h in LABEL_HORIZONS)
+FEATURE_DTYPE = np.float32
+
+RATE_FIELDS = ('time', 'open', 'high', 'low', 'close', 'tick_volume')
+
+
+def _lag(x: np.ndarray, k: int) -> np.ndarray:
+    """x shifted k bars later along the last axis, NaN-padded"""
+    if k == 0:
+        return x
+    out = np.full(x.shape, np.nan)
+    out[..., k:] = x[..., :-k]
+    return out
+
+
+def compute_features(high, low, close, volume) -> np.ndarray:
+    """
+    FEATURE_NAMES columns for every bar
+
+    Works along the last axis like compute_indicators, so a (symbols, bars)
+    stack gives a (symbols, bars, features) array. Prices enter only as
+    ratios, so one model can score every symbol.
+
+    Args:
+        high: Bar highs
+        low: Bar lows
+        close: Bar closes
+        volume: Bar tick volumes
+
+    Returns:
+        FEATURE_DTYPE array with the features on the last axis (NaN while
+        an indicator is warming up)
+    """
+    high, low, close = (np.asarray(x, dtype=np.float64) for x in (high, low, close))
+    volume = np.asarray(volume, dtype=np.float64)
+    ind = compute_indicators(high, low, close, FEATURE_INDICATORS)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_close = np.log(close)
+        returns = log_close - _lag(log_close, 1)
+        upper, middle, lower = (ind[f'bb_{band}_20_2.0'] for band in ('upper', 'middle', 'lower'))
+        columns = {f'ret_lag_{lag}': _lag(returns, lag - 1) for lag in FEATURE_LAGS}
+        columns.update({
+            'ema_12_dist': ind['ema_12'] / close - 1,
+            'ema_26_dist': ind['ema_26'] / close - 1,
+            'sma_20_dist': ind['sma_20'] / close - 1,
+            'rsi_14': ind['rsi_14'] / 100,
+            'atr_14_pct': ind['atr_14'] / close,
+            'macd_hist_pct': ind['macd_hist_12_26_9'] / close,
+            'bb_position': (close - lower) / (upper - lower),
+            'bb_width': (upper - lower) / middle,
+            'adx_14': ind['adx_14'] / 100,
+            'di_spread': (ind['plus_di_14'] - ind['minus_di_14']) / 100,
+            'range_pct': (high - low) / close,
+            'volume_ratio': volume / sma(volume, 20) - 1
+        })
+    return np.stack([columns[name] for name in FEATURE_NAMES], axis=-1).astype(FEATURE_DTYPE)
+
+
+def compute_labels(close) -> np.ndarray:
+    """
+    LABEL_NAMES forward log returns for every bar
+
+    Args:
+        close: Bar closes (last axis is time)
+
+    Returns:
+        FEATURE_DTYPE array with the horizons on the last axis (NaN where
+        the horizon runs past the data)
+    """
+    log_close = np.log(np.asarray(close, dtype=np.float64))
+    labels = []
+    for h in LABEL_HORIZONS:
+        forward = np.full(log_close.shape, np.nan)
+        forward[..., :-h] = log_close[..., h:] - log_close[..., :-h]
+        labels.append(forward)
+    return np.stack(labels, axis=-1).astype(FEATURE_DTYPE)
+
+
+class FeatureSet:
+    """
+    A built training set, memory-mapped from disk
+
+    Rows are bars with complete features and labels, oldest first.
+    `features`, `labels` and `times` are read-only memmaps, so training
+    jobs page in only what they touch and several jobs share one copy.
+
+    Args:
+        path: Dataset directory written by FeaturePipeline
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / 'meta.json').read_text())
+        self.fingerprint = self.meta['fingerprint']
+        self.feature_names = self.meta['feature_names']
+        self.label_names = self.meta['label_names']
+        self.times = np.load(self.path / 'times.npy', mmap_mode='r')
+        self.features = np.load(self.path / 'features.npy', mmap_mode='r')
+        self.labels = np.load(self.path / 'labels.npy', mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def label(self, horizon: int) -> np.ndarray:
+        """Forward return column for one of LABEL_HORIZONS"""
+        return self.labels[:, self.label_names.index(f'fwd_ret_{horizon}')]
+
+
+class FeaturePipeline:
+    """
+    Builds labeled feature matrices in time-aligned chunks
+
+    History is split into chunks of FEATURE_CHUNK_BARS bars aligned to
+    epoch time, so the same bars fall into the same chunk however the
+    history window was fetched. Each chunk is computed from its bars plus
+    FEATURE_LOOKBACK_BARS of context (long enough for every indicator to
+    converge) and the largest label horizon after it, and is cached under
+    the fingerprint of exactly that input. A rebuild after new bars
+    therefore only recomputes the chunks at the end; the rest are reused
+    from disk and copied into a dataset that is memory-mapped on load.
+
+    Args:
+        data_client: MT5DataClient
+        directory: Cache directory
+        chunk_bars: Bars per chunk
+        lookback: Context bars before each chunk
+    """
+
+    def __init__(
+        self,
+        data_client,
+        directory: Optional[str] = None,
+        chunk_bars: Optional[int] = None,
+        lookback: Optional[int] = None
+    ):
+        self.data_client = data_client
+        self.directory = Path(directory or config.FEATURE_CACHE_DIR)
+        self.chunk_bars = chunk_bars or config.FEATURE_CHUNK_BARS
+        self.lookback = lookback or config.FEATURE_LOOKBACK_BARS
+
+    def _chunk(self, fields: Dict[str, np.ndarray], start: int, end: int, path: Path):
+        """Compute one chunk's complete rows and write them atomically"""
+        lo, hi = max(0, start - self.lookback), min(len(fields['time']), end + max(LABEL_HORIZONS))
+        features = compute_features(
+            fields['high'][lo:hi], fields['low'][lo:hi], fields['close'][lo:hi], fields['tick_volume'][lo:hi]
+        )[start - lo:end - lo]
+        labels = compute_labels(fields['close'][lo:hi])[start - lo:end - lo]
+
+        # Rows without full indicator context or a complete label are left out
+        keep = np.isfinite(features).all(axis=1) & np.isfinite(labels).all(axis=1)
+        keep &= np.arange(start, end) >= self.lookback
+        tmp = path.with_suffix('.tmp.npz')
+        np.savez(tmp, times=fields['time'][start:end][keep], features=features[keep], labels=labels[keep])
+        os.replace(tmp, path)
+
+    def build(self, symbol: str, timeframe: str, rates: np.ndarray) -> FeatureSet:
+        """
+        Build (or reuse) the training set for a rates history
+
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe string
+            rates: MT5 rates array, oldest first (closed bars only)
+
+        Returns:
+            Memory-mapped FeatureSet
+        """
+        started = time.perf_counter()
+        root = self.directory / f'{symbol}_{timeframe}'
+        chunk_dir = root / 'chunks'
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+
+        fields = {name: np.ascontiguousarray(rates[name]) for name in RATE_FIELDS}
+        times = fields['time'].astype(np.int64)
+        span = self.chunk_bars * self.data_client._get_timeframe_seconds(timeframe)
+        chunk_ids = times // span
+        starts = np.flatnonzero(np.r_[True, chunk_ids[1:] != chunk_ids[:-1]]) if len(times) else np.zeros(0, int)
+        ends = np.r_[starts[1:], len(times)]
+
+        paths: List[Path] = []
+        computed = 0
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            lo, hi = max(0, start - self.lookback), min(len(times), end + max(LABEL_HORIZONS))
+            fingerprint = data_fingerprint(
+                *(fields[name][lo:hi] for name in RATE_FIELDS),
+                label=f'v{PIPELINE_VERSION}:{self.lookback}:{start - lo}:{end - lo}:{start >= self.lookback}'
+            )
+            path = chunk_dir / f'{fingerprint}.npz'
+            if not path.exists():
+                self._chunk(fields, start, end, path)
+                computed += 1
+            paths.append(path)
+
+        fingerprint = data_fingerprint(label=f'{symbol}:{timeframe}:' + ','.join(p.stem for p in paths))
+        dataset = root / f'dataset-{fingerprint}'
+        if not (dataset / 'meta.json').exists():
+            self._assemble(dataset, paths, fingerprint, symbol, timeframe)
+        self._prune(root, dataset, paths)
+
+        print(f"🧮 Features for {symbol} {timeframe}: {len(paths)} chunks ({computed} computed, "
+              f"{len(paths) - computed} cached) in {time.perf_counter() - started:.2f}s")
+        return FeatureSet(dataset)
+
+    def _assemble(self, dataset: Path, paths: List[Path], fingerprint: str, symbol: str, timeframe: str):
+        """Concatenate chunk files into one dataset, one chunk in memory at a time"""
+        tmp = dataset.with_name(f'tmp-{fingerprint}')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        rows = 0
+        for path in paths:
+            with np.load(path) as chunk:
+                rows += len(chunk['times'])
+        outputs = {
+            'times': np.lib.format.open_memmap(tmp / 'times.npy', 'w+', np.int64, (rows,)),
+            'features': np.lib.format.open_memmap(tmp / 'features.npy', 'w+', FEATURE_DTYPE, (rows, len(FEATURE_NAMES))),
+            'labels': np.lib.format.open_memmap(tmp / 'labels.npy', 'w+', FEATURE_DTYPE, (rows, len(LABEL_NAMES)))
+        }
+        offset = 0
+        for path in paths:
+            with np.load(path) as chunk:
+                n = len(chunk['times'])
+                for name, out in outputs.items():
+                    out[offset:offset + n] = chunk[name]
+                offset += n
+        for out in outputs.values():
+            out.flush()
+        del outputs
+
+        (tmp / 'meta.json').write_text(json.dumps({
+            'fingerprint': fingerprint,
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'version': PIPELINE_VERSION,
+            'rows': rows,
+            'chunks': [p.stem for p in paths],
+            'feature_names': list(FEATURE_NAMES),
+            'label_names': list(LABEL_NAMES),
+            'created_at': time.time()
+        }, indent=2))
+        os.replace(tmp, dataset)
+
+    def _prune(self, root: Path, dataset: Path, paths: List[Path]):
+        """Drop datasets and chunks superseded by the latest build"""
+        keep = {p.name for p in paths}
+        for path in (root / 'chunks').glob('*.npz'):
+            if path.name not in keep:
+                path.unlink(missing_ok=True)
+        for path in root.glob('dataset-*'):
+            if path != dataset:
+                shutil.rmtree(path, ignore_errors=True)
+
+    async def load(self, symbol: str, timeframe: str, count: Optional[int] = None) -> FeatureSet:
+        """
+        Fetch history from MT5 and build the training set off the event loop
+
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe string
+            count: Bars of history (defaults to FEATURE_HISTORY_BARS)
+
+        Returns:
+            Memory-mapped FeatureSet
+        """
+        history = await self.data_client.backfill_history(
+            [symbol], [timeframe], (count or config.FEATURE_HISTORY_BARS) + 1
+        )
+        rates = history.get((symbol, timeframe))
+        if rates is None or not len(rates):
+            raise ValueError(f"No history for {symbol} {timeframe}")
+        # The last bar is still forming
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.build, symbol, timeframe, rates[:-1]
+        )
+
+    def open(self, symbol: str, timeframe: str) -> Optional[FeatureSet]:
+        """
+        Latest built training set, without touching MT5
+
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe string
+
+        Returns:
+            Memory-mapped FeatureSet, or None if none was built
+        """
+        datasets = [
+            path for path in (self.directory / f'{symbol}_{timeframe}').glob('dataset-*')
+            if (path / 'meta.json').exists()
+        ]
+        if not datasets:
+            return None
+        return FeatureSet(max(datasets, key=lambda path: (path / 'meta.json').stat().st_mtime))
+
+
+# Singleton instance
+feature_pipeline = FeaturePipeline(mt5_data_client)
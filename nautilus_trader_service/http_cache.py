@@ -0,0 +1,152 @@
+"""
+HTTP Cache
+Pre-serialized JSON responses with ETag/Last-Modified revalidation
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from config import config
+
+
+class CachedResponse:
+    """
+    One serialized response body and its validators
+
+    Args:
+        validity: Cheap state key under which the body stays current
+        version: State the body was built from (hashed into the ETag)
+        body: Serialized JSON
+        last_modified: Epoch seconds of the underlying change
+    """
+
+    def __init__(self, validity: Hashable, version: Hashable, body: bytes, last_modified: float):
+        self.validity = validity
+        self.version = version
+        self.body = body
+        self.last_modified = last_modified
+        self.etag = '"' + hashlib.blake2b(repr(version).encode('utf-8'), digest_size=12).hexdigest() + '"'
+
+    def not_modified(self, request: Request) -> bool:
+        """Evaluate If-None-Match, or If-Modified-Since without it"""
+        if_none_match = request.headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+            return '*' in tags or self.etag in tags
+
+        if_modified_since = request.headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                return int(self.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class ResponseCache:
+    """
+    Endpoint responses serialized once per state change
+
+    Polled endpoints look up their entry with a validity key that is cheap
+    to compute (last closed bar, state version, latest run id). While the
+    key is unchanged the stored body is returned as-is, or a bodiless 304
+    when the client already holds it; only a new key rebuilds and
+    re-serializes the payload. Entries are evicted least recently used.
+
+    Args:
+        max_entries: Maximum cached responses
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or config.HTTP_CACHE_MAX_ENTRIES
+        self._entries: 'OrderedDict[Hashable, CachedResponse]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Hashable, validity: Hashable) -> Optional[CachedResponse]:
+        """
+        Stored response if it is still valid
+
+        Args:
+            key: Endpoint and arguments, e.g. ('indicators', 'EURUSD')
+            validity: Current validity key
+
+        Returns:
+            The entry, or None if missing or stale
+        """
+        entry = self._entries.get(key)
+        if entry is None or validity is None or entry.validity != validity:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def store(
+        self,
+        key: Hashable,
+        validity: Hashable,
+        payload: Any,
+        version: Hashable = None,
+        last_modified: Optional[float] = None
+    ) -> CachedResponse:
+        """
+        Serialize and store a response
+
+        Args:
+            key: Endpoint and arguments
+            validity: Validity key (None stores nothing, so the next request
+                rebuilds)
+            payload: Response content (pydantic models, datetimes and
+                NumPy scalars are encoded like FastAPI does)
+            version: State the payload reflects (defaults to validity); an
+                unchanged version keeps the previous ETag and Last-Modified
+            last_modified: Epoch seconds of the change (defaults to now)
+
+        Returns:
+            The entry to respond with
+        """
+        version = validity if version is None else version
+        previous = self._entries.get(key)
+        if previous is not None and previous.version == version:
+            last_modified = previous.last_modified
+        body = json.dumps(jsonable_encoder(payload), separators=(',', ':')).encode('utf-8')
+        entry = CachedResponse(validity, version, body, time.time() if last_modified is None else last_modified)
+
+        if validity is not None:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, request: Request, entry: CachedResponse) -> Response:
+        """
+        Response for an entry: 304 when the client copy is current
+
+        Args:
+            request: Incoming request (for conditional headers)
+            entry: Cached response
+
+        Returns:
+            FastAPI Response with ETag, Last-Modified and Cache-Control
+        """
+        headers = {
+            'ETag': entry.etag,
+            'Last-Modified': formatdate(entry.last_modified, usegmt=True),
+            'Cache-Control': 'no-cache'
+        }
+        if entry.not_modified(request):
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type='application/json', headers=headers)
+
+
+# Singleton instance
+response_cache = ResponseCache()
@@ -0,0 +1,177 @@
+"""
+Indicator Cache
+Memoized indicator graph shared by API endpoints, backtests and the app
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+from config import config
+from indicators import compute_indicators
+
+
+def series_label(symbol: str, timeframe: str) -> str:
+    """
+    Label of a symbol's bar series for fingerprints
+
+    Every caller labels bar data the same way, so the API, backtests and
+    strategies share memoized nodes for identical bars.
+    """
+    return f'{symbol}:{timeframe}'
+
+
+def data_fingerprint(*arrays: np.ndarray, label: str = '') -> str:
+    """
+    Fingerprint input data for cache keys
+
+    Args:
+        *arrays: Input arrays (e.g. high, low, close)
+        label: Optional context, series_label() for bar data
+
+    Returns:
+        Hex digest covering the label, array shapes, dtypes and contents
+    """
+    digest = hashlib.blake2b(label.encode('utf-8'), digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f'{array.dtype.str}{array.shape}'.encode('utf-8'))
+        digest.update(array.data)
+    return digest.hexdigest()
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    return 0
+
+
+def _freeze(value: Any) -> Any:
+    """Mark cached arrays read-only so callers cannot corrupt shared results"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    return value
+
+
+class IndicatorCache:
+    """
+    Size-bounded LRU cache of indicator node results
+
+    Thread-safe: backtests in executor threads share it with the event loop.
+
+    Args:
+        max_bytes: Evict least recently used nodes above this total size
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or config.INDICATOR_CACHE_MAX_BYTES
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return a cached value (None on a miss) and mark it recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value and evict old entries beyond max_bytes"""
+        nbytes = _nbytes(value)
+        value = _freeze(value)
+        with self._lock:
+            if key in self._entries:
+                self.size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict:
+        """Cache statistics"""
+        with self._lock:
+            hits, misses, entries, size = self.hits, self.misses, len(self._entries), self.size
+        total = hits + misses
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0
+        }
+
+
+class IndicatorGraph:
+    """
+    Indicator DAG with memoized nodes
+
+    Each node (e.g. EMA(12) of close) is keyed by (data fingerprint, node
+    name, params). Dependencies such as the EMAs inside MACD resolve through
+    the same cache, so every consumer of the same data shares one result.
+    """
+
+    def __init__(self, cache: Optional[IndicatorCache] = None):
+        self.cache = cache or IndicatorCache()
+
+    def compute(
+        self,
+        high,
+        low,
+        close,
+        spec: Optional[Dict] = None,
+        label: str = ''
+    ) -> Dict[str, np.ndarray]:
+        """
+        Compute indicators, reusing cached nodes
+
+        Args:
+            high: Bar highs
+            low: Bar lows
+            close: Bar closes
+            spec: Indicator spec as accepted by compute_indicators
+            label: series_label() of the bars, e.g. 'EURUSD:M15'
+
+        Returns:
+            Read-only arrays keyed as in compute_indicators
+        """
+        high = np.ascontiguousarray(high, dtype=np.float64)
+        low = np.ascontiguousarray(low, dtype=np.float64)
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        fingerprint = data_fingerprint(high, low, close, label=label)
+
+        def memo(name, params, func):
+            key = (fingerprint, name, params)
+            value = self.cache.get(key)
+            if value is None:
+                value = func()
+                self.cache.put(key, value)
+            return value
+
+        return compute_indicators(high, low, close, spec, memo=memo)
+
+
+# Singleton instance
+indicator_graph = IndicatorGraph()
@@ -0,0 +1,595 @@
+"""
+Indicator Kernels
+Vectorized batch indicators and matching streaming implementations
+
+Batch kernels work on contiguous float64 arrays along the last axis, so a
+(symbols, bars) matrix is processed in one call. Streaming classes produce
+the same values one bar at a time. Both share the same conventions:
+
+- EMA: alpha = 2 / (n + 1), seeded with the first input (pandas adjust=False)
+- RSI, ATR, ADX: Wilder smoothing (alpha = 1 / n) seeded with a simple mean
+- Bollinger Bands: population standard deviation
+- Values are NaN until enough bars exist
+"""
+
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Indicator parameters used by TechnicalStrategy and the API
+DEFAULT_INDICATORS = {
+    'sma': [20],
+    'ema': [12, 26],
+    'rsi': [14],
+    'atr': [14],
+    'macd': [(12, 26, 9)],
+    'bollinger': [(20, 2.0)]
+}
+
+
+# ---------------------------------------------------------------------------
+# Batch kernels
+# ---------------------------------------------------------------------------
+
+def _as_array(x) -> np.ndarray:
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+
+def _recursive(x: np.ndarray, alpha: float, init) -> np.ndarray:
+    """y[t] = (1 - alpha) * y[t-1] + alpha * x[t], with y[-1] = init"""
+    # scipy.signal is slow to import and only needed once a batch is computed
+    from scipy.signal import lfilter
+
+    if x.shape[-1] == 0:
+        return x.copy()
+    zi = ((1.0 - alpha) * np.asarray(init, dtype=np.float64))[..., None]
+    y, _ = lfilter([alpha], [1.0, alpha - 1.0], x, axis=-1, zi=zi)
+    return y
+
+
+def _wilder(x: np.ndarray, n: int, start: int = 0) -> np.ndarray:
+    """Wilder average of x[start:], seeded with the mean of its first n values"""
+    out = np.full(x.shape, np.nan)
+    seed_end = start + n
+    if x.shape[-1] < seed_end:
+        return out
+    seed = x[..., start:seed_end].mean(axis=-1)
+    out[..., seed_end - 1] = seed
+    out[..., seed_end:] = _recursive(x[..., seed_end:], 1.0 / n, seed)
+    return out
+
+
+def _rolling(x: np.ndarray, n: int, func) -> np.ndarray:
+    """Apply a reduction over trailing windows of n values"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[-1] >= n:
+        out[..., n - 1:] = func(sliding_window_view(x, n, axis=-1), axis=-1)
+    return out
+
+
+def _previous(x: np.ndarray) -> np.ndarray:
+    """x shifted one bar later, NaN in the first position"""
+    prev = np.empty_like(x)
+    prev[..., 0] = np.nan
+    prev[..., 1:] = x[..., :-1]
+    return prev
+
+
+def sma(x, n: int) -> np.ndarray:
+    """Simple moving average"""
+    return _rolling(_as_array(x), n, np.mean)
+
+
+def ema(x, n: int) -> np.ndarray:
+    """Exponential moving average seeded with the first value"""
+    x = _as_array(x)
+    if x.shape[-1] == 0:
+        return x.copy()
+    return _recursive(x, 2.0 / (n + 1), x[..., 0])
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True range; the first bar uses high - low"""
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    prev_close = _previous(close)
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr[..., :1] = (high - low)[..., :1]
+    return tr
+
+
+def rsi(close, n: int = 14) -> np.ndarray:
+    """Wilder relative strength index"""
+    close = _as_array(close)
+    delta = np.diff(close, axis=-1, prepend=np.nan)
+    avg_gain = _wilder(np.where(delta > 0, delta, 0.0), n, start=1)
+    avg_loss = _wilder(np.where(delta < 0, -delta, 0.0), n, start=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, out)
+
+
+def atr(high, low, close, n: int = 14, tr: Optional[np.ndarray] = None) -> np.ndarray:
+    """Wilder average true range"""
+    if tr is None:
+        tr = true_range(high, low, close)
+    return _wilder(tr, n)
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9,
+         fast_ema: Optional[np.ndarray] = None, slow_ema: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    MACD line, signal line and histogram
+
+    Returns:
+        Dictionary with 'line', 'signal' and 'hist'
+    """
+    fast_ema = ema(close, fast) if fast_ema is None else fast_ema
+    slow_ema = ema(close, slow) if slow_ema is None else slow_ema
+    line = fast_ema - slow_ema
+    signal_line = ema(line, signal)
+    return {'line': line, 'signal': signal_line, 'hist': line - signal_line}
+
+
+def bollinger(close, n: int = 20, k: float = 2.0) -> Dict[str, np.ndarray]:
+    """
+    Bollinger Bands
+
+    Returns:
+        Dictionary with 'upper', 'middle' and 'lower'
+    """
+    close = _as_array(close)
+    middle = _rolling(close, n, np.mean)
+    std = _rolling(close, n, np.std)
+    return {'upper': middle + k * std, 'middle': middle, 'lower': middle - k * std}
+
+
+def stochastic(high, low, close, k_period: int = 14, d_period: int = 3) -> Dict[str, np.ndarray]:
+    """
+    Stochastic oscillator (%K is 50 when the range is flat)
+
+    Returns:
+        Dictionary with 'k' and 'd'
+    """
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    highest = _rolling(high, k_period, np.max)
+    lowest = _rolling(low, k_period, np.min)
+    span = highest - lowest
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = np.where(span > 0, 100.0 * (close - lowest) / span, 50.0)
+    k[np.isnan(span)] = np.nan
+    return {'k': k, 'd': _rolling(k, d_period, np.mean)}
+
+
+def adx(high, low, close, n: int = 14) -> Dict[str, np.ndarray]:
+    """
+    Average directional index with directional indicators
+
+    Returns:
+        Dictionary with 'adx', 'plus_di' and 'minus_di'
+    """
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+    up = np.diff(high, axis=-1, prepend=np.nan)
+    down = -np.diff(low, axis=-1, prepend=np.nan)
+    plus_dm = np.where((up > down) & (up > 0), up, 0.0)
+    minus_dm = np.where((down > up) & (down > 0), down, 0.0)
+    tr = true_range(high, low, close)
+
+    tr_avg = _wilder(tr, n, start=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100.0 * _wilder(plus_dm, n, start=1) / tr_avg
+        minus_di = 100.0 * _wilder(minus_dm, n, start=1) / tr_avg
+        di_sum = plus_di + minus_di
+        dx = np.where(di_sum > 0, 100.0 * np.abs(plus_di - minus_di) / di_sum, 0.0)
+    dx[np.isnan(di_sum)] = np.nan
+
+    return {'adx': _wilder(dx, n, start=n), 'plus_di': plus_di, 'minus_di': minus_di}
+
+
+def compute_indicators(
+    high,
+    low,
+    close,
+    spec: Optional[Dict] = None,
+    memo: Optional[Callable] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Compute a set of indicators sharing intermediates
+
+    Every indicator is a node resolved through memo(name, params, func),
+    so EMAs and the true range are computed once and reused by MACD and
+    ATR. Passing a memo backed by a persistent cache (see
+    indicator_cache.py) reuses nodes across calls.
+
+    Args:
+        high: Bar highs (last axis is time)
+        low: Bar lows
+        close: Bar closes
+        spec: Mapping of indicator name to a list of parameters, e.g.
+            {'ema': [12, 26], 'macd': [(12, 26, 9)]} (defaults to
+            DEFAULT_INDICATORS)
+        memo: Callable returning the cached value of a node or computing
+            it with func() (defaults to a per-call dictionary)
+
+    Returns:
+        Dictionary of arrays keyed like 'ema_12', 'rsi_14', 'macd_12_26_9',
+        'macd_signal_12_26_9', 'bb_upper_20_2.0', 'stoch_k_14_3', 'adx_14'
+    """
+    spec = DEFAULT_INDICATORS if spec is None else spec
+    high, low, close = _as_array(high), _as_array(low), _as_array(close)
+
+    if memo is None:
+        local = {}
+
+        def memo(name, params, func):
+            key = (name, params)
+            if key not in local:
+                local[key] = func()
+            return local[key]
+
+    def ema_node(n):
+        return memo('ema', (n,), lambda: ema(close, n))
+
+    def tr_node():
+        return memo('true_range', (), lambda: true_range(high, low, close))
+
+    out = {}
+    for n in spec.get('sma', []):
+        out[f'sma_{n}'] = memo('sma', (n,), lambda: sma(close, n))
+    for n in spec.get('ema', []):
+        out[f'ema_{n}'] = ema_node(n)
+    for n in spec.get('rsi', []):
+        out[f'rsi_{n}'] = memo('rsi', (n,), lambda: rsi(close, n))
+    for n in spec.get('atr', []):
+        out[f'atr_{n}'] = memo('atr', (n,), lambda: atr(high, low, close, n, tr=tr_node()))
+    for fast, slow, signal in spec.get('macd', []):
+        result = memo('macd', (fast, slow, signal),
+                      lambda: macd(close, fast, slow, signal, ema_node(fast), ema_node(slow)))
+        suffix = f'{fast}_{slow}_{signal}'
+        out[f'macd_{suffix}'] = result['line']
+        out[f'macd_signal_{suffix}'] = result['signal']
+        out[f'macd_hist_{suffix}'] = result['hist']
+    for n, k in spec.get('bollinger', []):
+        result = memo('bollinger', (n, k), lambda: bollinger(close, n, k))
+        for band in ('upper', 'middle', 'lower'):
+            out[f'bb_{band}_{n}_{k}'] = result[band]
+    for k_period, d_period in spec.get('stochastic', []):
+        result = memo('stochastic', (k_period, d_period),
+                      lambda: stochastic(high, low, close, k_period, d_period))
+        out[f'stoch_k_{k_period}_{d_period}'] = result['k']
+        out[f'stoch_d_{k_period}_{d_period}'] = result['d']
+    for n in spec.get('adx', []):
+        result = memo('adx', (n,), lambda: adx(high, low, close, n))
+        out[f'adx_{n}'] = result['adx']
+        out[f'plus_di_{n}'] = result['plus_di']
+        out[f'minus_di_{n}'] = result['minus_di']
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Streaming indicators
+# ---------------------------------------------------------------------------
+
+class StreamingIndicator:
+    """
+    Base class for one-bar-at-a-time indicators
+
+    State is plain attributes, deques and nested indicators, so it can be
+    exported with get_state() and restored with set_state().
+    """
+
+    def get_state(self) -> Dict:
+        """Export internal state as JSON-compatible values"""
+        state = {}
+        for key, value in vars(self).items():
+            if isinstance(value, StreamingIndicator):
+                state[key] = value.get_state()
+            elif isinstance(value, deque):
+                state[key] = list(value)
+            else:
+                state[key] = value
+        return state
+
+    def set_state(self, state: Dict):
+        """Restore internal state exported by get_state()"""
+        for key, value in state.items():
+            current = getattr(self, key)
+            if isinstance(current, StreamingIndicator):
+                current.set_state(value)
+            elif isinstance(current, deque):
+                setattr(self, key, deque(value, maxlen=current.maxlen))
+            else:
+                setattr(self, key, value)
+
+
+class StreamingSMA(StreamingIndicator):
+    """Simple moving average"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.window = deque(maxlen=n)
+        self.value = np.nan
+
+    @property
+    def initialized(self) -> bool:
+        return len(self.window) == self.n
+
+    def update(self, x: float) -> float:
+        self.window.append(x)
+        if self.initialized:
+            self.value = float(np.mean(self.window))
+        return self.value
+
+
+class StreamingEMA(StreamingIndicator):
+    """Exponential moving average seeded with the first value"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.alpha = 2.0 / (n + 1)
+        self.count = 0
+        self.value = np.nan
+
+    @property
+    def initialized(self) -> bool:
+        return self.count >= self.n
+
+    def update(self, x: float) -> float:
+        self.value = x if self.count == 0 else self.alpha * x + (1.0 - self.alpha) * self.value
+        self.count += 1
+        return self.value
+
+
+class StreamingWilder(StreamingIndicator):
+    """Wilder average seeded with the mean of the first n values"""
+
+    def __init__(self, n: int):
+        self.n = n
+        self.count = 0
+        self.total = 0.0
+        self.value = np.nan
+
+    @property
+    def initialized(self) -> bool:
+        return self.count >= self.n
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.n:
+            self.total += x
+        elif self.count == self.n:
+            self.value = (self.total + x) / self.n
+        else:
+            self.value = self.value + (x - self.value) / self.n
+        return self.value
+
+
+class StreamingRSI(StreamingIndicator):
+    """Wilder relative strength index"""
+
+    def __init__(self, n: int = 14):
+        self.prev_close = None
+        self.avg_gain = StreamingWilder(n)
+        self.avg_loss = StreamingWilder(n)
+        self.value = np.nan
+
+    @property
+    def initialized(self) -> bool:
+        return self.avg_loss.initialized
+
+    def update(self, close: float) -> float:
+        if self.prev_close is not None:
+            delta = close - self.prev_close
+            gain = self.avg_gain.update(delta if delta > 0 else 0.0)
+            loss = self.avg_loss.update(-delta if delta < 0 else 0.0)
+            if self.initialized:
+                self.value = 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+        self.prev_close = close
+        return self.value
+
+
+class StreamingATR(StreamingIndicator):
+    """Wilder average true range"""
+
+    def __init__(self, n: int = 14):
+        self.prev_close = None
+        self.average = StreamingWilder(n)
+        self.value = np.nan
+
+    @property
+    def initialized(self) -> bool:
+        return self.average.initialized
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.value = self.average.update(tr)
+        return self.value
+
+
+class StreamingMACD(StreamingIndicator):
+    """MACD line, signal line and histogram"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal_ema = StreamingEMA(signal)
+        self.line = np.nan
+        self.signal = np.nan
+        self.hist = np.nan
+
+    @property
+    def initialized(self) -> bool:
+        return self.slow.initialized and self.signal_ema.initialized
+
+    @property
+    def value(self) -> float:
+        return self.line
+
+    def update(self, close: float) -> float:
+        self.line = self.fast.update(close) - self.slow.update(close)
+        self.signal = self.signal_ema.update(self.line)
+        self.hist = self.line - self.signal
+        return self.line
+
+
+class StreamingBollinger(StreamingIndicator):
+    """Bollinger Bands (population standard deviation)"""
+
+    def __init__(self, n: int = 20, k: float = 2.0):
+        self.n = n
+        self.k = k
+        self.window = deque(maxlen=n)
+        self.upper = np.nan
+        self.middle = np.nan
+        self.lower = np.nan
+
+    @property
+    def initialized(self) -> bool:
+        return len(self.window) == self.n
+
+    def update(self, close: float) -> float:
+        self.window.append(close)
+        if self.initialized:
+            values = np.array(self.window)
+            self.middle = float(values.mean())
+            std = float(values.std())
+            self.upper = self.middle + self.k * std
+            self.lower = self.middle - self.k * std
+        return self.middle
+
+
+class StreamingStochastic(StreamingIndicator):
+    """Stochastic oscillator (%K is 50 when the range is flat)"""
+
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        self.highs = deque(maxlen=k_period)
+        self.lows = deque(maxlen=k_period)
+        self.d_sma = StreamingSMA(d_period)
+        self.k = np.nan
+        self.d = np.nan
+
+    @property
+    def initialized(self) -> bool:
+        return self.d_sma.initialized
+
+    def update(self, high: float, low: float, close: float) -> float:
+        self.highs.append(high)
+        self.lows.append(low)
+        if len(self.highs) == self.highs.maxlen:
+            highest, lowest = max(self.highs), min(self.lows)
+            span = highest - lowest
+            self.k = 100.0 * (close - lowest) / span if span > 0 else 50.0
+            self.d = self.d_sma.update(self.k)
+        return self.k
+
+
+class StreamingADX(StreamingIndicator):
+    """Average directional index with directional indicators"""
+
+    def __init__(self, n: int = 14):
+        self.prev = None
+        self.tr_avg = StreamingWilder(n)
+        self.plus_avg = StreamingWilder(n)
+        self.minus_avg = StreamingWilder(n)
+        self.adx_avg = StreamingWilder(n)
+        self.plus_di = np.nan
+        self.minus_di = np.nan
+        self.value = np.nan
+
+    @property
+    def initialized(self) -> bool:
+        return self.adx_avg.initialized
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if self.prev is not None:
+            prev_high, prev_low, prev_close = self.prev
+            up, down = high - prev_high, prev_low - low
+            tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+            tr_avg = self.tr_avg.update(tr)
+            plus = self.plus_avg.update(up if up > down and up > 0 else 0.0)
+            minus = self.minus_avg.update(down if down > up and down > 0 else 0.0)
+            if self.tr_avg.initialized:
+                self.plus_di = 100.0 * plus / tr_avg
+                self.minus_di = 100.0 * minus / tr_avg
+                di_sum = self.plus_di + self.minus_di
+                dx = 100.0 * abs(self.plus_di - self.minus_di) / di_sum if di_sum > 0 else 0.0
+                self.value = self.adx_avg.update(dx)
+        self.prev = (high, low, close)
+        return self.value
+
+
+class StreamingIndicatorSet(StreamingIndicator):
+    """
+    Streaming counterpart of compute_indicators()
+
+    update() returns the latest value of every indicator under the same
+    keys compute_indicators() uses.
+    """
+
+    def __init__(self, spec: Optional[Dict] = None):
+        spec = DEFAULT_INDICATORS if spec is None else spec
+        self.indicators = {}
+        for n in spec.get('sma', []):
+            self.indicators[f'sma_{n}'] = StreamingSMA(n)
+        for n in spec.get('ema', []):
+            self.indicators[f'ema_{n}'] = StreamingEMA(n)
+        for n in spec.get('rsi', []):
+            self.indicators[f'rsi_{n}'] = StreamingRSI(n)
+        for n in spec.get('atr', []):
+            self.indicators[f'atr_{n}'] = StreamingATR(n)
+        for fast, slow, signal in spec.get('macd', []):
+            self.indicators[f'macd_{fast}_{slow}_{signal}'] = StreamingMACD(fast, slow, signal)
+        for n, k in spec.get('bollinger', []):
+            self.indicators[f'bb_{n}_{k}'] = StreamingBollinger(n, k)
+        for k_period, d_period in spec.get('stochastic', []):
+            self.indicators[f'stoch_{k_period}_{d_period}'] = StreamingStochastic(k_period, d_period)
+        for n in spec.get('adx', []):
+            self.indicators[f'adx_{n}'] = StreamingADX(n)
+
+    @property
+    def initialized(self) -> bool:
+        return all(indicator.initialized for indicator in self.indicators.values())
+
+    def get_state(self) -> Dict:
+        return {key: indicator.get_state() for key, indicator in self.indicators.items()}
+
+    def set_state(self, state: Dict):
+        for key, value in state.items():
+            self.indicators[key].set_state(value)
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        out = {}
+        for key, indicator in self.indicators.items():
+            if isinstance(indicator, (StreamingATR, StreamingStochastic, StreamingADX)):
+                indicator.update(high, low, close)
+            else:
+                indicator.update(close)
+
+            if isinstance(indicator, StreamingMACD):
+                suffix = key[len('macd_'):]
+                out[key] = indicator.line
+                out[f'macd_signal_{suffix}'] = indicator.signal
+                out[f'macd_hist_{suffix}'] = indicator.hist
+            elif isinstance(indicator, StreamingBollinger):
+                suffix = key[len('bb_'):]
+                out[f'bb_upper_{suffix}'] = indicator.upper
+                out[f'bb_middle_{suffix}'] = indicator.middle
+                out[f'bb_lower_{suffix}'] = indicator.lower
+            elif isinstance(indicator, StreamingStochastic):
+                suffix = key[len('stoch_'):]
+                out[f'stoch_k_{suffix}'] = indicator.k
+                out[f'stoch_d_{suffix}'] = indicator.d
+            elif isinstance(indicator, StreamingADX):
+                suffix = key[len('adx_'):]
+                out[key] = indicator.value
+                out[f'plus_di_{suffix}'] = indicator.plus_di
+                out[f'minus_di_{suffix}'] = indicator.minus_di
+            else:
+                out[key] = indicator.value
+        return out
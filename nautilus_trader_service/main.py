@@ -7,19 +7,37 @@ import asyncio
 import sys
 from datetime import datetime
 import MetaTrader5 as mt5
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+import numpy as np
 
-from nautilus_trader.backtest.node import BacktestNode
-from nautilus_trader.config import BacktestConfig
-from nautilus_trader.core.datetime import dt_to_unix_nanos
 from nautilus_trader.model.identifiers import InstrumentId, Symbol, Venue
 from nautilus_trader.model.data import BarType, BarSpecification, BarAggregation
 
 from config import config
+from event_writer import event_writer
+from indicator_cache import indicator_graph, series_label
+from market_capture import market_capture
+from market_depth import market_depth_service
+from model_scoring import model_scorer
 from mt5_data_client import mt5_data_client
+from position_tracker import position_tracker
+from runtime_control import runtime_controller
+from startup import startup_profiler
+from state_snapshot import state_snapshot_store
 from strategies.technical_strategy import TechnicalStrategy
 
 
+# Timeframe unit to Nautilus bar aggregation (M1, H4, D1, W1, MN1)
+BAR_AGGREGATIONS = {
+    'MN': BarAggregation.MONTH,
+    'M': BarAggregation.MINUTE,
+    'H': BarAggregation.HOUR,
+    'D': BarAggregation.DAY,
+    'W': BarAggregation.WEEK
+}
+
+
 class NautilusTraderApp:
     """
     Main application for Nautilus Trader with MT5 integration
@@ -27,9 +45,16 @@ class NautilusTraderApp:
     
     def __init__(self):
         self.data_client = mt5_data_client
+        self.position_tracker = position_tracker
+        self.snapshot_store = state_snapshot_store
         self.strategies = {}
         self.running = False
         
+        # Traded universe: config.SYMBOLS x timeframes x parameter sets
+        self.timeframes = [config.DEFAULT_TIMEFRAME]
+        self.param_sets = {'default': {}}
+        self.feeds = set()  # (symbol, timeframe) bar subscriptions
+        
     async def initialize(self):
         """Initialize the trading system"""
         print("🚀 Initializing Nautilus Trader with MT5...")
@@ -41,49 +66,269 @@ class NautilusTraderApp:
             print(f"❌ Configuration error: {e}")
             return False
         
+        # Load warm-start snapshot
+        with startup_profiler.phase('snapshot_load'):
+            snapshot = self.snapshot_store.load()
+            if snapshot:
+                self.data_client.restore_symbol_cache(snapshot['symbol_cache'])
+        
+        # Start the database writer (no-op without DATABASE_URL)
+        with startup_profiler.phase('event_writer'):
+            try:
+                await event_writer.start()
+            except Exception as e:
+                print(f"⚠️ Event writer unavailable: {e}")
+        
+        # Record MT5 responses for replay
+        if config.CAPTURE_ENABLED:
+            market_capture.start(self.data_client)
+        
         # Connect to MT5
-        connected = await self.data_client.connect()
+        with startup_profiler.phase('mt5_connect'):
+            connected = await self.data_client.connect()
         if not connected:
             print("❌ Failed to connect to MT5")
             return False
         
+        # Order books for liquidity-aware sizing
+        market_depth_service.start()
+        
+        # Model scores blended into signal confidence
+        if config.MODEL_PATH:
+            model_scorer.start()
+        
         # Initialize strategies for configured symbols
-        await self.initialize_strategies()
+        with startup_profiler.phase('strategies'):
+            runtime_controller.load(self)
+            await self.initialize_strategies()
+            if snapshot:
+                self.restore_strategies(snapshot['strategies'])
         
+        startup_profiler.mark_ready()
         print("✅ Nautilus Trader initialized successfully")
         return True
     
+    @staticmethod
+    def strategy_key(symbol: str, timeframe: str, name: str) -> str:
+        """Strategy key of a symbol, timeframe and parameter set"""
+        return f"{symbol}:{timeframe}:{name}"
+    
+    def desired_strategies(self) -> Dict[str, tuple]:
+        """(symbol, timeframe, parameter set) per strategy key of the traded universe"""
+        return {
+            self.strategy_key(symbol, timeframe, name): (symbol, timeframe, name)
+            for symbol in config.SYMBOLS
+            for timeframe in self.timeframes
+            for name in self.param_sets
+        }
+    
+    def create_strategy(self, symbol: str, timeframe: str, name: str, params: Optional[Dict] = None) -> TechnicalStrategy:
+        """
+        Create a TechnicalStrategy for one symbol, timeframe and parameter set
+        
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe string
+            name: Parameter set name
+            params: Overrides to use instead of the set's current ones
+        
+        Returns:
+            The strategy (not warmed up)
+        """
+        # Create instrument ID
+        instrument_id = InstrumentId(
+            symbol=Symbol(symbol),
+            venue=Venue("MT5")
+        )
+        
+        # Create bar type
+        unit = 'MN' if timeframe.startswith('MN') else timeframe[0]
+        bar_type = BarType(
+            instrument_id=instrument_id,
+            bar_spec=BarSpecification(
+                step=int(timeframe[len(unit):]),
+                aggregation=BAR_AGGREGATIONS[unit]
+            )
+        )
+        
+        if params is None:
+            params = self.param_sets[name]
+        params = {'risk_per_trade': config.MAX_RISK_PER_TRADE, **params}
+        return TechnicalStrategy(
+            instrument_id=instrument_id,
+            bar_type=bar_type,
+            warmup_bars=config.WARMUP_BARS,
+            **params
+        )
+    
     async def initialize_strategies(self):
         """Initialize trading strategies for all symbols"""
-        for symbol in config.SYMBOLS:
+        for key, (symbol, timeframe, name) in self.desired_strategies().items():
             try:
-                # Create instrument ID
-                instrument_id = InstrumentId(
-                    symbol=Symbol(symbol),
-                    venue=Venue("MT5")
-                )
-                
-                # Create bar type
-                bar_type = BarType(
-                    instrument_id=instrument_id,
-                    bar_spec=BarSpecification(
-                        step=15,
-                        aggregation=BarAggregation.MINUTE
-                    )
-                )
-                
-                # Create strategy instance
-                strategy = TechnicalStrategy(
-                    instrument_id=instrument_id,
-                    bar_type=bar_type,
-                    risk_per_trade=config.MAX_RISK_PER_TRADE
-                )
-                
-                self.strategies[symbol] = strategy
-                print(f"  📊 Strategy initialized for {symbol}")
+                self.strategies[key] = self.create_strategy(symbol, timeframe, name)
+                print(f"  📊 Strategy initialized for {key}")
                 
             except Exception as e:
-                print(f"  ❌ Failed to initialize strategy for {symbol}: {e}")
+                print(f"  ❌ Failed to initialize strategy for {key}: {e}")
+    
+    async def load_warmup(self, symbol: str, timeframe: str) -> Optional[Dict]:
+        """
+        Closed bars for warming up a strategy added at runtime
+        
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe string
+        
+        Returns:
+            'bar_times' (ns) and 'bars' arrays for TechnicalStrategy.warm_up,
+            or None without history
+        """
+        rates = await self.data_client.get_historical_rates(symbol, timeframe, config.WARMUP_BARS + 1)
+        rates = rates[:-1]  # Drop the forming bar
+        if not len(rates):
+            return None
+        return {
+            'bar_times': rates['time'].astype(np.int64) * 1_000_000_000,
+            'bars': np.column_stack([
+                rates[field].astype(np.float64)
+                for field in ('open', 'high', 'low', 'close', 'tick_volume')
+            ])
+        }
+    
+    async def apply_universe(self) -> Dict[str, List[str]]:
+        """
+        Bring strategies and bar feeds in line with the traded universe
+        
+        Only the difference is touched: strategies and feeds that are still
+        wanted keep running, new strategies are warmed from the bars of a
+        running strategy on the same feed or from one history request per
+        new symbol/timeframe, and feeds start only while live.
+        
+        Returns:
+            Keys of added, failed and removed strategies and of started and
+            stopped feeds
+        """
+        wanted = self.desired_strategies()
+        removed = [key for key in self.strategies if key not in wanted]
+        for key in removed:
+            del self.strategies[key]
+        
+        new = [key for key in wanted if key not in self.strategies]
+        pairs = list(dict.fromkeys(wanted[key][:2] for key in new))
+        
+        # Feeds that already run share their bars; only new ones hit MT5
+        history = {}
+        for key, strategy in self.strategies.items():
+            pair = wanted[key][:2]
+            if pair in pairs and pair not in history and strategy.bar_history:
+                history[pair] = strategy.export_state()
+        missing = [pair for pair in pairs if pair not in history]
+        history.update(zip(missing, await asyncio.gather(
+            *(self.load_warmup(symbol, timeframe) for symbol, timeframe in missing),
+            return_exceptions=True
+        )))
+        added, failed = [], []
+        for key in new:
+            symbol, timeframe, name = wanted[key]
+            try:
+                strategy = self.create_strategy(symbol, timeframe, name)
+                state = history[(symbol, timeframe)]
+                if isinstance(state, Exception):
+                    print(f"⚠️ No warm-up history for {symbol} {timeframe}: {state}")
+                elif state is not None:
+                    strategy.warm_up(state)
+                self.strategies[key] = strategy
+                added.append(key)
+            except Exception as e:
+                print(f"  ❌ Failed to initialize strategy for {key}: {e}")
+                failed.append(key)
+        
+        feeds = {(symbol, timeframe) for symbol, timeframe, _ in wanted.values()}
+        stopped = sorted(self.feeds - feeds)
+        started = sorted(feeds - self.feeds) if self.running else []
+        for symbol, timeframe in stopped:
+            await self.data_client.unsubscribe_bars(symbol, timeframe)
+            self.feeds.discard((symbol, timeframe))
+        for symbol, timeframe in started:
+            await self.data_client.subscribe_bars(symbol, timeframe, self.on_new_bar)
+            self.feeds.add((symbol, timeframe))
+        
+        if added or removed or failed:
+            print(f"🎛️ Universe updated: +{len(added)} / -{len(removed)} strategies "
+                  f"({len(failed)} failed), +{len(started)} / -{len(stopped)} feeds")
+        return {
+            'added': added,
+            'failed': failed,
+            'removed': removed,
+            'started': [f"{symbol}:{timeframe}" for symbol, timeframe in started],
+            'stopped': [f"{symbol}:{timeframe}" for symbol, timeframe in stopped]
+        }
+    
+    def rebuild_strategies(self, name: str, params: Optional[Dict] = None) -> List[str]:
+        """
+        Replace a parameter set's strategies after an indicator change
+        
+        Position state carries over and the new indicators are warmed from
+        the bars the old strategy held, so no history is requested. All
+        replacements are built before any is swapped in, so a failure
+        leaves the running strategies untouched.
+        
+        Args:
+            name: Parameter set name
+            params: New overrides of the set (defaults to its current ones)
+        
+        Returns:
+            Keys of the rebuilt strategies
+        """
+        replacements = {}
+        for key, (symbol, timeframe, set_name) in self.desired_strategies().items():
+            old = self.strategies.get(key)
+            if set_name != name or old is None:
+                continue
+            state = old.export_state()
+            strategy = self.create_strategy(symbol, timeframe, name, params)
+            strategy.restore_state(state)
+            if len(state['bars']):
+                strategy.warm_up(state)
+            replacements[key] = strategy
+        self.strategies.update(replacements)
+        return list(replacements)
+    
+    def update_risk(self, name: str):
+        """Apply a parameter set's risk_per_trade to its running strategies"""
+        risk = self.param_sets[name].get('risk_per_trade', config.MAX_RISK_PER_TRADE)
+        suffix = f":{name}"
+        for key, strategy in self.strategies.items():
+            if key.endswith(suffix):
+                strategy.risk_per_trade = risk
+    
+    def restore_strategies(self, states: Dict[str, Dict]):
+        """
+        Restore strategy state from a warm-start snapshot
+        
+        No TradingNode starts these strategies, so the snapshot is applied
+        right away instead of in on_start.
+        
+        Args:
+            states: Strategy state keyed by strategy key
+        """
+        restored = 0
+        for key, state in states.items():
+            # Snapshots from before runtime control are keyed by symbol
+            if ':' not in key:
+                key = self.strategy_key(key, config.DEFAULT_TIMEFRAME, 'default')
+            if key in self.strategies:
+                self.strategies[key].restore_state(state)
+                self.strategies[key].apply_restored_state()
+                restored += 1
+        print(f"♻️ Restored {restored} strategies from snapshot")
+    
+    def save_snapshot(self):
+        """Write a warm-start snapshot of strategies and symbol cache"""
+        try:
+            self.snapshot_store.save(self.strategies, self.data_client.symbol_info_cache)
+        except Exception as e:
+            print(f"❌ Error saving snapshot: {e}")
     
     async def start_trading(self):
         """Start live trading"""
@@ -94,23 +339,20 @@ class NautilusTraderApp:
         self.running = True
         print("\n📈 Starting live trading...")
         
-        # Start data feeds for all symbols
-        tasks = []
-        for symbol in config.SYMBOLS:
-            tasks.append(
-                self.data_client.subscribe_bars(
-                    symbol,
-                    config.DEFAULT_TIMEFRAME,
-                    self.on_new_bar
-                )
-            )
+        self.position_tracker.subscribe(self.on_position_diff)
+        
+        # Start data feeds for every symbol and timeframe
+        await self.apply_universe()
         
-        # Run all data feeds concurrently
-        await asyncio.gather(*tasks)
+        # Accept universe and parameter changes while running
+        if config.CONTROL_ENABLED:
+            runtime_controller.start(self)
         
         # Keep running until stopped
         while self.running:
             await self.monitor_positions()
+            if self.snapshot_store.due():
+                self.save_snapshot()
             await asyncio.sleep(10)
     
     async def on_new_bar(self, bar_data: Dict):
@@ -127,39 +369,93 @@ class NautilusTraderApp:
               f"O:{bar_data['open']:.5f} H:{bar_data['high']:.5f} "
               f"L:{bar_data['low']:.5f} C:{bar_data['close']:.5f}")
         
-        # Send to strategy if exists
-        if symbol in self.strategies:
-            strategy = self.strategies[symbol]
-            # strategy.on_bar(bar_data)  # Would need conversion to Nautilus Bar object
+        # Keep the feed's strategies (indicators and snapshot bars) current
+        closed = bar_data.get('closed')
+        if closed is None:
+            return
+        prefix = f"{symbol}:{bar_data['timeframe']}:"
+        for key, strategy in self.strategies.items():
+            if key.startswith(prefix):
+                strategy.update_bar(
+                    closed['time'].value, closed['open'], closed['high'],
+                    closed['low'], closed['close'], float(closed['volume'])
+                )
     
     async def monitor_positions(self):
-        """Monitor and display current positions"""
+        """Poll positions and display only what changed"""
         try:
-            # Get account info
-            account_info = await self.data_client.get_account_info()
-            if account_info:
-                print(f"\n💰 Account Status:")
-                print(f"   Balance: ${account_info['balance']:.2f}")
-                print(f"   Equity: ${account_info['equity']:.2f}")
-                print(f"   Margin: ${account_info['margin']:.2f}")
-                print(f"   Free Margin: ${account_info['free_margin']:.2f}")
-                if account_info['margin_level']:
-                    print(f"   Margin Level: {account_info['margin_level']:.2f}%")
-            
-            # Get open positions
-            positions = await self.data_client.get_positions()
-            if positions:
-                print(f"\n📋 Open Positions ({len(positions)}):")
-                for pos in positions:
-                    print(f"   {pos['symbol']} {pos['type']}: "
-                          f"Volume={pos['volume']}, "
-                          f"Price={pos['price_open']:.5f}, "
-                          f"Current={pos['price_current']:.5f}, "
-                          f"P&L=${pos['profit']:.2f}")
-            
+            await self.position_tracker.refresh()
         except Exception as e:
             print(f"❌ Error monitoring positions: {e}")
     
+    async def on_position_diff(self, diff: Dict):
+        """
+        Display position and account changes
+        
+        Args:
+            diff: Diff published by the position tracker
+        """
+        account = diff['account']
+        if {'balance', 'equity', 'margin'} & account.keys():
+            account_info = self.position_tracker.account
+            print(f"\n💰 Account Status:")
+            print(f"   Balance: ${account_info['balance']:.2f}")
+            print(f"   Equity: ${account_info['equity']:.2f}")
+            print(f"   Margin: ${account_info['margin']:.2f}")
+            print(f"   Free Margin: ${account_info['free_margin']:.2f}")
+            if account_info['margin_level']:
+                print(f"   Margin Level: {account_info['margin_level']:.2f}%")
+        
+        if len(diff['opened']) or len(diff['closed']):
+            self.record_risk_check()
+        
+        for label, key in (('Opened', 'opened'), ('Modified', 'modified'),
+                           ('P&L', 'pnl_moved'), ('Closed', 'closed')):
+            for pos in self.position_tracker.to_dicts(diff[key]):
+                print(f"   📋 {label}: {pos['symbol']} {pos['type']} #{pos['ticket']}: "
+                      f"Volume={pos['volume']}, "
+                      f"Price={pos['price_open']:.5f}, "
+                      f"Current={pos['price_current']:.5f}, "
+                      f"P&L=${pos['profit']:.2f}")
+    
+    def record_risk_check(self):
+        """Log a real-time risk check to risk_analysis_logs"""
+        account = self.position_tracker.account
+        balance = account.get('balance') or 0
+        if not balance:
+            return
+        
+        drawdown = max(0.0, (balance - account.get('equity', balance)) / balance)
+        risk_score = int(min(100, drawdown / config.MAX_DAILY_LOSS * 100))
+        if risk_score >= 90:
+            risk_level = 'CRITICAL'
+        elif risk_score >= 60:
+            risk_level = 'HIGH'
+        elif risk_score >= 30:
+            risk_level = 'MEDIUM'
+        else:
+            risk_level = 'LOW'
+        
+        open_positions = len(self.position_tracker.positions)
+        risk_factors = []
+        if open_positions >= config.MAX_OPEN_POSITIONS:
+            risk_factors.append('max_open_positions')
+        if risk_score >= 60:
+            risk_factors.append('drawdown')
+        
+        event_writer.write('risk_analysis_logs', {
+            'user_id': config.PERSIST_USER_ID,
+            'analysis_type': 'real_time',
+            'risk_level': risk_level,
+            'risk_score': risk_score,
+            'risk_factors': risk_factors,
+            'analysis_result': {
+                'drawdown_percent': drawdown * 100,
+                'open_positions': open_positions
+            },
+            'account_metrics': account
+        })
+    
     async def backtest_strategy(self, symbol: str, start_date: str, end_date: str):
         """
         Run backtest for a specific symbol
@@ -194,7 +490,7 @@ class NautilusTraderApp:
         
         print(f"✅ Backtest completed for {symbol}")
     
-    async def calculate_indicators(self, symbol: str, data: pd.DataFrame):
+    async def calculate_indicators(self, symbol: str, data):
         """
         Calculate technical indicators on data
         
@@ -203,27 +499,16 @@ class NautilusTraderApp:
             data: DataFrame with OHLCV data
         """
         try:
-            # Calculate SMA
-            data['sma_20'] = data['close'].rolling(window=20).mean()
-            
-            # Calculate EMA
-            data['ema_12'] = data['close'].ewm(span=12, adjust=False).mean()
-            data['ema_26'] = data['close'].ewm(span=26, adjust=False).mean()
-            
-            # Calculate RSI
-            delta = data['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            data['rsi_14'] = 100 - (100 / (1 + rs))
-            
-            # Calculate ATR
-            high_low = data['high'] - data['low']
-            high_close = np.abs(data['high'] - data['close'].shift())
-            low_close = np.abs(data['low'] - data['close'].shift())
-            ranges = pd.concat([high_low, high_close, low_close], axis=1)
-            true_range = np.max(ranges, axis=1)
-            data['atr_14'] = true_range.rolling(window=14).mean()
+            # Shared kernels (same values as TechnicalStrategy and the API)
+            values = indicator_graph.compute(
+                data['high'].to_numpy(),
+                data['low'].to_numpy(),
+                data['close'].to_numpy(),
+                {'sma': [20], 'ema': [12, 26], 'rsi': [14], 'atr': [14]},
+                label=series_label(symbol, config.DEFAULT_TIMEFRAME)
+            )
+            for name, series in values.items():
+                data[name] = series
             
             print(f"   ✅ Indicators calculated for {symbol}")
             
@@ -244,13 +529,26 @@ class NautilusTraderApp:
         print("\n⏹️ Stopping Nautilus Trader...")
         
         self.running = False
+        await runtime_controller.stop()
+        
+        # Keep a final snapshot for the next warm start
+        if self.strategies:
+            self.save_snapshot()
+        
+        # Unsubscribe from all feeds
+        for symbol, timeframe in sorted(self.feeds):
+            await self.data_client.unsubscribe_bars(symbol, timeframe)
+        self.feeds.clear()
+        
+        await market_depth_service.stop()
+        await model_scorer.stop()
         
-        # Unsubscribe from all symbols
-        for symbol in config.SYMBOLS:
-            await self.data_client.unsubscribe(symbol)
+        # Flush queued database writes
+        await event_writer.stop()
         
         # Disconnect from MT5
         await self.data_client.disconnect()
+        market_capture.stop(self.data_client)
         
         print("✅ Nautilus Trader stopped")
     
@@ -0,0 +1,403 @@
+"""
+Market Data Capture
+Records every MT5 response to compressed segments and replays them through MT5DataClient
+"""
+
+import asyncio
+import gzip
+import heapq
+import itertools
+import pickle
+import queue
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from config import config
+
+
+# MT5 calls whose responses are recorded (never initialize: it carries credentials)
+CAPTURED_CALLS = (
+    'account_info', 'positions_get', 'symbols_get', 'symbol_info', 'symbol_info_tick',
+    'copy_rates_from_pos', 'copy_rates_range', 'copy_ticks_range', 'copy_ticks_from',
+    'market_book_add', 'market_book_get', 'market_book_release', 'last_error'
+)
+
+
+def _freeze(value):
+    """Convert MT5 named tuples to plain data for pickling"""
+    if hasattr(value, '_asdict'):
+        return ('__mt5__', type(value).__name__, dict(value._asdict()))
+    if isinstance(value, tuple):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+_record_types: Dict[tuple, type] = {}
+
+
+def _thaw(value):
+    """Rebuild attribute-style records from _freeze output"""
+    if isinstance(value, tuple) and len(value) == 3 and value[0] == '__mt5__':
+        _, name, fields = value
+        key = (name, tuple(fields))
+        if key not in _record_types:
+            _record_types[key] = namedtuple(name, fields.keys())
+        return _record_types[key](**fields)
+    if isinstance(value, tuple):
+        return tuple(_thaw(v) for v in value)
+    return value
+
+
+# Positional date arguments: they move with wall time, so replay ignores them
+VOLATILE_ARGS = {
+    'copy_rates_range': (2, 3),
+    'copy_ticks_range': (1, 2),
+    'copy_ticks_from': (1,),
+}
+VOLATILE_KWARGS = ('date_from', 'date_to')
+
+
+def _call_key(name: str, args: tuple, kwargs: Optional[dict] = None):
+    """Replay queue key: the call with all its arguments except date ranges"""
+    volatile = VOLATILE_ARGS.get(name, ())
+    stable = tuple(arg for i, arg in enumerate(args) if i not in volatile)
+    named = tuple(sorted((k, v) for k, v in (kwargs or {}).items() if k not in VOLATILE_KWARGS))
+    return (name, stable, named)
+
+
+class SegmentWriter:
+    """
+    Append-only, gzip-compressed capture segments written by a background thread
+
+    Producers only enqueue (receive time, call, args, response); conversion,
+    pickling and compression happen on the writer thread. Records are
+    written in pickled batches, and each batch is flushed, so a crash loses
+    at most the batch in flight. A new segment starts every
+    CAPTURE_SEGMENT_SECONDS.
+
+    Args:
+        directory: Segment directory
+        segment_seconds: Segment rotation interval
+        batch_size: Records per pickled batch
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        segment_seconds: Optional[float] = None,
+        batch_size: int = 1000
+    ):
+        self.directory = Path(directory or config.CAPTURE_DIR)
+        self.segment_seconds = segment_seconds or config.CAPTURE_SEGMENT_SECONDS
+        self.batch_size = batch_size
+        self.records = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def start(self):
+        """Start the writer thread"""
+        if self._thread is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name='market-capture', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Write everything queued and stop the thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def put(self, recv_time: float, name: str, args: tuple, kwargs: dict, result):
+        """Enqueue one MT5 response (called on the hot path)"""
+        self._queue.put((recv_time, name, args, kwargs, result))
+
+    def _run(self):
+        segment = None
+        segment_started = 0.0
+        running = True
+        while running:
+            batch = []
+            try:
+                item = self._queue.get(timeout=1.0)
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                running = item is not None
+            except queue.Empty:
+                pass
+
+            if not batch:
+                continue
+
+            now = time.time()
+            if segment is None or now - segment_started >= self.segment_seconds:
+                if segment is not None:
+                    segment.close()
+                segment_started = now
+                stamp = time.strftime('%Y%m%d-%H%M%S', time.gmtime(now))
+                segment = gzip.open(self.directory / f'capture-{stamp}.seg.gz', 'ab', compresslevel=1)
+
+            frozen = [(t, name, args, kwargs, _freeze(result)) for t, name, args, kwargs, result in batch]
+            pickle.dump(frozen, segment, protocol=pickle.HIGHEST_PROTOCOL)
+            segment.flush()
+            self.records += len(batch)
+
+        if segment is not None:
+            segment.close()
+
+
+class RecordingBackend:
+    """
+    MT5 API proxy that forwards every call and records captured responses
+
+    Args:
+        backend: MetaTrader5 module (or compatible object)
+        writer: SegmentWriter receiving the responses
+    """
+
+    def __init__(self, backend, writer: SegmentWriter):
+        self._backend = backend
+        self._writer = writer
+
+    def __getattr__(self, name):
+        attr = getattr(self._backend, name)
+        if name not in CAPTURED_CALLS:
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            self._writer.put(time.time(), name, args, kwargs, result)
+            return result
+
+        return call
+
+
+def load_segments(directory: Optional[str] = None, start: Optional[float] = None, end: Optional[float] = None) -> List[tuple]:
+    """
+    Read capture records in receive-time order
+
+    Args:
+        directory: Segment directory
+        start: Skip records received before this epoch time
+        end: Skip records received after this epoch time
+
+    Returns:
+        List of (recv_time, call, args, kwargs, response)
+    """
+    records = []
+    for path in sorted(Path(directory or config.CAPTURE_DIR).glob('capture-*.seg.gz')):
+        with gzip.open(path, 'rb') as f:
+            while True:
+                try:
+                    records.extend(pickle.load(f))
+                except (EOFError, pickle.UnpicklingError):
+                    # End of segment, or a batch cut off by a crash
+                    break
+    records.sort(key=lambda record: record[0])
+    return [
+        (t, name, args, kwargs, _thaw(result))
+        for t, name, args, kwargs, result in records
+        if (start is None or t >= start) and (end is None or t <= end)
+    ]
+
+
+class ReplayExhausted(RuntimeError):
+    """Raised when replay has no recorded response left for a call"""
+
+
+class VirtualClock:
+    """
+    Virtual time for replay
+
+    sleep() parks the caller until the driver advances virtual time to its
+    wake-up time, so sleeping loops run in recorded order without waiting.
+
+    Args:
+        start: Initial epoch time
+        speed: Real-time speed-up (None runs as fast as possible)
+    """
+
+    def __init__(self, start: float, speed: Optional[float] = None):
+        self.now = start
+        self.speed = speed
+        self._sleepers = []
+        self._seq = itertools.count()
+
+    def time(self) -> float:
+        return self.now
+
+    def advance_to(self, t: float):
+        self.now = max(self.now, t)
+
+    async def sleep(self, seconds: float):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._sleepers, (self.now + max(seconds, 0.0), next(self._seq), future))
+        await future
+
+    async def run(self, done: Callable[[], bool], settle: int = 10):
+        """
+        Drive virtual time until done() is true or no task is sleeping
+
+        Args:
+            done: Stop condition (e.g. replay backend exhausted)
+            settle: Event loop passes to let woken tasks reach their next sleep
+        """
+        while not done():
+            for _ in range(settle):
+                await asyncio.sleep(0)
+            if not self._sleepers:
+                break
+            wake, _, future = heapq.heappop(self._sleepers)
+            if self.speed and wake > self.now:
+                await asyncio.sleep((wake - self.now) / self.speed)
+            self.advance_to(wake)
+            if not future.done():
+                future.set_result(None)
+
+
+class ReplayBackend:
+    """
+    MT5 API stand-in serving recorded responses
+
+    Each call signature (name and arguments, minus date ranges) has its own
+    queue of responses, so concurrent polling loops get exactly the sequence
+    they received in production no matter how the event loop interleaves
+    them, and a symbol's M15 poll never receives its H1 bars. Serving a response moves
+    the virtual clock to its receive time.
+
+    Args:
+        records: Output of load_segments
+        clock: VirtualClock of the replay
+        constants: Module providing MT5 constants (TIMEFRAME_*, ORDER_TYPE_*)
+    """
+
+    def __init__(self, records: List[tuple], clock: VirtualClock, constants=None):
+        self._queues = defaultdict(deque)
+        for t, name, args, kwargs, result in records:
+            self._queues[_call_key(name, args, kwargs)].append((t, result))
+        self._last = {}
+        self._clock = clock
+        self._constants = constants
+        self.remaining = len(records)
+
+    def initialize(self, *args, **kwargs) -> bool:
+        return True
+
+    def shutdown(self):
+        pass
+
+    @property
+    def exhausted(self) -> bool:
+        return self.remaining == 0
+
+    def __getattr__(self, name):
+        if name not in CAPTURED_CALLS:
+            if self._constants is None:
+                raise AttributeError(name)
+            return getattr(self._constants, name)
+
+        def call(*args, **kwargs):
+            key = _call_key(name, args, kwargs)
+            responses = self._queues.get(key)
+            if not responses:
+                # A drained stream repeats its last response, like a quiet market
+                if key in self._last:
+                    return self._last[key]
+                raise ReplayExhausted(f"No recorded response for {name}{args}")
+            t, result = responses.popleft()
+            self._last[key] = result
+            self.remaining -= 1
+            self._clock.advance_to(t)
+            return result
+
+        return call
+
+
+class MarketCapture:
+    """Capture mode switch for a data client"""
+
+    def __init__(self):
+        self.writer = None
+        self._original = None
+
+    def start(self, data_client, directory: Optional[str] = None):
+        """
+        Record every captured MT5 response the data client receives
+
+        Args:
+            data_client: MT5DataClient
+            directory: Segment directory (defaults to CAPTURE_DIR)
+        """
+        if self.writer is not None:
+            return
+        self.writer = SegmentWriter(directory, batch_size=config.CAPTURE_BATCH_RECORDS)
+        self.writer.start()
+        self._original = data_client.mt5
+        data_client.mt5 = RecordingBackend(data_client.mt5, self.writer)
+        print(f"🎥 Market data capture enabled ({self.writer.directory})")
+
+    def stop(self, data_client):
+        """Restore the live backend and flush pending records"""
+        if self.writer is None:
+            return
+        data_client.mt5 = self._original
+        self.writer.stop()
+        print(f"🎥 Market data capture stopped ({self.writer.records} records)")
+        self.writer = None
+
+
+async def replay(
+    setup: Callable,
+    directory: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    speed: Optional[float] = None
+):
+    """
+    Re-run captured production data through a fresh MT5DataClient
+
+    Args:
+        setup: async callable receiving the replay client; subscribe bars or
+            ticks with the production callbacks here
+        directory: Segment directory
+        start: First receive time to replay
+        end: Last receive time to replay
+        speed: Real-time speed-up (None runs as fast as possible)
+
+    Returns:
+        The replay MT5DataClient
+    """
+    import MetaTrader5
+    from mt5_data_client import MT5DataClient
+
+    records = load_segments(directory, start, end)
+    if not records:
+        raise ValueError("No capture records in range")
+
+    clock = VirtualClock(records[0][0], speed)
+    backend = ReplayBackend(records, clock, constants=MetaTrader5)
+    client = MT5DataClient(backend=backend, clock=clock.time, sleep=clock.sleep)
+    await client.connect()
+    await setup(client)
+
+    started = time.time()
+    last = records[-1][0]
+    await clock.run(lambda: backend.exhausted or clock.now > last)
+    client.subscribed_symbols.clear()
+    client.bar_subscriptions.clear()
+    print(f"⏪ Replayed {len(records) - backend.remaining} responses "
+          f"({clock.now - records[0][0]:.0f}s of market time) in {time.time() - started:.1f}s")
+    return client
+
+
+# Singleton instance
+market_capture = MarketCapture()
@@ -0,0 +1,270 @@
+"""
+Market Depth
+Depth-of-market books in preallocated arrays with incrementally updated features
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from config import config
+from mt5_data_client import mt5_data_client, BOOK_SELL
+
+DEPTH_FEATURES = (
+    'time', 'best_bid', 'best_ask', 'mid', 'spread',
+    'bid_depth', 'ask_depth', 'imbalance', 'weighted_mid', 'microprice'
+)
+
+
+class DepthBook:
+    """
+    One symbol's order book in fixed NumPy buffers
+
+    MT5 rows are written straight into `raw`; each side is then copied
+    into its own price/volume arrays ordered from the touch outwards, with
+    cumulative volumes. Features over the top `feature_levels` levels live
+    in one float64 array indexed like DEPTH_FEATURES. Nothing is
+    reallocated per update, and an unchanged book is detected and skipped.
+
+    Args:
+        point: Symbol point size
+        max_levels: Capacity per side
+        feature_levels: Levels per side used for depth features
+    """
+
+    def __init__(self, point: float, max_levels: Optional[int] = None, feature_levels: Optional[int] = None):
+        self.point = point or 0.0
+        self.max_levels = max_levels or config.DEPTH_MAX_LEVELS
+        self.feature_levels = feature_levels or config.DEPTH_FEATURE_LEVELS
+
+        self.raw = np.zeros((2 * self.max_levels, 4))
+        self._previous = np.zeros_like(self.raw)
+        self._previous_rows = -1
+
+        self.bid_price = np.zeros(self.max_levels)
+        self.bid_volume = np.zeros(self.max_levels)
+        self.bid_cumulative = np.zeros(self.max_levels)
+        self.ask_price = np.zeros(self.max_levels)
+        self.ask_volume = np.zeros(self.max_levels)
+        self.ask_cumulative = np.zeros(self.max_levels)
+        self.bid_levels = 0
+        self.ask_levels = 0
+
+        self.features = np.full(len(DEPTH_FEATURES), np.nan)
+        self.updates = 0
+
+    def apply(self, rows: int, now: float) -> bool:
+        """
+        Rebuild sides and features from the first `rows` rows of raw
+
+        Args:
+            rows: Rows written by MT5DataClient.read_depth
+            now: Receive time (epoch seconds)
+
+        Returns:
+            True if the book changed
+        """
+        book = self.raw[:rows]
+        if rows == self._previous_rows and np.array_equal(book, self._previous[:rows]):
+            return False
+        self._previous[:rows] = book
+        self._previous_rows = rows
+
+        # Rows are price descending: asks first, then bids
+        asks = int(np.count_nonzero(np.isin(book[:, 0], BOOK_SELL)))
+        self.ask_levels = min(asks, self.max_levels)
+        self.bid_levels = min(rows - asks, self.max_levels)
+
+        # volume_dbl carries fractional lots; older terminals only fill volume
+        column = 3 if book[:, 3].any() else 2
+        na, nb = self.ask_levels, self.bid_levels
+        self.ask_price[:na] = book[asks - na:asks, 1][::-1]
+        self.ask_volume[:na] = book[asks - na:asks, column][::-1]
+        self.bid_price[:nb] = book[asks:asks + nb, 1]
+        self.bid_volume[:nb] = book[asks:asks + nb, column]
+        np.cumsum(self.ask_volume[:na], out=self.ask_cumulative[:na])
+        np.cumsum(self.bid_volume[:nb], out=self.bid_cumulative[:nb])
+
+        self._update_features(now)
+        self.updates += 1
+        return True
+
+    def _update_features(self, now: float):
+        f = self.features
+        f[:] = np.nan
+        f[0] = now
+        na, nb = min(self.ask_levels, self.feature_levels), min(self.bid_levels, self.feature_levels)
+        if not na or not nb:
+            return
+
+        best_bid, best_ask = self.bid_price[0], self.ask_price[0]
+        bid_depth, ask_depth = self.bid_cumulative[nb - 1], self.ask_cumulative[na - 1]
+        total = bid_depth + ask_depth
+        f[1], f[2] = best_bid, best_ask
+        f[3] = (best_bid + best_ask) / 2
+        f[4] = best_ask - best_bid
+        f[5], f[6] = bid_depth, ask_depth
+        if total > 0:
+            f[7] = (bid_depth - ask_depth) / total
+            f[8] = (self.bid_price[:nb] @ self.bid_volume[:nb] + self.ask_price[:na] @ self.ask_volume[:na]) / total
+        top = self.bid_volume[0] + self.ask_volume[0]
+        if top > 0:
+            # Leans toward the side with less resting volume
+            f[9] = (best_bid * self.ask_volume[0] + best_ask * self.bid_volume[0]) / top
+
+    def available_volume(self, side: str, points: float) -> float:
+        """
+        Resting volume a market order could take within `points` of the touch
+
+        Args:
+            side: 'BUY' (consumes asks) or 'SELL' (consumes bids)
+            points: Price distance from the best price in points
+
+        Returns:
+            Volume in lots (0 if that side is empty)
+        """
+        # Half a point of slack so float rounding doesn't drop the boundary level
+        distance = (points + 0.5) * self.point
+        if side == 'BUY':
+            if not self.ask_levels:
+                return 0.0
+            prices = self.ask_price[:self.ask_levels]
+            count = int(np.searchsorted(prices, prices[0] + distance, side='right'))
+            return float(self.ask_cumulative[count - 1])
+
+        if not self.bid_levels:
+            return 0.0
+        # Bids are descending; search the ascending view
+        prices = self.bid_price[:self.bid_levels][::-1]
+        count = self.bid_levels - int(np.searchsorted(prices, self.bid_price[0] - distance, side='left'))
+        return float(self.bid_cumulative[count - 1])
+
+    def feature_dict(self) -> Dict[str, Optional[float]]:
+        """Features as a dictionary (None where undefined)"""
+        return {
+            name: (None if np.isnan(value) else value)
+            for name, value in zip(DEPTH_FEATURES, self.features.tolist())
+        }
+
+    def levels(self, count: int) -> Dict[str, list]:
+        """Top `count` levels per side as price/volume lists"""
+        na, nb = min(self.ask_levels, count), min(self.bid_levels, count)
+        return {
+            'bids': np.column_stack((self.bid_price[:nb], self.bid_volume[:nb])).tolist(),
+            'asks': np.column_stack((self.ask_price[:na], self.ask_volume[:na])).tolist()
+        }
+
+
+class MarketDepthService:
+    """
+    Depth-of-market subscriptions polled by one background task
+
+    MT5's Python API has no book event, so subscribed books are read with
+    market_book_get every DEPTH_POLL_INTERVAL and written into each
+    symbol's DepthBook buffers. Strategies and the API read the features
+    from memory.
+
+    Args:
+        data_client: MT5DataClient
+        interval: Seconds between book polls
+    """
+
+    def __init__(self, data_client, interval: Optional[float] = None):
+        self.data_client = data_client
+        self.interval = interval or config.DEPTH_POLL_INTERVAL
+        self.books: Dict[str, DepthBook] = {}
+        self._task = None
+
+    def subscribe(self, symbol: str) -> bool:
+        """
+        Subscribe to a symbol's book and read it once
+
+        Args:
+            symbol: Trading symbol
+
+        Returns:
+            True if the symbol has a book
+        """
+        if symbol in self.books:
+            return True
+        if not self.data_client.subscribe_depth(symbol):
+            print(f"⚠️ No market depth for {symbol}")
+            return False
+
+        spec = self.data_client.get_symbol_info(symbol) or {}
+        self.books[symbol] = DepthBook(spec.get('point', 0.0))
+        self._read(symbol)
+        print(f"✅ Subscribed to {symbol} market depth")
+        return True
+
+    def unsubscribe(self, symbol: str):
+        """Cancel a book subscription"""
+        if self.books.pop(symbol, None) is not None:
+            self.data_client.unsubscribe_depth(symbol)
+
+    def _read(self, symbol: str) -> bool:
+        book = self.books[symbol]
+        rows = self.data_client.read_depth(symbol, book.raw)
+        return rows >= 0 and book.apply(rows, time.time())
+
+    def refresh(self):
+        """Poll every subscribed book once"""
+        for symbol in list(self.books):
+            self._read(symbol)
+
+    async def _run(self):
+        """Polling loop"""
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"❌ Error reading market depth: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, symbols: Optional[Iterable[str]] = None):
+        """
+        Subscribe symbols and start polling
+
+        Args:
+            symbols: Trading symbols (defaults to config.DEPTH_SYMBOLS)
+        """
+        for symbol in (config.DEPTH_SYMBOLS if symbols is None else symbols):
+            self.subscribe(symbol)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop polling and release the books"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for symbol in list(self.books):
+            self.unsubscribe(symbol)
+
+    def features(self, symbol: str) -> Optional[Dict[str, Optional[float]]]:
+        """Latest depth features, or None without a subscription"""
+        book = self.books.get(symbol)
+        return book.feature_dict() if book is not None else None
+
+    def available_volume(self, symbol: str, side: str, points: Optional[float] = None) -> Optional[float]:
+        """
+        Volume available within `points` of the touch
+
+        Args:
+            symbol: Trading symbol
+            side: 'BUY' or 'SELL'
+            points: Distance in points (defaults to DEPTH_SIZING_POINTS)
+
+        Returns:
+            Volume in lots, or None without a subscription
+        """
+        book = self.books.get(symbol)
+        if book is None or book.updates == 0:
+            return None
+        return book.available_volume(side, config.DEPTH_SIZING_POINTS if points is None else points)
+
+
+# Singleton instance
+market_depth_service = MarketDepthService(mt5_data_client)
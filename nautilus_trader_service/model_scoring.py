@@ -0,0 +1,295 @@
+"""
+Model Scoring
+Batched online scoring of every traded symbol with a trained model on each bar close
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import config
+from feature_pipeline import FEATURE_NAMES, compute_features
+from mt5_data_client import mt5_data_client
+from screener import ScreenerUniverse
+
+
+class LinearModel:
+    """
+    Plain NumPy model stored as an .npz weight file
+
+    Keys: 'weights' (one per FEATURE_NAMES column), optional 'bias',
+    'mean' and 'scale' (feature standardization) and 'link' ('identity'
+    for a forward-return regression, 'logistic' for an up-move
+    probability).
+
+    Args:
+        path: Weight file
+    """
+
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.weights = data['weights'].astype(np.float64)
+            self.bias = float(data['bias']) if 'bias' in data else 0.0
+            self.mean = data['mean'] if 'mean' in data else 0.0
+            self.scale = data['scale'] if 'scale' in data else 1.0
+            self.link = str(data['link']) if 'link' in data else 'identity'
+        if len(self.weights) != len(FEATURE_NAMES):
+            raise ValueError(f"Expected {len(FEATURE_NAMES)} weights, got {len(self.weights)}")
+        # Only probability models score like a classifier
+        if self.link == 'logistic':
+            self.predict_proba = self._predict_proba
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return ((X - self.mean) / self.scale) @ self.weights + self.bias
+
+    def _predict_proba(self, X: np.ndarray) -> np.ndarray:
+        up = 1.0 / (1.0 + np.exp(-self.predict(X)))
+        return np.column_stack((1.0 - up, up))
+
+
+def load_model(path: str):
+    """
+    Load a trained model
+
+    Args:
+        path: .npz weight file (LinearModel) or a joblib-pickled
+            scikit-learn estimator trained on FEATURE_NAMES columns
+
+    Returns:
+        Object with predict (and predict_proba for classifiers)
+    """
+    if path.endswith('.npz'):
+        return LinearModel(path)
+    import joblib
+    return joblib.load(path)
+
+
+def model_scores(model, X: np.ndarray) -> np.ndarray:
+    """
+    Directional scores in [-1, 1] for feature rows
+
+    Classifiers score P(highest class) - P(lowest class), so up/down and
+    up/flat/down labels both work. Regressors predict a forward log return,
+    which is expressed in ATRs and squashed with tanh.
+
+    Args:
+        model: Loaded model
+        X: (rows, features) matrix
+
+    Returns:
+        One score per row
+    """
+    if hasattr(model, 'predict_proba'):
+        proba = np.asarray(model.predict_proba(X), dtype=np.float64)
+        return proba[:, -1] - proba[:, 0]
+    predicted = np.asarray(model.predict(X), dtype=np.float64).reshape(len(X))
+    atr_pct = X[:, FEATURE_NAMES.index('atr_14_pct')]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.nan_to_num(np.tanh(predicted / atr_pct))
+
+
+def blend_confidence(action: str, confidence: float, score: Optional[float], weight: Optional[float] = None) -> float:
+    """
+    Blend a rule-based signal confidence with a model score
+
+    Args:
+        action: 'BUY', 'SELL' or 'HOLD'
+        confidence: Rule confidence (0-100)
+        score: Model score in [-1, 1], or None to keep the rule confidence
+        weight: Share of the model (defaults to MODEL_CONFIDENCE_WEIGHT)
+
+    Returns:
+        Blended confidence (0-100)
+    """
+    if score is None:
+        return confidence
+    weight = config.MODEL_CONFIDENCE_WEIGHT if weight is None else weight
+    if action == 'BUY':
+        agreement = (1 + score) / 2
+    elif action == 'SELL':
+        agreement = (1 - score) / 2
+    else:
+        agreement = 1 - abs(score)
+    return (1 - weight) * confidence + weight * agreement * 100
+
+
+class ModelScorer:
+    """
+    Scores every traded symbol as one batch shortly after each bar close
+
+    Closed-bar windows of all symbols are kept stacked (ScreenerUniverse)
+    and shifted by one bar per close, so each batch fetches only the last
+    bars. The latest feature row of every symbol goes to the model in a
+    single call on a dedicated thread. A batch that exceeds
+    MODEL_TIME_BUDGET is dropped (its symbols keep no fresh score) and
+    later batches are skipped until the slow call returns, so a slow model
+    never holds up the event loop or queues work behind itself.
+
+    Args:
+        data_client: MT5DataClient
+        timeframe: Timeframe scored (defaults to DEFAULT_TIMEFRAME)
+        budget: Seconds allowed per inference batch
+    """
+
+    def __init__(self, data_client, timeframe: Optional[str] = None, budget: Optional[float] = None):
+        self.data_client = data_client
+        self.timeframe = timeframe or config.DEFAULT_TIMEFRAME
+        self.budget = budget or config.MODEL_TIME_BUDGET
+        self.universe = ScreenerUniverse(self.timeframe, config.FEATURE_LOOKBACK_BARS)
+        self.model = None
+        self.model_path = None
+        self._model_mtime = None
+        self.scores: Dict[str, Dict] = {}
+
+        self.latencies = deque(maxlen=config.MODEL_LATENCY_WINDOW)
+        self.batches = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.last_batch_at = None
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model-scoring')
+        self._pending = None
+        self._task = None
+
+    async def load(self, path: Optional[str] = None):
+        """
+        (Re)load the model off the event loop
+
+        Args:
+            path: Model file (defaults to MODEL_PATH)
+        """
+        path = path or config.MODEL_PATH
+        mtime = os.path.getmtime(path)
+        self.model = await asyncio.get_running_loop().run_in_executor(None, load_model, path)
+        self.model_path, self._model_mtime = path, mtime
+        print(f"🤖 Loaded scoring model {path}")
+
+    async def _history(self, symbols: List[str], count: int) -> Dict[str, np.ndarray]:
+        history = await self.data_client.backfill_history(
+            symbols, [self.timeframe], count, concurrency=config.SCREENER_CONCURRENCY, use_pool=False
+        )
+        return {symbol: rates for (symbol, _), rates in history.items()}
+
+    async def refresh_windows(self):
+        """Add new symbols and shift every window to the latest closed bar"""
+        universe = self.universe
+        wanted = list(dict.fromkeys([*config.SYMBOLS, *self.data_client.subscribed_symbols]))
+        new = [s for s in wanted if s not in universe.index]
+        if new:
+            universe.load(await self._history(new, universe.bars + 1))
+        reload = universe.roll(await self._history([s for s in wanted if s in universe.index], 3))
+        if reload:
+            universe.load(await self._history(reload, universe.bars + 1))
+
+    def features(self) -> np.ndarray:
+        """Latest feature row of every loaded symbol, (symbols, features)"""
+        u = self.universe
+        return compute_features(u.high, u.low, u.close, u.volume)[:, -1].astype(np.float64)
+
+    async def score_batch(self) -> bool:
+        """
+        Score the latest closed bar of every symbol
+
+        Returns:
+            True if the batch finished within the budget
+        """
+        if self._pending is not None and not self._pending.done():
+            self.skipped += 1
+            return False
+
+        X = self.features()
+        rows = np.flatnonzero(np.isfinite(X).all(axis=1))
+        if not len(rows):
+            return False
+
+        started = time.perf_counter()
+        self._pending = asyncio.get_running_loop().run_in_executor(self._executor, model_scores, self.model, X[rows])
+        try:
+            scores = await asyncio.wait_for(asyncio.shield(self._pending), self.budget)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(f"⚠️ Model scoring exceeded {self.budget * 1000:.0f} ms budget; batch dropped")
+            return False
+        finally:
+            self.latencies.append(time.perf_counter() - started)
+
+        self.batches += 1
+        self.last_batch_at = time.time()
+        for i, score in zip(rows.tolist(), scores.tolist()):
+            symbol = self.universe.symbols[i]
+            self.scores[symbol] = {'score': float(np.clip(score, -1.0, 1.0)), 'time': int(self.universe.last_time[i])}
+        return True
+
+    def score(self, symbol: str) -> Optional[float]:
+        """
+        Model score of the symbol's latest closed bar
+
+        Returns:
+            Score in [-1, 1], or None without a model or a current score
+        """
+        entry = self.scores.get(symbol)
+        if entry is None:
+            return None
+        # A score is current until the bar after the next one has closed
+        seconds = self.data_client._get_timeframe_seconds(self.timeframe)
+        if self.data_client.clock() - entry['time'] > 3 * seconds:
+            return None
+        return entry['score']
+
+    def metrics(self) -> Dict:
+        """Inference latency and batch counters"""
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'model': self.model_path,
+            'timeframe': self.timeframe,
+            'symbols': len(self.universe.symbols),
+            'batches': self.batches,
+            'timeouts': self.timeouts,
+            'skipped': self.skipped,
+            'budget_ms': self.budget * 1000,
+            'last_latency_ms': float(latencies[-1]) if len(latencies) else None,
+            'p50_latency_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'p95_latency_ms': float(np.percentile(latencies, 95)) if len(latencies) else None,
+            'max_latency_ms': float(latencies.max()) if len(latencies) else None,
+            'last_batch_at': self.last_batch_at
+        }
+
+    async def _run(self):
+        """Score each bar shortly after it closes, reloading a retrained model"""
+        seconds = self.data_client._get_timeframe_seconds(self.timeframe)
+        while True:
+            try:
+                if self.model is None or os.path.getmtime(self.model_path) != self._model_mtime:
+                    await self.load(self.model_path)
+                await self.refresh_windows()
+                await self.score_batch()
+            except Exception as e:
+                print(f"❌ Error scoring bars: {e}")
+            now = time.time()
+            await asyncio.sleep((now // seconds + 1) * seconds + config.MODEL_CLOSE_DELAY - now)
+
+    def start(self, path: Optional[str] = None):
+        """
+        Start scoring in the background
+
+        Args:
+            path: Model file (defaults to MODEL_PATH)
+        """
+        self.model_path = path or config.MODEL_PATH
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the scoring loop"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Singleton instance
+model_scorer = ModelScorer(mt5_data_client)
@@ -4,50 +4,204 @@ Handles real-time and historical data from MT5
 """
 
 import MetaTrader5 as mt5
-import pandas as pd
 import numpy as np
 from datetime import datetime, timezone
 import asyncio
-from typing import List, Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Dict, Optional
 import pytz
 
-from nautilus_trader.core.datetime import dt_to_unix_nanos
-from nautilus_trader.model.data import Bar, BarType, BarSpecification, BarAggregation
-from nautilus_trader.model.identifiers import InstrumentId, Symbol, Venue
-from nautilus_trader.model.objects import Price, Quantity
-from nautilus_trader.live.data_client import LiveMarketDataClient
-
 from config import config
+from trading_calendar import trading_calendar, AdaptivePollInterval, TRADE_MODE_DISABLED
+
+
+# MT5 BOOK_TYPE_* values of the ask side: SELL, SELL_MARKET
+BOOK_SELL = (1, 3)
+
+# Timeframe string to MT5 constant
+TIMEFRAME_MAP = {
+    'M1': mt5.TIMEFRAME_M1,
+    'M5': mt5.TIMEFRAME_M5,
+    'M15': mt5.TIMEFRAME_M15,
+    'M30': mt5.TIMEFRAME_M30,
+    'H1': mt5.TIMEFRAME_H1,
+    'H4': mt5.TIMEFRAME_H4,
+    'D1': mt5.TIMEFRAME_D1,
+    'W1': mt5.TIMEFRAME_W1,
+    'MN1': mt5.TIMEFRAME_MN1
+}
+
+# Structured layout of copy_rates_* results
+RATES_DTYPE = np.dtype([
+    ('time', np.int64),
+    ('open', np.float64),
+    ('high', np.float64),
+    ('low', np.float64),
+    ('close', np.float64),
+    ('tick_volume', np.uint64),
+    ('spread', np.int32),
+    ('real_volume', np.uint64)
+])
+
+
+def rates_columns(rates: np.ndarray, price_dtype=np.float64) -> Dict[str, np.ndarray]:
+    """
+    Split an MT5 rates array into per-field arrays
+    
+    Price and volume fields are views into the structured array when
+    price_dtype is float64 (no copy); only the timestamp is converted.
+    
+    Args:
+        rates: Structured array from copy_rates_*
+        price_dtype: np.float64 for views, np.float32 for compact copies
+    
+    Returns:
+        Dictionary with 'time' (int64 epoch ns), 'open', 'high', 'low',
+        'close', 'tick_volume' and 'spread'
+    """
+    columns = {'time': rates['time'].astype(np.int64) * 1_000_000_000}
+    for field in ('open', 'high', 'low', 'close'):
+        columns[field] = rates[field] if price_dtype == np.float64 else rates[field].astype(price_dtype)
+    columns['tick_volume'] = rates['tick_volume']
+    columns['spread'] = rates['spread']
+    return columns
+
+
+# Structured layout of an open position snapshot
+POSITION_DTYPE = np.dtype([
+    ('ticket', np.int64),
+    ('symbol', 'U32'),
+    ('type', np.int8),
+    ('volume', np.float64),
+    ('price_open', np.float64),
+    ('price_current', np.float64),
+    ('sl', np.float64),
+    ('tp', np.float64),
+    ('profit', np.float64),
+    ('swap', np.float64),
+    ('commission', np.float64),
+    ('comment', 'U64'),
+    ('time', np.int64)
+])
+
+
+class HistoryBackoff:
+    """
+    Per-symbol retry schedule for symbols whose history request came back empty
+    
+    Background services seed new symbols from history; a symbol the broker
+    doesn't offer would otherwise be requested again on every loop. After
+    each failure the symbol is skipped for a delay that doubles up to
+    HISTORY_RETRY_MAX.
+    
+    Args:
+        initial: Seconds before the first retry (defaults to HISTORY_RETRY_INITIAL)
+        maximum: Longest delay (defaults to HISTORY_RETRY_MAX)
+        clock: Monotonic time source
+    """
+    
+    def __init__(self, initial: Optional[float] = None, maximum: Optional[float] = None, clock=None):
+        self.initial = initial or config.HISTORY_RETRY_INITIAL
+        self.maximum = maximum or config.HISTORY_RETRY_MAX
+        self.clock = clock or time.monotonic
+        self.delays: Dict[str, float] = {}
+        self.retry_at: Dict[str, float] = {}
+    
+    def due(self, symbols) -> List[str]:
+        """Symbols never tried or whose retry delay has passed"""
+        now = self.clock()
+        return [s for s in symbols if self.retry_at.get(s, now) <= now]
+    
+    def failed(self, symbol: str):
+        """Record an empty history response"""
+        delay = min(self.delays[symbol] * 2, self.maximum) if symbol in self.delays else self.initial
+        self.delays[symbol] = delay
+        self.retry_at[symbol] = self.clock() + delay
+    
+    def succeeded(self, symbol: str):
+        """Forget a symbol's failures"""
+        self.delays.pop(symbol, None)
+        self.retry_at.pop(symbol, None)
+
+
+class SerializedBackend:
+    """
+    MT5 API proxy holding one lock around every call
+    
+    The MetaTrader5 package isn't thread-safe. The event loop and the
+    client's MT5 thread both call it, so every call takes the same lock;
+    it is re-entrant because capture wraps one proxied backend in another.
+    
+    Args:
+        backend: MetaTrader5 module (or compatible object)
+        lock: Lock shared by every proxy of one client
+    """
+    
+    def __init__(self, backend, lock):
+        self.backend = backend
+        self._lock = lock
+    
+    def __getattr__(self, name):
+        attr = getattr(self.backend, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        
+        return call
 
 
-class MT5DataClient(LiveMarketDataClient):
+class MT5DataClient:
     """
     MetaTrader 5 Data Client for Nautilus Trader
     """
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, backend=None, clock=None, sleep=None):
+        # MT5 API, wall clock and sleep are injectable for capture and replay
+        self._mt5_lock = threading.RLock()
+        self.mt5 = backend or mt5
+        self.clock = clock or time.time
+        self.sleep = sleep or asyncio.sleep
         self.mt5_initialized = False
         self.subscribed_symbols = set()
+        self.bar_subscriptions = set()  # (symbol, timeframe)
         self.symbol_info_cache = {}
+        # Long downloads run off the event loop on one MT5 thread
+        self._mt5_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mt5')
         
+    @property
+    def mt5(self) -> SerializedBackend:
+        """MT5 API; every call is serialized across threads"""
+        return self._mt5
+    
+    @mt5.setter
+    def mt5(self, backend):
+        # Capture swaps the backend at runtime; the new one shares the lock
+        if isinstance(backend, SerializedBackend):
+            backend = backend.backend
+        self._mt5 = SerializedBackend(backend, self._mt5_lock)
+    
     async def connect(self):
         """Connect to MetaTrader 5"""
         try:
             # Initialize MT5
-            if not mt5.initialize(
+            if not self.mt5.initialize(
                 login=config.MT5_LOGIN,
                 password=config.MT5_PASSWORD,
                 server=config.MT5_SERVER,
                 path=config.MT5_PATH if config.MT5_PATH else None
             ):
-                error = mt5.last_error()
+                error = self.mt5.last_error()
                 raise ConnectionError(f"MT5 initialization failed: {error}")
             
             self.mt5_initialized = True
             
             # Get account info
-            account_info = mt5.account_info()
+            account_info = self.mt5.account_info()
             if account_info:
                 print(f"✅ Connected to MT5")
                 print(f"   Account: {account_info.login}")
@@ -55,8 +209,11 @@ class MT5DataClient(LiveMarketDataClient):
                 print(f"   Balance: {account_info.balance}")
                 print(f"   Leverage: {account_info.leverage}")
             
-            # Cache symbol information
-            await self._cache_symbols()
+            # Cache symbol information (skipped when restored from a snapshot)
+            if self.symbol_info_cache:
+                print(f"📊 Using {len(self.symbol_info_cache)} symbols restored from snapshot")
+            else:
+                await self._cache_symbols()
             
             return True
             
@@ -67,36 +224,90 @@ class MT5DataClient(LiveMarketDataClient):
     async def disconnect(self):
         """Disconnect from MetaTrader 5"""
         if self.mt5_initialized:
-            mt5.shutdown()
             self.mt5_initialized = False
+            # Let downloads queued on the MT5 thread finish first
+            await asyncio.get_running_loop().run_in_executor(self._mt5_executor, self.mt5.shutdown)
             print("✅ Disconnected from MT5")
     
     async def _cache_symbols(self):
-        """Cache symbol information from MT5"""
-        symbols = mt5.symbols_get()
-        if symbols:
-            for symbol in symbols:
-                self.symbol_info_cache[symbol.name] = {
-                    'point': symbol.point,
-                    'digits': symbol.digits,
-                    'contract_size': symbol.trade_contract_size,
-                    'tick_size': symbol.trade_tick_size,
-                    'tick_value': symbol.trade_tick_value,
-                    'min_lot': symbol.volume_min,
-                    'max_lot': symbol.volume_max,
-                    'lot_step': symbol.volume_step,
-                    'spread': symbol.spread
-                }
-            print(f"📊 Cached {len(self.symbol_info_cache)} symbols")
+        """Cache symbol information from MT5 according to SYMBOL_CACHE_MODE"""
+        mode = config.SYMBOL_CACHE_MODE
+        if mode == 'lazy':
+            print("📊 Symbol information will be cached on first use")
+            return
+        
+        if mode == 'all':
+            symbols = self.mt5.symbols_get() or ()
+        else:
+            symbols = [self.mt5.symbol_info(name) for name in config.SYMBOLS]
+        
+        for symbol in symbols:
+            if symbol:
+                self.symbol_info_cache[symbol.name] = self._symbol_spec(symbol)
+        print(f"📊 Cached {len(self.symbol_info_cache)} symbols")
     
-    async def get_historical_bars(
+    @staticmethod
+    def _symbol_spec(symbol) -> Dict:
+        """
+        Build the cached specification for an MT5 symbol
+        
+        Args:
+            symbol: MT5 SymbolInfo
+        
+        Returns:
+            Dictionary with symbol specification
+        """
+        return {
+            'point': symbol.point,
+            'digits': symbol.digits,
+            'contract_size': symbol.trade_contract_size,
+            'tick_size': symbol.trade_tick_size,
+            'tick_value': symbol.trade_tick_value,
+            'min_lot': symbol.volume_min,
+            'max_lot': symbol.volume_max,
+            'lot_step': symbol.volume_step,
+            'spread': symbol.spread,
+            'swap_long': symbol.swap_long,
+            'swap_short': symbol.swap_short,
+            'trade_mode': symbol.trade_mode,
+            'path': symbol.path
+        }
+    
+    def get_symbol_info(self, symbol: str) -> Optional[Dict]:
+        """
+        Get symbol specification, fetching it from MT5 on a cache miss
+        
+        Args:
+            symbol: Trading symbol
+        
+        Returns:
+            Dictionary with symbol specification, or None if unknown
+        """
+        spec = self.symbol_info_cache.get(symbol)
+        if spec is None and self.mt5_initialized:
+            info = self.mt5.symbol_info(symbol)
+            if info:
+                spec = self._symbol_spec(info)
+                self.symbol_info_cache[symbol] = spec
+        return spec
+    
+    def restore_symbol_cache(self, cache: Dict[str, Dict]):
+        """
+        Restore symbol information from a warm-start snapshot
+        
+        Args:
+            cache: Symbol information keyed by symbol name
+        """
+        self.symbol_info_cache.update(cache)
+    
+    async def get_historical_rates(
         self,
         symbol: str,
         timeframe: str = 'M15',
         count: int = 1000
-    ) -> pd.DataFrame:
+    ) -> np.ndarray:
         """
-        Get historical bars from MT5
+        Get historical bars from MT5 as the raw structured array
         
         Args:
             symbol: Trading symbol
@@ -104,31 +315,207 @@ class MT5DataClient(LiveMarketDataClient):
             count: Number of bars to retrieve
         
         Returns:
-            DataFrame with OHLCV data
+            Structured array with time, open, high, low, close,
+            tick_volume, spread and real_volume fields (empty if no data);
+            use rates_columns() for per-field arrays
         """
         if not self.mt5_initialized:
             raise RuntimeError("MT5 not connected")
         
-        # Convert timeframe string to MT5 constant
-        timeframe_map = {
-            'M1': mt5.TIMEFRAME_M1,
-            'M5': mt5.TIMEFRAME_M5,
-            'M15': mt5.TIMEFRAME_M15,
-            'M30': mt5.TIMEFRAME_M30,
-            'H1': mt5.TIMEFRAME_H1,
-            'H4': mt5.TIMEFRAME_H4,
-            'D1': mt5.TIMEFRAME_D1,
-            'W1': mt5.TIMEFRAME_W1,
-            'MN1': mt5.TIMEFRAME_MN1
-        }
-        
-        mt5_timeframe = timeframe_map.get(timeframe, mt5.TIMEFRAME_M15)
+        mt5_timeframe = TIMEFRAME_MAP.get(timeframe, mt5.TIMEFRAME_M15)
         
         # Get bars from MT5
-        rates = mt5.copy_rates_from_pos(symbol, mt5_timeframe, 0, count)
+        rates = self.mt5.copy_rates_from_pos(symbol, mt5_timeframe, 0, count)
         
         if rates is None or len(rates) == 0:
             print(f"⚠️ No data received for {symbol}")
+            return np.zeros(0, dtype=RATES_DTYPE)
+        
+        return rates
+    
+    async def backfill_history(
+        self,
+        symbols: List[str],
+        timeframes: List[str],
+        count: int,
+        concurrency: int = 1,
+        use_pool: bool = True
+    ) -> Dict[tuple, np.ndarray]:
+        """
+        Download bar history for many symbol/timeframe pairs
+        
+        Uses the MT5 terminal pool when MT5_TERMINAL_PATHS is configured,
+        otherwise downloads through this terminal one pair after another:
+        on the event loop, or with `concurrency` > 1 on the client's MT5
+        thread with up to `concurrency` requests queued, so the loop stays
+        free during large downloads. One terminal answers one request at
+        a time, so only the pool downloads in parallel.
+        
+        Args:
+            symbols: Trading symbols
+            timeframes: Timeframe strings
+            count: Bars per symbol/timeframe
+            concurrency: Maximum requests queued on the MT5 thread
+            use_pool: Allow the terminal pool (its start-up cost only pays
+                off for large downloads)
+        
+        Returns:
+            Mapping of (symbol, timeframe) to rates array
+        """
+        if config.MT5_TERMINAL_PATHS and use_pool:
+            from mt5_terminal_pool import MT5TerminalPool
+            
+            pool = MT5TerminalPool(config.MT5_TERMINAL_PATHS)
+            try:
+                return await pool.fetch_rates_async(symbols, timeframes, count)
+            finally:
+                pool.close()
+        
+        history = {}
+        if concurrency <= 1:
+            for symbol in symbols:
+                for timeframe in timeframes:
+                    rates = await self.get_historical_rates(symbol, timeframe, count)
+                    if len(rates):
+                        history[(symbol, timeframe)] = rates
+            return history
+        
+        if not self.mt5_initialized:
+            raise RuntimeError("MT5 not connected")
+        
+        # MT5 calls block while the terminal answers, so they run on the MT5 thread;
+        # one thread keeps them serialized across concurrent backfills
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch(symbol: str, timeframe: str):
+            async with semaphore:
+                rates = await loop.run_in_executor(
+                    self._mt5_executor, self.mt5.copy_rates_from_pos,
+                    symbol, TIMEFRAME_MAP.get(timeframe, mt5.TIMEFRAME_M15), 0, count
+                )
+            if rates is not None and len(rates):
+                history[(symbol, timeframe)] = rates
+        
+        await asyncio.gather(*(fetch(symbol, timeframe) for symbol in symbols for timeframe in timeframes))
+        return history
+    
+    async def iter_rates(
+        self,
+        symbol: str,
+        timeframe: str,
+        count: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        chunk_bars: Optional[int] = None,
+        closed: bool = False
+    ) -> AsyncIterator[np.ndarray]:
+        """
+        Stream bar history oldest first, one chunk at a time
+        
+        With `start` or `end`, the bars opening within [start, end] are
+        fetched window by window with copy_rates_range. `end` defaults to
+        now and `start` to `count` bars' worth of time before `end`.
+        Otherwise the latest `count` bars are fetched by position, oldest
+        chunk first. A bar closing mid-download shifts positions, so each
+        later chunk reaches CHUNK_OVERLAP_BARS further back and bars already
+        yielded are dropped from it. Requests run on the MT5 thread.
+        
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe string
+            count: Latest bars to fetch (span of the range without `start`)
+            start: First bar open time (epoch seconds)
+            end: Last bar open time (epoch seconds)
+            chunk_bars: Bars per request (defaults to EXPORT_CHUNK_ROWS)
+            closed: Leave out the forming bar when fetching the latest bars
+        
+        Yields:
+            MT5 rates arrays in time order
+        """
+        from mt5_terminal_pool import CHUNK_OVERLAP_BARS
+        
+        if not self.mt5_initialized:
+            raise RuntimeError("MT5 not connected")
+        
+        chunk_bars = chunk_bars or config.EXPORT_CHUNK_ROWS
+        mt5_timeframe = TIMEFRAME_MAP.get(timeframe, mt5.TIMEFRAME_M15)
+        by_position = start is None and end is None
+        if by_position:
+            requests = [
+                (
+                    self.mt5.copy_rates_from_pos, max(offset - chunk_bars, 0),
+                    min(offset, chunk_bars) + (CHUNK_OVERLAP_BARS if offset < count else 0)
+                )
+                for offset in range(count, 0, -chunk_bars)
+            ]
+        else:
+            seconds = self._get_timeframe_seconds(timeframe)
+            # Bar times are broker server time, which may run ahead of UTC
+            end = int(self.clock()) + 86400 if end is None else end
+            start = end - count * seconds if start is None else start
+            window = chunk_bars * seconds
+            requests = [
+                (self.mt5.copy_rates_range, t, min(t + window - 1, end))
+                for t in range(start, end + 1, window)
+            ]
+        
+        loop = asyncio.get_running_loop()
+        last = None
+        for i, (call, a, b) in enumerate(requests):
+            rates = await loop.run_in_executor(self._mt5_executor, call, symbol, mt5_timeframe, a, b)
+            if rates is None or not len(rates):
+                continue
+            if closed and by_position and i == len(requests) - 1:
+                rates = rates[:-1]
+            if last is not None:
+                rates = rates[rates['time'] > last]
+            if len(rates):
+                last = rates['time'][-1]
+                yield rates
+    
+    def get_universe(self) -> List[str]:
+        """
+        Every symbol the broker offers with trading enabled
+        
+        Specifications of all returned symbols are added to the cache.
+        
+        Returns:
+            Symbol names
+        """
+        if not self.mt5_initialized:
+            raise RuntimeError("MT5 not connected")
+        
+        names = []
+        for symbol in self.mt5.symbols_get() or ():
+            if symbol.name not in self.symbol_info_cache:
+                self.symbol_info_cache[symbol.name] = self._symbol_spec(symbol)
+            if symbol.trade_mode != TRADE_MODE_DISABLED:
+                names.append(symbol.name)
+        return names
+    
+    async def get_historical_bars(
+        self,
+        symbol: str,
+        timeframe: str = 'M15',
+        count: int = 1000
+    ) -> 'pd.DataFrame':
+        """
+        Get historical bars from MT5
+        
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe (M1, M5, M15, M30, H1, H4, D1)
+            count: Number of bars to retrieve
+        
+        Returns:
+            DataFrame with OHLCV data
+        """
+        import pandas as pd
+        
+        rates = await self.get_historical_rates(symbol, timeframe, count)
+        
+        if len(rates) == 0:
             return pd.DataFrame()
         
         # Convert to DataFrame
@@ -136,13 +523,6 @@ class MT5DataClient(LiveMarketDataClient):
         df['time'] = pd.to_datetime(df['time'], unit='s')
         df.set_index('time', inplace=True)
         
-        # Add technical indicators columns placeholder
-        df['sma_20'] = None
-        df['ema_12'] = None
-        df['ema_26'] = None
-        df['rsi_14'] = None
-        df['atr_14'] = None
-        
         return df
     
     async def get_current_prices(self, symbols: List[str]) -> Dict[str, Dict]:
@@ -161,7 +541,7 @@ class MT5DataClient(LiveMarketDataClient):
         prices = {}
         
         for symbol in symbols:
-            tick = mt5.symbol_info_tick(symbol)
+            tick = self.mt5.symbol_info_tick(symbol)
             if tick:
                 prices[symbol] = {
                     'bid': tick.bid,
@@ -176,6 +556,87 @@ class MT5DataClient(LiveMarketDataClient):
         
         return prices
     
+    def sample_ticks(self, symbols: List[str], out: np.ndarray) -> np.ndarray:
+        """
+        Write the latest tick of each symbol into a preallocated table
+        
+        Args:
+            symbols: Trading symbols, one per row of out
+            out: float64 array with (bid, ask, last, volume, time) columns
+        
+        Returns:
+            Boolean mask of rows that received a tick
+        """
+        if not self.mt5_initialized:
+            raise RuntimeError("MT5 not connected")
+        
+        updated = np.zeros(len(symbols), dtype=bool)
+        for i, symbol in enumerate(symbols):
+            tick = self.mt5.symbol_info_tick(symbol)
+            if tick:
+                out[i] = (tick.bid, tick.ask, tick.last, tick.volume, tick.time_msc / 1000.0)
+                updated[i] = True
+        return updated
+    
+    def subscribe_depth(self, symbol: str) -> bool:
+        """
+        Subscribe to depth of market (market_book_add)
+        
+        Args:
+            symbol: Trading symbol
+        
+        Returns:
+            True if the terminal accepted the subscription
+        """
+        if not self.mt5_initialized:
+            raise RuntimeError("MT5 not connected")
+        
+        return bool(self.mt5.market_book_add(symbol))
+    
+    def unsubscribe_depth(self, symbol: str):
+        """
+        Cancel a depth of market subscription
+        
+        Args:
+            symbol: Trading symbol
+        """
+        if self.mt5_initialized:
+            self.mt5.market_book_release(symbol)
+    
+    def read_depth(self, symbol: str, out: np.ndarray) -> int:
+        """
+        Write the current depth of market into a preallocated array
+        
+        Rows keep the MT5 order (price descending: asks, then bids). A book
+        deeper than out keeps the levels nearest the touch: the last
+        len(out) // 2 asks and the first len(out) // 2 bids.
+        
+        Args:
+            symbol: Trading symbol
+            out: float64 array with (type, price, volume, volume_dbl) columns
+        
+        Returns:
+            Number of rows written, or -1 if no book is available
+        """
+        if not self.mt5_initialized:
+            raise RuntimeError("MT5 not connected")
+        
+        book = self.mt5.market_book_get(symbol)
+        if book is None:
+            return -1
+        if len(book) <= len(out):
+            if len(book):
+                out[:len(book)] = book
+            return len(book)
+        
+        book = np.asarray(book, dtype=np.float64)
+        side = len(out) // 2
+        asks = int(np.count_nonzero(np.isin(book[:, 0], BOOK_SELL)))
+        na, nb = min(asks, side), min(len(book) - asks, side)
+        out[:na] = book[asks - na:asks]
+        out[na:na + nb] = book[asks:asks + nb]
+        return na + nb
+    
     async def subscribe_bars(
         self,
         symbol: str,
@@ -193,7 +654,10 @@ class MT5DataClient(LiveMarketDataClient):
         if not self.mt5_initialized:
             raise RuntimeError("MT5 not connected")
         
+        if (symbol, timeframe) in self.bar_subscriptions:
+            return
         self.subscribed_symbols.add(symbol)
+        self.bar_subscriptions.add((symbol, timeframe))
         
         # Start real-time monitoring
         asyncio.create_task(
@@ -216,17 +680,23 @@ class MT5DataClient(LiveMarketDataClient):
             timeframe: Timeframe for bars
             callback: Callback function for new bars
         """
+        import pandas as pd
+        
         last_bar_time = None
         timeframe_seconds = self._get_timeframe_seconds(timeframe)
         
-        while symbol in self.subscribed_symbols:
+        while (symbol, timeframe) in self.bar_subscriptions:
             try:
+                # Sleep through closed sessions
+                if await self._wait_for_session(symbol):
+                    continue
+                
                 # Get latest bar
-                bars = await self.get_historical_bars(symbol, timeframe, 2)
+                rates = await self.get_historical_rates(symbol, timeframe, 2)
                 
-                if not bars.empty:
-                    current_bar = bars.iloc[-1]
-                    current_time = bars.index[-1]
+                if len(rates):
+                    current_bar = rates[-1]
+                    current_time = int(current_bar['time'])
                     
                     # Check if new bar
                     if last_bar_time is None or current_time > last_bar_time:
@@ -236,24 +706,36 @@ class MT5DataClient(LiveMarketDataClient):
                         bar_data = {
                             'symbol': symbol,
                             'timeframe': timeframe,
-                            'time': current_time,
-                            'open': current_bar['open'],
-                            'high': current_bar['high'],
-                            'low': current_bar['low'],
-                            'close': current_bar['close'],
-                            'volume': current_bar['tick_volume']
+                            'time': pd.Timestamp(current_time, unit='s'),
+                            'open': float(current_bar['open']),
+                            'high': float(current_bar['high']),
+                            'low': float(current_bar['low']),
+                            'close': float(current_bar['close']),
+                            'volume': int(current_bar['tick_volume']),
+                            # The bar that just closed, if the request returned it
+                            'closed': None
                         }
+                        if len(rates) == 2:
+                            closed_bar = rates[0]
+                            bar_data['closed'] = {
+                                'time': pd.Timestamp(int(closed_bar['time']), unit='s'),
+                                'open': float(closed_bar['open']),
+                                'high': float(closed_bar['high']),
+                                'low': float(closed_bar['low']),
+                                'close': float(closed_bar['close']),
+                                'volume': int(closed_bar['tick_volume'])
+                            }
                         
                         # Call callback if provided
                         if callback:
                             await callback(bar_data)
                 
                 # Wait for next check
-                await asyncio.sleep(timeframe_seconds / 2)
+                await self.sleep(timeframe_seconds / 2)
                 
             except Exception as e:
                 print(f"❌ Error monitoring {symbol}: {e}")
-                await asyncio.sleep(5)
+                await self.sleep(5)
     
     async def subscribe_ticks(
         self,
@@ -292,14 +774,20 @@ class MT5DataClient(LiveMarketDataClient):
             callback: Callback function for new ticks
         """
         last_tick_time = None
+        poll_interval = AdaptivePollInterval()
         
         while symbol in self.subscribed_symbols:
             try:
+                # Sleep through closed sessions
+                if await self._wait_for_session(symbol):
+                    continue
+                
                 # Get latest tick
-                tick = mt5.symbol_info_tick(symbol)
+                tick = self.mt5.symbol_info_tick(symbol)
+                got_tick = bool(tick) and (last_tick_time is None or tick.time_msc > last_tick_time)
                 
-                if tick and (last_tick_time is None or tick.time > last_tick_time):
-                    last_tick_time = tick.time
+                if got_tick:
+                    last_tick_time = tick.time_msc
                     
                     # Create tick data
                     tick_data = {
@@ -315,12 +803,30 @@ class MT5DataClient(LiveMarketDataClient):
                     if callback:
                         await callback(tick_data)
                 
-                # Small delay to prevent overwhelming
-                await asyncio.sleep(0.1)
+                # Poll faster while ticks are flowing, slower when quiet
+                await self.sleep(poll_interval.update(got_tick))
                 
             except Exception as e:
                 print(f"❌ Error monitoring ticks for {symbol}: {e}")
-                await asyncio.sleep(1)
+                await self.sleep(1)
+    
+    async def _wait_for_session(self, symbol: str) -> bool:
+        """
+        Sleep until the symbol's market opens
+        
+        Args:
+            symbol: Trading symbol
+        
+        Returns:
+            True if the market was closed and the caller should re-check
+        """
+        wait = trading_calendar.seconds_until_open(symbol, self.get_symbol_info(symbol), self.clock())
+        if wait <= 0:
+            return False
+        
+        # Wake at the session open, re-checking at least every CALENDAR_MAX_SLEEP
+        await self.sleep(min(wait, config.CALENDAR_MAX_SLEEP))
+        return True
     
     async def unsubscribe(self, symbol: str):
         """
@@ -329,10 +835,26 @@ class MT5DataClient(LiveMarketDataClient):
         Args:
             symbol: Trading symbol
         """
+        self.bar_subscriptions -= {(s, tf) for s, tf in self.bar_subscriptions if s == symbol}
         if symbol in self.subscribed_symbols:
             self.subscribed_symbols.remove(symbol)
             print(f"✅ Unsubscribed from {symbol}")
     
+    async def unsubscribe_bars(self, symbol: str, timeframe: str):
+        """
+        Stop one symbol/timeframe bar feed, keeping the symbol's other feeds
+        
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe for bars
+        """
+        if (symbol, timeframe) not in self.bar_subscriptions:
+            return
+        self.bar_subscriptions.discard((symbol, timeframe))
+        if not any(s == symbol for s, _ in self.bar_subscriptions):
+            self.subscribed_symbols.discard(symbol)
+        print(f"✅ Unsubscribed from {symbol} {timeframe} bars")
+    
     def _get_timeframe_seconds(self, timeframe: str) -> int:
         """
         Get timeframe duration in seconds
@@ -366,7 +888,7 @@ class MT5DataClient(LiveMarketDataClient):
         if not self.mt5_initialized:
             raise RuntimeError("MT5 not connected")
         
-        account = mt5.account_info()
+        account = self.mt5.account_info()
         if account:
             return {
                 'login': account.login,
@@ -392,7 +914,7 @@ class MT5DataClient(LiveMarketDataClient):
         if not self.mt5_initialized:
             raise RuntimeError("MT5 not connected")
         
-        positions = mt5.positions_get()
+        positions = self.mt5.positions_get()
         if positions:
             return [
                 {
@@ -413,6 +935,31 @@ class MT5DataClient(LiveMarketDataClient):
                 for pos in positions
             ]
         return []
+    
+    def get_positions_array(self) -> np.ndarray:
+        """
+        Get current open positions as a structured array
+        
+        Returns:
+            Array with POSITION_DTYPE rows (type 0 = BUY, 1 = SELL)
+        """
+        if not self.mt5_initialized:
+            raise RuntimeError("MT5 not connected")
+        
+        positions = self.mt5.positions_get() or ()
+        return np.array(
+            [
+                (
+                    pos.ticket, pos.symbol,
+                    0 if pos.type == mt5.ORDER_TYPE_BUY else 1,
+                    pos.volume, pos.price_open, pos.price_current,
+                    pos.sl, pos.tp, pos.profit, pos.swap, pos.commission,
+                    pos.comment, pos.time
+                )
+                for pos in positions
+            ],
+            dtype=POSITION_DTYPE
+        )
 
 
 # Singleton instance
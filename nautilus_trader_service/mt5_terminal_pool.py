@@ -0,0 +1,397 @@
+"""
+MT5 Terminal Pool
+Parallel history and tick downloads across several MetaTrader 5 terminal processes
+"""
+
+import asyncio
+import importlib
+import multiprocessing as mp
+import time
+from collections import deque
+from multiprocessing.connection import wait
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+from config import config
+
+
+# Extra bars each rates chunk fetches past its older neighbour, so a bar
+# closing between chunk requests cannot leave a gap
+CHUNK_OVERLAP_BARS = 8
+
+
+def _fetch(mt5, kind: str, args: Tuple) -> Optional[np.ndarray]:
+    """
+    Run one download job against an MT5 backend
+
+    Args:
+        mt5: MetaTrader5 module (or a compatible fake)
+        kind: 'rates' or 'ticks'
+        args: (symbol, timeframe, start_pos, count) for rates,
+            (symbol, date_from, date_to) for ticks
+
+    Returns:
+        Structured array returned by MT5, or None
+    """
+    if kind == 'rates':
+        symbol, timeframe, start_pos, count = args
+        return mt5.copy_rates_from_pos(symbol, getattr(mt5, f'TIMEFRAME_{timeframe}'), start_pos, count)
+    if kind == 'ticks':
+        symbol, date_from, date_to = args
+        return mt5.copy_ticks_range(symbol, date_from, date_to, mt5.COPY_TICKS_ALL)
+    raise ValueError(f"Unknown job kind: {kind}")
+
+
+def _dedupe_bars(rates: np.ndarray, count: int) -> np.ndarray:
+    """
+    Merge concatenated rates chunks into one row per bar time
+
+    Positions shift when a bar closes between chunk requests, so chunks
+    can overlap. The row from the newer chunk (later in the array) wins,
+    since it carries the latest state of a bar that was still forming.
+
+    Args:
+        rates: Chunks concatenated oldest first
+        count: Bars to keep, counted back from the latest
+
+    Returns:
+        Rates sorted by time without duplicates
+    """
+    times = rates['time'][::-1]
+    _, first = np.unique(times, return_index=True)
+    return rates[len(rates) - 1 - first][-count:]
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a shared memory block owned by a worker
+
+    The worker unlinks the block after release, so the parent does not
+    track it. Before Python 3.13 spawned workers share the parent's
+    resource tracker, where the worker's unlink clears the registration.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker_main(worker_id: int, terminal_path: str, backend: str, credentials: Dict, inbox, results):
+    """
+    Worker process attached to one MT5 terminal
+
+    Each result array is copied into a new shared memory block; the block is
+    kept open until the parent has copied it out and sends a release message
+    (on Windows a block disappears once its last handle closes). Results go
+    through the worker's own pipe, so a worker dying mid-write cannot block
+    the others.
+    """
+    mt5 = importlib.import_module(backend)
+    if not mt5.initialize(path=terminal_path or None, **credentials):
+        results.send(('init_failed', worker_id, str(mt5.last_error())))
+        return
+    results.send(('ready', worker_id, None))
+
+    blocks = {}
+    while True:
+        message = inbox.get()
+        if message is None:
+            break
+
+        if message[0] == 'release':
+            block = blocks.pop(message[1], None)
+            if block is not None:
+                block.close()
+                block.unlink()
+            continue
+
+        _, job_id, kind, args = message
+        try:
+            array = _fetch(mt5, kind, args)
+            if array is None or len(array) == 0:
+                results.send(('done', worker_id, (job_id, None, None, None, str(mt5.last_error()))))
+                continue
+
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+            blocks[block.name] = block
+            results.send(('done', worker_id, (job_id, block.name, array.dtype.descr, array.shape, None)))
+        except Exception as e:
+            results.send(('done', worker_id, (job_id, None, None, None, repr(e))))
+
+    for block in blocks.values():
+        block.close()
+        block.unlink()
+    mt5.shutdown()
+
+
+class MT5TerminalPool:
+    """
+    Pool of worker processes, each attached to its own MT5 terminal
+
+    The MetaTrader5 binding talks to one terminal per process, so parallel
+    downloads need one process per terminal installation. Jobs are handed to
+    whichever worker is idle and results come back through shared memory.
+    A worker that dies or exceeds POOL_JOB_TIMEOUT on a job is terminated
+    and its job is handed to the remaining workers.
+
+    Args:
+        terminal_paths: terminal64.exe path per worker (MT5_TERMINAL_PATHS)
+        backend: Importable module implementing the MetaTrader5 API; tests
+            can pass a fake backend module here
+        credentials: initialize() keyword arguments (defaults to config)
+    """
+
+    def __init__(
+        self,
+        terminal_paths: Optional[List[str]] = None,
+        backend: str = 'MetaTrader5',
+        credentials: Optional[Dict] = None
+    ):
+        self.terminal_paths = terminal_paths or config.MT5_TERMINAL_PATHS or [config.MT5_PATH]
+        self.backend = backend
+        self.credentials = credentials if credentials is not None else {
+            'login': config.MT5_LOGIN,
+            'password': config.MT5_PASSWORD,
+            'server': config.MT5_SERVER
+        }
+        self._context = mp.get_context('spawn')
+        self._workers = []
+        self._inboxes = []
+        self._results = []
+        self._lost = set()
+
+    def start(self, timeout: float = 60.0):
+        """
+        Start workers and wait until every terminal is initialized
+
+        Args:
+            timeout: Seconds to wait for all terminals
+        """
+        if self._workers:
+            return
+
+        for worker_id, path in enumerate(self.terminal_paths):
+            inbox = self._context.Queue()
+            reader, writer = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=_worker_main,
+                args=(worker_id, path, self.backend, self.credentials, inbox, writer),
+                daemon=True
+            )
+            process.start()
+            # Only the worker holds the write end, so its exit shows up as EOF
+            writer.close()
+            self._workers.append(process)
+            self._inboxes.append(inbox)
+            self._results.append(reader)
+
+        deadline = time.monotonic() + timeout
+        for worker_id, reader in enumerate(self._results):
+            try:
+                if not reader.poll(max(deadline - time.monotonic(), 0)):
+                    raise TimeoutError
+                status, _, error = reader.recv()
+            except (EOFError, OSError, TimeoutError):
+                self.close()
+                raise ConnectionError(f"MT5 terminal {worker_id} did not start within {timeout:.0f}s")
+            if status == 'init_failed':
+                self.close()
+                raise ConnectionError(f"MT5 terminal {worker_id} initialization failed: {error}")
+
+        print(f"✅ MT5 terminal pool started with {len(self._workers)} terminals")
+
+    def close(self):
+        """Stop all workers"""
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._workers:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        for reader in self._results:
+            reader.close()
+        self._workers, self._inboxes, self._results = [], [], []
+        self._lost = set()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _collect(self, message: Tuple, busy: Dict, idle: deque, results: Dict):
+        """Copy a finished job's array out of shared memory"""
+        _, worker_id, (job_id, name, descr, shape, error) = message
+        del busy[worker_id]
+        idle.append(worker_id)
+
+        if name is None:
+            print(f"⚠️ Pool job {job_id} returned no data: {error}")
+            results[job_id] = None
+            return
+
+        block = _attach(name)
+        try:
+            results[job_id] = np.ndarray(shape, dtype=np.dtype(descr), buffer=block.buf).copy()
+        finally:
+            block.close()
+            self._inboxes[worker_id].put(('release', name))
+
+    def _lose(self, worker_id: int, reason: str, busy: Dict, pending: deque):
+        """Terminate a dead or hung worker and put its job back in front"""
+        self._lost.add(worker_id)
+        if self._workers[worker_id].is_alive():
+            self._workers[worker_id].terminate()
+        job_id, job, _ = busy.pop(worker_id)
+        pending.appendleft((job_id, job))
+        print(f"⚠️ MT5 terminal {worker_id} {reason}; reassigning its job")
+
+    def run(
+        self,
+        jobs: Dict[Hashable, Tuple[str, Tuple]],
+        timeout: Optional[float] = None
+    ) -> Dict[Hashable, Optional[np.ndarray]]:
+        """
+        Run download jobs across all terminals
+
+        Args:
+            jobs: Mapping of job key to (kind, args) as accepted by _fetch
+            timeout: Seconds a single job may take before its worker is
+                considered hung (defaults to POOL_JOB_TIMEOUT)
+
+        Returns:
+            Mapping of job key to the downloaded array (None on failure)
+
+        Raises:
+            ConnectionError: Every terminal died or hung
+        """
+        timeout = timeout or config.POOL_JOB_TIMEOUT
+        self.start()
+        pending = deque(jobs.items())
+        idle = deque(i for i in range(len(self._workers)) if i not in self._lost)
+        busy = {}  # worker_id -> (job_id, (kind, args), started)
+        results = {}
+
+        while pending or busy:
+            while pending and idle:
+                job_id, job = pending.popleft()
+                worker_id = idle.popleft()
+                self._inboxes[worker_id].put(('job', job_id, *job))
+                busy[worker_id] = (job_id, job, time.monotonic())
+            if not busy:
+                raise ConnectionError("Every MT5 terminal in the pool died or hung")
+
+            readers = {self._results[worker_id]: worker_id for worker_id in busy}
+            for reader in wait(list(readers), timeout=min(1.0, timeout)):
+                worker_id = readers[reader]
+                try:
+                    message = reader.recv()
+                except (EOFError, OSError):
+                    self._lose(worker_id, "died", busy, pending)
+                    continue
+                self._collect(message, busy, idle, results)
+
+            now = time.monotonic()
+            for worker_id, (_, _, started) in list(busy.items()):
+                if now - started > timeout:
+                    self._lose(worker_id, f"hung for {timeout:.0f}s", busy, pending)
+
+        return results
+
+    def fetch_rates(
+        self,
+        symbols: List[str],
+        timeframes: List[str],
+        count: int,
+        chunk_bars: Optional[int] = None
+    ) -> Dict[Tuple[str, str], np.ndarray]:
+        """
+        Download bar history for every symbol/timeframe pair
+
+        Args:
+            symbols: Trading symbols
+            timeframes: Timeframe strings (M1, M5, ...)
+            count: Bars per symbol/timeframe, counted back from the latest bar
+            chunk_bars: Split each download into chunks of this many bars
+
+        Returns:
+            Mapping of (symbol, timeframe) to rates array, oldest bar first,
+            one row per bar time
+        """
+        chunk_bars = chunk_bars or config.POOL_CHUNK_BARS
+        jobs = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                for start_pos in range(0, count, chunk_bars):
+                    size = min(chunk_bars, count - start_pos) + CHUNK_OVERLAP_BARS
+                    jobs[(symbol, timeframe, start_pos)] = ('rates', (symbol, timeframe, start_pos, size))
+
+        chunks = self.run(jobs)
+        history = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                # Larger start positions are older bars
+                parts = [
+                    chunks[(symbol, timeframe, start_pos)]
+                    for start_pos in reversed(range(0, count, chunk_bars))
+                    if chunks[(symbol, timeframe, start_pos)] is not None
+                ]
+                if parts:
+                    history[(symbol, timeframe)] = _dedupe_bars(np.concatenate(parts), count)
+        return history
+
+    def fetch_ticks(
+        self,
+        symbols: List[str],
+        date_from: datetime,
+        date_to: datetime,
+        chunk: timedelta = timedelta(days=1)
+    ) -> Dict[str, np.ndarray]:
+        """
+        Download ticks for every symbol, split into time chunks
+
+        Args:
+            symbols: Trading symbols
+            date_from: Range start (UTC)
+            date_to: Range end (UTC)
+            chunk: Length of each download job
+
+        Returns:
+            Mapping of symbol to ticks array in time order
+        """
+        bounds = []
+        start = date_from
+        while start < date_to:
+            end = start + chunk
+            # copy_ticks_range includes date_to, so stop inner chunks 1ms early
+            bounds.append((start, date_to if end >= date_to else end - timedelta(milliseconds=1)))
+            start = end
+
+        jobs = {
+            (symbol, i): ('ticks', (symbol, lo, hi))
+            for symbol in symbols
+            for i, (lo, hi) in enumerate(bounds)
+        }
+        chunks = self.run(jobs)
+
+        ticks = {}
+        for symbol in symbols:
+            parts = [chunks[(symbol, i)] for i in range(len(bounds)) if chunks[(symbol, i)] is not None]
+            if parts:
+                ticks[symbol] = np.concatenate(parts)
+        return ticks
+
+    async def fetch_rates_async(self, *args, **kwargs) -> Dict[Tuple[str, str], np.ndarray]:
+        """Run fetch_rates without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.fetch_rates(*args, **kwargs))
+
+    async def fetch_ticks_async(self, *args, **kwargs) -> Dict[str, np.ndarray]:
+        """Run fetch_ticks without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.fetch_ticks(*args, **kwargs))
@@ -0,0 +1,354 @@
+"""
+Portfolio Backtest
+Multi-symbol backtest on one aligned timeline with shared capital and risk limits
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import config
+from backtest_costs import ExecutionCostModel
+from indicator_cache import indicator_graph, series_label
+
+
+SECONDS_PER_DAY = 86400
+
+
+def _ffill(matrix: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column"""
+    valid = ~np.isnan(matrix)
+    index = np.where(valid, np.arange(len(matrix))[:, None], 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = matrix[index, np.arange(matrix.shape[1])]
+    filled[~np.maximum.accumulate(valid, axis=0)] = np.nan
+    return filled
+
+
+def align_bars(bars: Dict[str, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """
+    Align per-symbol bars on the union of their bar times
+
+    Args:
+        bars: Mapping of symbol to columns 'time' (epoch seconds), 'high',
+            'low', 'close' and optionally 'spread'
+
+    Returns:
+        Dictionary with 'time' (T,), 'has_bar' (T x N bool) and T x N
+        matrices for each column; prices are forward-filled over bars a
+        symbol did not trade, spread is not
+    """
+    symbols = list(bars)
+    times = np.unique(np.concatenate([np.asarray(bars[s]['time'], dtype=np.int64) for s in symbols]))
+
+    aligned = {'time': times, 'has_bar': np.zeros((len(times), len(symbols)), dtype=bool)}
+    for field in ('high', 'low', 'close', 'spread'):
+        aligned[field] = np.full((len(times), len(symbols)), np.nan)
+
+    for j, symbol in enumerate(symbols):
+        rows = np.searchsorted(times, np.asarray(bars[symbol]['time'], dtype=np.int64))
+        aligned['has_bar'][rows, j] = True
+        for field in ('high', 'low', 'close', 'spread'):
+            if field in bars[symbol]:
+                aligned[field][rows, j] = bars[symbol][field]
+
+    for field in ('high', 'low', 'close'):
+        aligned[field] = _ffill(aligned[field])
+    return aligned
+
+
+def sma_cross_signals(
+    bars: Dict[str, Dict[str, np.ndarray]],
+    period: int = 20,
+    timeframe: Optional[str] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Close above/below SMA signals, as in the single-symbol /backtest
+
+    Args:
+        bars: Mapping of symbol to bar columns
+        period: SMA period
+        timeframe: Timeframe of the bars (defaults to DEFAULT_TIMEFRAME)
+
+    Returns:
+        Mapping of symbol to desired direction per bar (-1, 0, 1)
+    """
+    signals = {}
+    for symbol, columns in bars.items():
+        values = indicator_graph.compute(
+            columns['high'], columns['low'], columns['close'], {'sma': [period]},
+            label=series_label(symbol, timeframe or config.DEFAULT_TIMEFRAME)
+        )
+        sma = values[f'sma_{period}']
+        signals[symbol] = np.where(np.isnan(sma), 0, np.sign(np.asarray(columns['close']) - sma)).astype(np.int8)
+    return signals
+
+
+class PortfolioBacktester:
+    """
+    Event-driven portfolio simulation over vectorized inputs
+
+    Signals, ATR, alignment and mark-to-market equity are computed with
+    array operations. The Python loop only visits event bars: bars where
+    any symbol's desired direction changes and the first bar of each day.
+    Between events the open lots are constant, so the equity of a whole
+    segment is one matrix-vector product.
+
+    Rules at each event:
+    - Positions whose direction no longer matches the signal are closed
+    - New entries are sized so a stop of stop_atr x ATR risks
+      risk_per_trade of equity, rounded down to the symbol lot step
+    - Entries are rejected above max_open_positions, when the margin
+      (notional / leverage) exceeds free margin, or after the daily loss
+      limit was hit; hitting the limit closes everything until the next day
+
+    Stops are only used for sizing; exits follow the signals.
+    """
+
+    def __init__(
+        self,
+        capital: float,
+        max_open_positions: Optional[int] = None,
+        risk_per_trade: Optional[float] = None,
+        max_daily_loss: Optional[float] = None,
+        leverage: Optional[float] = None,
+        max_position_size: Optional[float] = None,
+        stop_atr: float = 2.0,
+        atr_period: int = 14
+    ):
+        self.capital = capital
+        self.max_open_positions = max_open_positions or config.MAX_OPEN_POSITIONS
+        self.risk_per_trade = risk_per_trade or config.MAX_RISK_PER_TRADE
+        self.max_daily_loss = max_daily_loss or config.MAX_DAILY_LOSS
+        self.leverage = leverage or config.DEFAULT_LEVERAGE
+        self.max_position_size = max_position_size or config.MAX_POSITION_SIZE
+        self.stop_atr = stop_atr
+        self.atr_period = atr_period
+
+    @staticmethod
+    def _value_per_price(spec: Dict) -> float:
+        """Account currency per 1.0 price move per lot"""
+        if spec.get('tick_size') and spec.get('tick_value'):
+            return spec['tick_value'] / spec['tick_size']
+        return spec.get('contract_size', 1.0)
+
+    def run(
+        self,
+        bars: Dict[str, Dict[str, np.ndarray]],
+        specs: Dict[str, Dict],
+        signals: Optional[Dict[str, np.ndarray]] = None,
+        cost_models: Optional[Dict[str, ExecutionCostModel]] = None,
+        timeframe: Optional[str] = None
+    ) -> Dict:
+        """
+        Run the portfolio backtest
+
+        Args:
+            bars: Mapping of symbol to columns 'time' (epoch seconds),
+                'high', 'low', 'close' and optionally 'spread'
+            specs: Cached MT5 symbol specifications per symbol
+            signals: Desired direction per symbol bar (defaults to SMA cross)
+            cost_models: Execution cost model per symbol (no costs if omitted)
+            timeframe: Timeframe of the bars (defaults to DEFAULT_TIMEFRAME)
+
+        Returns:
+            Dictionary with portfolio metrics, daily equity curve, trades
+            per symbol and rejected entry counts
+        """
+        symbols: List[str] = list(bars)
+        timeframe = timeframe or config.DEFAULT_TIMEFRAME
+        signals = signals if signals is not None else sma_cross_signals(bars, timeframe=timeframe)
+        cost_models = cost_models or {}
+
+        aligned = align_bars(bars)
+        times = aligned['time']
+        close = aligned['close']
+        n_bars, n_symbols = close.shape
+
+        # Desired direction and ATR on the aligned timeline (held over gaps)
+        desired = np.full((n_bars, n_symbols), np.nan)
+        atr = np.full((n_bars, n_symbols), np.nan)
+        for j, symbol in enumerate(symbols):
+            columns = bars[symbol]
+            rows = np.searchsorted(times, np.asarray(columns['time'], dtype=np.int64))
+            desired[rows, j] = signals[symbol]
+            atr[rows, j] = indicator_graph.compute(
+                columns['high'], columns['low'], columns['close'],
+                {'atr': [self.atr_period]}, label=series_label(symbol, timeframe)
+            )[f'atr_{self.atr_period}']
+        desired = np.nan_to_num(_ffill(desired)).astype(np.int8)
+        atr = _ffill(atr)
+        prices = np.nan_to_num(close)
+
+        value_per_price = np.array([self._value_per_price(specs.get(s, {})) for s in symbols])
+        point = np.array([specs.get(s, {}).get('point', 0.0) for s in symbols])
+        default_spread = np.array([
+            cost_models[s].spread_points if s in cost_models else 0.0 for s in symbols
+        ])
+        spread = np.where(np.isnan(aligned['spread']), default_spread, aligned['spread'])
+
+        # Event bars: signal changes and day starts
+        day = times // SECONDS_PER_DAY
+        changed = np.zeros((n_bars, n_symbols), dtype=bool)
+        changed[1:] = desired[1:] != desired[:-1]
+        changed[0] = desired[0] != 0
+        new_day = np.ones(n_bars, dtype=bool)
+        new_day[1:] = day[1:] != day[:-1]
+        events = np.flatnonzero(changed.any(axis=1) | new_day)
+
+        balance = float(self.capital)
+        lots = np.zeros(n_symbols)
+        direction = np.zeros(n_symbols)
+        entry = np.zeros(n_symbols)
+        equity = np.empty(n_bars)
+        day_start_equity = balance
+        halted = False
+
+        trades = {s: {'trades': 0, 'wins': 0, 'pnl': 0.0, 'costs': 0.0} for s in symbols}
+        rejected = {'max_open_positions': 0, 'margin': 0, 'daily_loss': 0, 'size': 0}
+        halted_days = 0
+
+        def trade_cost(j: int, volume: float, t: int) -> float:
+            model = cost_models.get(symbols[j])
+            if model is None or volume == 0:
+                return 0.0
+            price_cost = 0.5 * spread[t, j] * point[j]
+            if model.slippage_model == 'fixed':
+                price_cost += model.slippage_points * point[j]
+            elif model.slippage_model == 'range':
+                price_cost += model.slippage_range_fraction * (aligned['high'][t, j] - aligned['low'][t, j])
+            return volume * (price_cost * value_per_price[j] + model.commission_per_lot)
+
+        def close_position(j: int, t: int):
+            nonlocal balance
+            pnl = lots[j] * value_per_price[j] * direction[j] * (prices[t, j] - entry[j])
+            cost = trade_cost(j, lots[j], t)
+            balance += pnl - cost
+            stats = trades[symbols[j]]
+            stats['trades'] += 1
+            stats['wins'] += int(pnl - cost > 0)
+            stats['pnl'] += pnl - cost
+            stats['costs'] += cost
+            lots[j] = direction[j] = entry[j] = 0.0
+
+        def mark_to_market(t: int) -> float:
+            return balance + float((prices[t] - entry) @ (lots * value_per_price * direction))
+
+        for k, t in enumerate(events):
+            end = events[k + 1] if k + 1 < len(events) else n_bars
+
+            if new_day[t]:
+                if t > 0:
+                    # Overnight swap on carried positions
+                    for j in np.flatnonzero(lots):
+                        model = cost_models.get(symbols[j])
+                        if model is not None:
+                            nights = model.swap_nights(times[[t - 1, t]])[1]
+                            rate = model.swap_long if direction[j] > 0 else model.swap_short
+                            swap = lots[j] * rate * point[j] * value_per_price[j] * nights
+                            balance += swap
+                            trades[symbols[j]]['costs'] -= swap
+                day_start_equity = mark_to_market(t)
+                halted = False
+
+            # Exits: direction no longer matches the signal
+            for j in np.flatnonzero((lots > 0) & (direction != desired[t])):
+                close_position(j, t)
+
+            # Entries on fresh signals
+            for j in np.flatnonzero(changed[t] & (desired[t] != 0) & (lots == 0)):
+                if halted:
+                    rejected['daily_loss'] += 1
+                    continue
+                if np.count_nonzero(lots) >= self.max_open_positions:
+                    rejected['max_open_positions'] += 1
+                    continue
+
+                spec = specs.get(symbols[j], {})
+                equity_now = mark_to_market(t)
+                stop_distance = self.stop_atr * atr[t, j]
+                if not stop_distance > 0:
+                    rejected['size'] += 1
+                    continue
+                step = spec.get('lot_step') or 0.01
+                volume = np.floor(equity_now * self.risk_per_trade / (stop_distance * value_per_price[j]) / step) * step
+                volume = min(volume, self.max_position_size, spec.get('max_lot') or np.inf)
+                if volume < (spec.get('min_lot') or step):
+                    rejected['size'] += 1
+                    continue
+
+                used_margin = float(lots @ (value_per_price * prices[t])) / self.leverage
+                margin = volume * value_per_price[j] * prices[t, j] / self.leverage
+                if margin > equity_now - used_margin:
+                    rejected['margin'] += 1
+                    continue
+
+                lots[j] = volume
+                direction[j] = desired[t, j]
+                entry[j] = prices[t, j]
+                cost = trade_cost(j, volume, t)
+                balance -= cost
+                trades[symbols[j]]['costs'] += cost
+
+            # Mark the segment to market until the next event
+            segment = balance + (prices[t:end] - entry) @ (lots * value_per_price * direction)
+            if not halted:
+                breach = np.flatnonzero(segment < day_start_equity * (1 - self.max_daily_loss))
+                if len(breach):
+                    stop = t + breach[0]
+                    for j in np.flatnonzero(lots):
+                        close_position(j, stop)
+                    segment[breach[0]:] = balance
+                    halted = True
+                    halted_days += 1
+            equity[t:end] = segment
+
+        # Close whatever is still open at the last bar
+        for j in np.flatnonzero(lots):
+            close_position(j, n_bars - 1)
+        equity[-1] = balance
+
+        return self._summarize(times, equity, trades, rejected, halted_days)
+
+    def _summarize(self, times, equity, trades, rejected, halted_days) -> Dict:
+        """Portfolio metrics from the equity curve"""
+        running_max = np.maximum.accumulate(equity)
+        drawdown = (equity - running_max) / running_max
+
+        # Daily equity (last bar of each day)
+        day = times // SECONDS_PER_DAY
+        last_of_day = np.flatnonzero(np.append(day[1:] != day[:-1], True))
+        daily_equity = equity[last_of_day]
+        daily_returns = np.diff(daily_equity, prepend=self.capital) / np.append(self.capital, daily_equity[:-1])
+        std = daily_returns.std()
+        downside = daily_returns[daily_returns < 0].std() if (daily_returns < 0).sum() > 1 else 0.0
+
+        total_trades = sum(s['trades'] for s in trades.values())
+        wins = sum(s['wins'] for s in trades.values())
+
+        return {
+            "capital": self.capital,
+            "final_equity": float(equity[-1]),
+            "total_return": float((equity[-1] / self.capital - 1) * 100),
+            "max_drawdown": float(drawdown.min() * 100),
+            "sharpe_ratio": float(daily_returns.mean() / std * np.sqrt(252)) if std > 0 else 0.0,
+            "sortino_ratio": float(daily_returns.mean() / downside * np.sqrt(252)) if downside > 0 else 0.0,
+            "total_trades": total_trades,
+            "win_rate": float(wins / total_trades * 100) if total_trades else 0.0,
+            "halted_days": halted_days,
+            "rejected_entries": rejected,
+            "symbols": {
+                symbol: {**stats, 'pnl': float(stats['pnl']), 'costs': float(stats['costs'])}
+                for symbol, stats in trades.items()
+            },
+            "limits": {
+                "max_open_positions": self.max_open_positions,
+                "risk_per_trade": self.risk_per_trade,
+                "max_daily_loss": self.max_daily_loss,
+                "leverage": self.leverage
+            },
+            "equity_curve": [
+                {"time": int(times[i]), "equity": float(equity[i]), "drawdown": float(drawdown[i] * 100)}
+                for i in last_of_day
+            ]
+        }
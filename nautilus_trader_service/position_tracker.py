@@ -0,0 +1,229 @@
+"""
+Position and Account Tracker
+Keeps the last MT5 position/account snapshot and publishes only the changes
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pytz
+
+from config import config
+from mt5_data_client import mt5_data_client, POSITION_DTYPE
+
+
+ACCOUNT_FIELDS = ('balance', 'equity', 'margin', 'free_margin', 'margin_level', 'profit')
+
+
+class PositionTracker:
+    """
+    Position/account state tracker
+
+    Positions are held as a structured array sorted by ticket. Each refresh
+    diffs the new snapshot against the previous one with array operations
+    and notifies subscribers only when something changed. P&L moves are
+    measured from the profit last published for each ticket, so a
+    position drifting slowly is still reported once it has moved by the
+    threshold.
+    """
+
+    def __init__(self, data_client, pnl_threshold: Optional[float] = None):
+        self.data_client = data_client
+        self.pnl_threshold = config.PNL_CHANGE_THRESHOLD if pnl_threshold is None else pnl_threshold
+        self.positions = np.zeros(0, dtype=POSITION_DTYPE)
+        self.published_profit: Dict[int, float] = {}
+        self.account: Dict = {}
+        self.version = 0
+        self.updated_at = None
+        self._position_dicts = []
+        self._subscribers: List[Callable] = []
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def subscribe(self, callback: Callable):
+        """
+        Register an async callback receiving each non-empty diff
+
+        Args:
+            callback: Coroutine function taking the diff dictionary
+        """
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable):
+        """Remove a diff callback"""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    @staticmethod
+    def compute_diff(
+        old: np.ndarray,
+        new: np.ndarray,
+        pnl_threshold: float,
+        published: Optional[np.ndarray] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Diff two position snapshots sorted by ticket
+
+        Args:
+            old: Previous positions
+            new: Current positions
+            pnl_threshold: Minimum profit change reported as P&L moved
+            published: Profit last published for each row of old
+                (defaults to old['profit'])
+
+        Returns:
+            Dictionary of 'opened', 'closed', 'modified' and 'pnl_moved'
+            position arrays (rows from the new snapshot where applicable)
+        """
+        in_old = np.isin(new['ticket'], old['ticket'], assume_unique=True)
+        in_new = np.isin(old['ticket'], new['ticket'], assume_unique=True)
+
+        # Both snapshots are sorted by ticket, so common rows line up
+        current = new[in_old]
+        previous = old[in_new]
+
+        modified = (
+            (current['volume'] != previous['volume']) |
+            (current['sl'] != previous['sl']) |
+            (current['tp'] != previous['tp'])
+        )
+        baseline = previous['profit'] if published is None else published[in_new]
+        pnl_moved = np.abs(current['profit'] - baseline) >= pnl_threshold
+
+        return {
+            'opened': new[~in_old],
+            'closed': old[~in_new],
+            'modified': current[modified],
+            'pnl_moved': current[pnl_moved & ~modified]
+        }
+
+    async def refresh(self) -> Dict:
+        """
+        Poll MT5 once and publish changes
+
+        Returns:
+            Diff dictionary with position changes and changed account fields
+        """
+        async with self._lock:
+            account = await self.data_client.get_account_info()
+            positions = np.sort(self.data_client.get_positions_array(), order='ticket')
+
+            published = np.array([
+                self.published_profit.get(ticket, profit)
+                for ticket, profit in zip(self.positions['ticket'].tolist(), self.positions['profit'].tolist())
+            ], dtype=np.float64)
+            diff = self.compute_diff(self.positions, positions, self.pnl_threshold, published)
+            diff['account'] = {
+                key: account.get(key) for key in ACCOUNT_FIELDS
+                if account.get(key) != self.account.get(key)
+            }
+
+            changed = bool(diff['account']) or any(len(diff[k]) for k in ('opened', 'closed', 'modified', 'pnl_moved'))
+            self.account = account
+            self.positions = positions
+            # Positions not reported keep the profit subscribers last saw
+            reported = {
+                int(ticket): float(profit)
+                for key in ('opened', 'modified', 'pnl_moved')
+                for ticket, profit in zip(diff[key]['ticket'], diff[key]['profit'])
+            }
+            self.published_profit = {
+                ticket: reported.get(ticket, self.published_profit.get(ticket, profit))
+                for ticket, profit in zip(positions['ticket'].tolist(), positions['profit'].tolist())
+            }
+            self.updated_at = time.time()
+            self._position_dicts = None
+            if changed:
+                self.version += 1
+
+        if changed:
+            for callback in list(self._subscribers):
+                try:
+                    await callback(diff)
+                except Exception as e:
+                    print(f"❌ Position subscriber error: {e}")
+        return diff
+
+    async def _run(self, interval: float):
+        """Polling loop"""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"❌ Error tracking positions: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: Optional[float] = None):
+        """
+        Start background polling
+
+        Args:
+            interval: Seconds between polls (defaults to POSITION_POLL_INTERVAL)
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(interval or config.POSITION_POLL_INTERVAL))
+
+    async def stop(self):
+        """Stop background polling"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def ensure_fresh(self, max_age: Optional[float] = None):
+        """
+        Refresh only if the cached state is older than max_age seconds
+
+        Args:
+            max_age: Maximum acceptable age (defaults to POSITION_POLL_INTERVAL)
+        """
+        max_age = config.POSITION_POLL_INTERVAL if max_age is None else max_age
+        if self.updated_at is None or time.time() - self.updated_at > max_age:
+            await self.refresh()
+
+    @staticmethod
+    def to_dicts(positions: np.ndarray) -> List[Dict]:
+        """
+        Convert position rows to the dictionaries returned by get_positions
+
+        Args:
+            positions: Structured position array
+
+        Returns:
+            List of position dictionaries
+        """
+        return [
+            {
+                'ticket': int(pos['ticket']),
+                'symbol': str(pos['symbol']),
+                'type': 'BUY' if pos['type'] == 0 else 'SELL',
+                'volume': float(pos['volume']),
+                'price_open': float(pos['price_open']),
+                'price_current': float(pos['price_current']),
+                'sl': float(pos['sl']),
+                'tp': float(pos['tp']),
+                'profit': float(pos['profit']),
+                'swap': float(pos['swap']),
+                'commission': float(pos['commission']),
+                'comment': str(pos['comment']),
+                'time': datetime.fromtimestamp(int(pos['time']), tz=pytz.UTC)
+            }
+            for pos in positions
+        ]
+
+    def get_positions(self) -> List[Dict]:
+        """
+        Get cached positions as dictionaries (rebuilt only when state changes)
+
+        Returns:
+            List of position dictionaries
+        """
+        if self._position_dicts is None:
+            self._position_dicts = self.to_dicts(self.positions)
+        return self._position_dicts
+
+
+# Singleton instance
+position_tracker = PositionTracker(mt5_data_client)
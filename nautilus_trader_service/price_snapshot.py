@@ -0,0 +1,208 @@
+"""
+Price Snapshot Service
+Background sampler keeping the latest quotes for all subscribed symbols in memory
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pytz
+
+from config import config
+from mt5_data_client import mt5_data_client
+
+
+class PriceSnapshotService:
+    """
+    In-memory price table refreshed by a single background sampler
+
+    Quotes live in one contiguous float64 table with a row per symbol and
+    the columns in FIELDS. Only configured and subscribed symbols are
+    sampled; readers look up their rows and compute how old each sample
+    is, and any other symbol is quoted on demand without joining the
+    sampled set.
+    """
+
+    FIELDS = ('bid', 'ask', 'last', 'volume', 'time')
+
+    # Trade server UTC offsets are whole or half hours within +-14 h; a
+    # quote this close to such an offset is fresh enough to measure it
+    OFFSET_STEP = 1800
+    OFFSET_TOLERANCE = 120
+    MAX_OFFSET = 14 * 3600
+
+    def __init__(self, data_client, interval: Optional[float] = None):
+        self.data_client = data_client
+        self.interval = interval or config.PRICE_SAMPLE_INTERVAL
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.table = np.full((0, len(self.FIELDS)), np.nan)
+        self.sampled_at = np.zeros(0)
+        self.server_offset: Optional[float] = None
+        self._rows: List[Optional[Dict]] = []
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def add_symbols(self, symbols: Iterable[str]) -> bool:
+        """
+        Add symbols to the sampled set
+
+        Args:
+            symbols: Trading symbols
+
+        Returns:
+            True if any symbol was new
+        """
+        new = [s for s in symbols if s not in self.index]
+        if not new:
+            return False
+
+        for symbol in new:
+            self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self._rows.append(None)
+
+        table = np.full((len(self.symbols), len(self.FIELDS)), np.nan)
+        table[:len(self.table)] = self.table
+        sampled_at = np.zeros(len(self.symbols))
+        sampled_at[:len(self.sampled_at)] = self.sampled_at
+        self.table, self.sampled_at = table, sampled_at
+        return True
+
+    async def refresh(self):
+        """Sample quotes for every symbol in the table"""
+        async with self._lock:
+            if not self.symbols:
+                return
+            updated = self.data_client.sample_ticks(self.symbols, self.table)
+            self.sampled_at[updated] = time.time()
+            self._observe_server_time(self.table[updated, 4])
+
+            # Serialize rows once per sample instead of once per request
+            for i in np.flatnonzero(updated):
+                self._rows[i] = self._row(self.table[i])
+
+    def _observe_server_time(self, tick_times: np.ndarray):
+        """
+        Track the trade server's offset from local time
+
+        MT5 tick times are trade server time, often UTC+2/+3. The newest
+        quote of a sample is a few seconds old while markets are open, so
+        rounding its distance from local time gives the offset; samples
+        without a fresh quote (weekends, quiet feeds) are ignored.
+
+        Args:
+            tick_times: Tick times of the sampled quotes
+        """
+        if not len(tick_times) or not np.isfinite(tick_times).any():
+            return
+        delta = float(np.nanmax(tick_times)) - time.time()
+        offset = round(delta / self.OFFSET_STEP) * self.OFFSET_STEP
+        if abs(delta - offset) < self.OFFSET_TOLERANCE and abs(offset) <= self.MAX_OFFSET:
+            self.server_offset = offset
+
+    def _quote_age(self, tick_time: float, now: float) -> Optional[float]:
+        """Seconds since the broker quote time, None until the server offset is known"""
+        if self.server_offset is None:
+            return None
+        return round(now + self.server_offset - tick_time, 3)
+
+    @staticmethod
+    def _row(values: np.ndarray) -> Dict:
+        bid, ask, last, volume, tick_time = values.tolist()
+        return {
+            'bid': bid,
+            'ask': ask,
+            'last': last,
+            'volume': volume,
+            'time': datetime.fromtimestamp(tick_time, tz=pytz.UTC),
+            'spread': ask - bid
+        }
+
+    async def _run(self):
+        """Sampler loop"""
+        while True:
+            try:
+                self.add_symbols([*config.SYMBOLS, *self.data_client.subscribed_symbols])
+                await self.refresh()
+            except Exception as e:
+                print(f"❌ Error sampling prices: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, symbols: Optional[Iterable[str]] = None):
+        """
+        Start the background sampler
+
+        Args:
+            symbols: Initial symbols to sample (defaults to config.SYMBOLS)
+        """
+        self.add_symbols(symbols or config.SYMBOLS)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            print(f"✅ Price sampler started for {len(self.symbols)} symbols")
+
+    async def stop(self):
+        """Stop the background sampler"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def get_prices(
+        self,
+        symbols: Optional[List[str]] = None,
+        max_age: Optional[float] = None
+    ) -> Dict[str, Dict]:
+        """
+        Read current prices from memory
+
+        Symbols outside the sampled set are quoted directly from MT5 for
+        this request only.
+
+        Args:
+            symbols: Trading symbols (defaults to every sampled symbol)
+            max_age: Refresh first if any requested sample is older than
+                this many seconds
+
+        Returns:
+            Dictionary with price data plus 'age' (seconds since sampled)
+            and 'quote_age' (seconds since the broker quote time on the
+            trade server clock, None until its offset is known)
+        """
+        symbols = list(dict.fromkeys(symbols or self.symbols))
+        sampled = [s for s in symbols if s in self.index]
+        other = [s for s in symbols if s not in self.index]
+
+        rows = np.array([self.index[s] for s in sampled], dtype=np.intp)
+        now = time.time()
+        if len(rows) and (
+            not self.sampled_at[rows].all()
+            or (max_age is not None and (now - self.sampled_at[rows]).max() > max_age)
+        ):
+            await self.refresh()
+            now = time.time()
+
+        ages = now - self.sampled_at[rows]
+
+        prices = {}
+        for symbol, i, age in zip(sampled, rows.tolist(), ages.tolist()):
+            row = self._rows[i]
+            if row is not None:
+                prices[symbol] = {**row, 'age': round(age, 3), 'quote_age': self._quote_age(self.table[i, 4], now)}
+
+        if other:
+            table = np.full((len(other), len(self.FIELDS)), np.nan)
+            updated = self.data_client.sample_ticks(other, table)
+            self._observe_server_time(table[updated, 4])
+            now = time.time()
+            for symbol, values, ok in zip(other, table, updated.tolist()):
+                if ok:
+                    prices[symbol] = {**self._row(values), 'age': 0.0, 'quote_age': self._quote_age(values[4], now)}
+
+        return {symbol: prices[symbol] for symbol in symbols if symbol in prices}
+
+
+# Singleton instance
+price_snapshot_service = PriceSnapshotService(mt5_data_client)
@@ -0,0 +1,442 @@
+"""
+Risk Analytics
+Rolling cross-symbol covariance, correlation, beta and portfolio VaR kept in memory
+"""
+
+import asyncio
+from statistics import NormalDist
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import config
+from mt5_data_client import HistoryBackoff, mt5_data_client
+
+
+class RollingCovariance:
+    """
+    Rolling covariance of a return vector over the last `window` steps
+
+    Keeps a ring buffer of return rows plus running sums and cross-product
+    sums, so each update adds the new row and removes the oldest one in
+    O(n²) instead of recomputing over the whole window. The sums are rebuilt
+    from the buffer once per window to stop floating point drift.
+
+    Args:
+        n: Number of series
+        window: Number of return rows in the window
+    """
+
+    def __init__(self, n: int, window: int):
+        self.n = n
+        self.window = window
+        self.buffer = np.zeros((window, n))
+        self.sums = np.zeros(n)
+        self.products = np.zeros((n, n))
+        self.count = 0
+        self._pos = 0
+        self._updates = 0
+
+    def reset(self, returns: np.ndarray):
+        """
+        Rebuild the window from a block of return rows (oldest first)
+
+        Args:
+            returns: (rows, n) array; only the last `window` rows are kept
+        """
+        returns = np.asarray(returns, dtype=np.float64)[-self.window:]
+        self.count = len(returns)
+        self.buffer[:self.count] = returns
+        self._pos = self.count % self.window
+        self._resync()
+
+    def _resync(self):
+        rows = self.buffer[:self.count]
+        self.sums = rows.sum(axis=0)
+        self.products = rows.T @ rows
+
+    def update(self, returns: np.ndarray):
+        """
+        Add one return row, dropping the oldest if the window is full
+
+        Args:
+            returns: (n,) return vector
+        """
+        if self.count == self.window:
+            old = self.buffer[self._pos]
+            self.sums -= old
+            self.products -= np.outer(old, old)
+        else:
+            self.count += 1
+
+        self.buffer[self._pos] = returns
+        self.sums += returns
+        self.products += np.outer(returns, returns)
+        self._pos = (self._pos + 1) % self.window
+
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self._resync()
+
+    def rows(self) -> np.ndarray:
+        """Return rows in the window, oldest first"""
+        if self.count < self.window:
+            return self.buffer[:self.count]
+        # Full ring: the oldest row is the next one to be overwritten
+        return np.roll(self.buffer, -self._pos, axis=0)
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance matrix (NaN until two rows are available)"""
+        if self.count < 2:
+            return np.full((self.n, self.n), np.nan)
+        mean = self.sums / self.count
+        return (self.products - self.count * np.outer(mean, mean)) / (self.count - 1)
+
+    def correlation(self) -> np.ndarray:
+        """Correlation matrix (NaN for series with zero variance)"""
+        cov = self.covariance()
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        return np.clip(corr, -1.0, 1.0)
+
+
+def _tail_risk(pnl: np.ndarray, confidence: float) -> Dict[str, float]:
+    """VaR and CVaR (expected shortfall) of a P&L sample, as positive losses"""
+    cutoff = np.quantile(pnl, 1 - confidence)
+    return {'var': float(-cutoff), 'cvar': float(-pnl[pnl <= cutoff].mean())}
+
+
+def position_exposures(positions: np.ndarray, specs: Dict[str, Dict], equity: float) -> Dict[str, float]:
+    """
+    Net signed exposure per symbol as a fraction of equity
+
+    Args:
+        positions: POSITION_DTYPE array
+        specs: Cached MT5 symbol specifications per symbol
+        equity: Account equity
+
+    Returns:
+        Mapping of symbol to notional / equity (negative for net short)
+    """
+    exposures: Dict[str, float] = {}
+    if not equity:
+        return exposures
+
+    for symbol in np.unique(positions['symbol']):
+        spec = specs.get(symbol) or {}
+        if spec.get('tick_size') and spec.get('tick_value'):
+            value_per_price = spec['tick_value'] / spec['tick_size']
+        else:
+            value_per_price = spec.get('contract_size', 1.0)
+
+        rows = positions[positions['symbol'] == symbol]
+        signed = np.where(rows['type'] == 0, rows['volume'], -rows['volume'])
+        exposures[str(symbol)] = float((signed * rows['price_current']).sum() * value_per_price / equity)
+    return exposures
+
+
+class RiskAnalyticsEngine:
+    """
+    Live cross-symbol risk analytics
+
+    Seeds a rolling window of bar log returns from history, then appends
+    one row per closed bar. Symbols without a new bar in a step (closed
+    market) contribute a zero return. The window is only re-seeded when a
+    new symbol appears; symbols without history are retried with backoff
+    instead of on every update. Readers only touch in-memory matrices.
+
+    Args:
+        data_client: MT5DataClient
+        timeframe: Bar timeframe for returns
+        window: Rolling window length in bars
+        benchmark: Default benchmark symbol for beta
+    """
+
+    def __init__(
+        self,
+        data_client,
+        timeframe: Optional[str] = None,
+        window: Optional[int] = None,
+        benchmark: Optional[str] = None
+    ):
+        self.data_client = data_client
+        self.timeframe = timeframe or config.DEFAULT_TIMEFRAME
+        self.window = window or config.CORRELATION_WINDOW
+        self.benchmark = benchmark or config.BETA_BENCHMARK
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.cov = RollingCovariance(0, self.window)
+        self.last_close = np.zeros(0)
+        self.last_time = np.zeros(0, dtype=np.int64)
+        self._committed_close = np.zeros(0)
+        self._staged = False
+        self._normals = np.zeros((0, 0))
+        self._var_memo = {}
+        self.backoff = HistoryBackoff()
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def periods_per_year(self) -> float:
+        """Bars per year used to annualize volatility"""
+        return 252 * 86400 / self.data_client._get_timeframe_seconds(self.timeframe)
+
+    async def seed(self, symbols: Iterable[str]):
+        """
+        Rebuild the window from closed-bar history for a symbol set
+
+        Symbols without history are left out and retried with backoff.
+
+        Args:
+            symbols: Trading symbols
+        """
+        symbols = list(dict.fromkeys(symbols))
+        # One extra bar for the first return, one for the bar still forming
+        history = await self.data_client.backfill_history(symbols, [self.timeframe], self.window + 2)
+        bars = {}
+        for symbol in symbols:
+            rates = history.get((symbol, self.timeframe))
+            if rates is None or len(rates) < 2:
+                self.backoff.failed(symbol)
+                continue
+            self.backoff.succeeded(symbol)
+            closed = rates[:-1]
+            bars[symbol] = {'time': closed['time'], 'high': closed['high'], 'low': closed['low'], 'close': closed['close']}
+        if not bars or set(bars) == set(self.symbols):
+            # Nothing to add (new symbols had no history): keep the running window
+            return
+
+        from portfolio_backtest import align_bars
+
+        aligned = align_bars(bars)
+        close = aligned['close']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.nan_to_num(np.diff(np.log(close), axis=0), nan=0.0, posinf=0.0, neginf=0.0)
+
+        async with self._lock:
+            self.symbols = list(bars)
+            self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+            self.cov = RollingCovariance(len(self.symbols), self.window)
+            self.cov.reset(returns)
+            self.last_close = close[-1].copy()
+            self._committed_close = self.last_close.copy()
+            self.last_time = np.array([bars[s]['time'][-1] for s in self.symbols], dtype=np.int64)
+            self._staged = False
+
+        print(f"✅ Risk analytics seeded: {len(self.symbols)} symbols x {self.cov.count} bars")
+
+    def on_bar_close(self, symbol: str, bar_time: int, close: float):
+        """
+        Stage a closed bar; the return row is added on commit()
+
+        Args:
+            symbol: Trading symbol
+            bar_time: Bar open time in epoch seconds
+            close: Bar close
+        """
+        i = self.index.get(symbol)
+        if i is None or bar_time <= self.last_time[i]:
+            return
+        self.last_time[i] = bar_time
+        self.last_close[i] = close
+        self._staged = True
+
+    def commit(self):
+        """Append the staged closes as one return row"""
+        if not self._staged:
+            return
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.nan_to_num(np.log(self.last_close / self._committed_close), nan=0.0, posinf=0.0, neginf=0.0)
+        self.cov.update(returns)
+        self._committed_close = self.last_close.copy()
+        self._staged = False
+
+    async def poll(self):
+        """Read the latest closed bar of every symbol and commit one row"""
+        async with self._lock:
+            for symbol in self.symbols:
+                rates = await self.data_client.get_historical_rates(symbol, self.timeframe, 2)
+                if len(rates) == 2:
+                    # rates[-1] is the bar still forming
+                    self.on_bar_close(symbol, int(rates[-2]['time']), float(rates[-2]['close']))
+            self.commit()
+
+    async def _run(self):
+        """Update loop: re-seed when new symbols appear, then poll each half bar"""
+        interval = self.data_client._get_timeframe_seconds(self.timeframe) / 2
+        while True:
+            try:
+                wanted = list(dict.fromkeys([*config.SYMBOLS, *self.data_client.subscribed_symbols]))
+                new = self.backoff.due(s for s in wanted if s not in self.index)
+                if new:
+                    await self.seed([s for s in wanted if s in self.index or s in new])
+                else:
+                    await self.poll()
+            except Exception as e:
+                print(f"❌ Error updating risk analytics: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self):
+        """Start the background updater"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background updater"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _rows(self, symbols: Optional[List[str]]) -> List[str]:
+        if not symbols:
+            return list(self.symbols)
+        return [s for s in symbols if s in self.index]
+
+    def correlation_matrix(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Correlation matrix as nested dictionaries
+
+        Args:
+            symbols: Subset of symbols (defaults to all)
+        """
+        symbols = self._rows(symbols)
+        idx = [self.index[s] for s in symbols]
+        corr = self.cov.correlation()[np.ix_(idx, idx)]
+        return {
+            a: {b: (None if np.isnan(v) else round(float(v), 4)) for b, v in zip(symbols, row)}
+            for a, row in zip(symbols, corr.tolist())
+        }
+
+    def correlations(self, symbol: str) -> Dict[str, float]:
+        """Correlation of one symbol with every other symbol"""
+        row = self.correlation_matrix().get(symbol, {})
+        return {other: value for other, value in row.items() if other != symbol}
+
+    def beta(self, symbol: str, benchmark: Optional[str] = None) -> Optional[float]:
+        """
+        Beta of a symbol against a benchmark
+
+        Returns:
+            cov(symbol, benchmark) / var(benchmark), or None if unavailable
+        """
+        benchmark = benchmark or self.benchmark
+        if symbol not in self.index or benchmark not in self.index:
+            return None
+        cov = self.cov.covariance()
+        i, b = self.index[symbol], self.index[benchmark]
+        if not cov[b, b] > 0:
+            return None
+        return float(cov[i, b] / cov[b, b])
+
+    def volatility(self, symbol: str) -> Optional[float]:
+        """Annualized volatility of a symbol in percent"""
+        if symbol not in self.index:
+            return None
+        i = self.index[symbol]
+        variance = self.cov.covariance()[i, i]
+        if np.isnan(variance):
+            return None
+        return float(np.sqrt(max(variance, 0.0) * self.periods_per_year) * 100)
+
+    def portfolio_volatility(self, weights: Dict[str, float]) -> Optional[float]:
+        """
+        Annualized portfolio volatility in percent
+
+        Args:
+            weights: Exposure per symbol as a fraction of equity
+
+        Returns:
+            sqrt(w' Σ w) annualized, or None before the window has data
+        """
+        w = np.zeros(len(self.symbols))
+        for symbol, weight in weights.items():
+            if symbol in self.index:
+                w[self.index[symbol]] = weight
+        cov = self.cov.covariance()
+        if np.isnan(cov).any():
+            return None
+        return float(np.sqrt(max(w @ cov @ w, 0.0) * self.periods_per_year) * 100)
+
+    def value_at_risk(
+        self,
+        exposures: Dict[str, float],
+        equity: float,
+        confidence: Optional[float] = None,
+        horizon: int = 1,
+        simulations: Optional[int] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Portfolio VaR/CVaR of the current exposures
+
+        All methods use the rolling return window as the scenario source:
+        - historical: the window's (horizon-summed) return rows
+        - parametric: normal approximation from the window mean/covariance
+        - monte_carlo: correlated normal draws through the covariance
+          Cholesky factor (the standard normal matrix is generated once)
+
+        Results are memoized per window update and exposure set, so calling
+        this on every bar close or request only recomputes when either moved.
+
+        Args:
+            exposures: Exposure per symbol as a fraction of equity
+            equity: Account equity
+            confidence: VaR confidence level (defaults to VAR_CONFIDENCE)
+            horizon: Horizon in bars
+            simulations: Monte Carlo scenarios (defaults to VAR_SIMULATIONS)
+
+        Returns:
+            Mapping of method to {'var', 'cvar', 'var_percent',
+            'cvar_percent'}; losses in account currency are positive
+        """
+        confidence = confidence or config.VAR_CONFIDENCE
+        simulations = simulations or config.VAR_SIMULATIONS
+        if self.cov.count < 2 or not equity:
+            return {}
+
+        key = (id(self.cov), self.cov._updates, self.cov.count, tuple(sorted(exposures.items())), equity, confidence, horizon, simulations)
+        if key in self._var_memo:
+            return self._var_memo[key]
+
+        value = np.zeros(len(self.symbols))
+        for symbol, weight in exposures.items():
+            if symbol in self.index:
+                value[self.index[symbol]] = weight * equity
+
+        # Historical: overlapping horizon sums of log returns
+        log_returns = self.cov.rows()
+        if horizon > 1:
+            cumulative = np.vstack([np.zeros(len(self.symbols)), np.cumsum(log_returns, axis=0)])
+            log_returns = cumulative[horizon:] - cumulative[:-horizon]
+        results = {'historical': _tail_risk(np.expm1(log_returns) @ value, confidence)} if len(log_returns) else {}
+
+        # Parametric (normal)
+        mean = self.cov.sums / self.cov.count
+        cov = self.cov.covariance()
+        mu = float(mean @ value) * horizon
+        sigma = float(np.sqrt(max(value @ cov @ value, 0.0) * horizon))
+        z = NormalDist().inv_cdf(confidence)
+        results['parametric'] = {
+            'var': float(-mu + z * sigma),
+            'cvar': float(-mu + sigma * NormalDist().pdf(z) / (1 - confidence))
+        }
+
+        # Monte Carlo
+        if self._normals.shape != (simulations, len(self.symbols)):
+            self._normals = np.random.default_rng(0).standard_normal((simulations, len(self.symbols)))
+        factor = np.linalg.cholesky(cov * horizon + np.eye(len(self.symbols)) * 1e-12)
+        scenarios = np.expm1(mean * horizon + self._normals @ factor.T)
+        results['monte_carlo'] = _tail_risk(scenarios @ value, confidence)
+
+        for risk in results.values():
+            risk['var_percent'] = risk['var'] / equity * 100
+            risk['cvar_percent'] = risk['cvar'] / equity * 100
+
+        if len(self._var_memo) > 64:
+            self._var_memo.clear()
+        self._var_memo[key] = results
+        return results
+
+
+# Singleton instance
+risk_analytics = RiskAnalyticsEngine(mt5_data_client)
@@ -0,0 +1,406 @@
+"""
+Runtime Control
+Hot reload of the traded symbols, timeframes and strategy parameter sets
+"""
+
+import asyncio
+import json
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from config import config
+from mt5_data_client import TIMEFRAME_MAP
+
+
+# TechnicalStrategy keyword arguments a parameter set may override, with their types
+STRATEGY_PARAMS = {
+    'risk_per_trade': float, 'fast_ema': int, 'slow_ema': int, 'rsi_period': int,
+    'atr_period': int, 'bb_period': int, 'bb_std': float
+}
+
+# Config attributes that can be changed at runtime
+RUNTIME_SETTINGS = ('DEFAULT_TIMEFRAME', 'MAX_RISK_PER_TRADE', 'MAX_DAILY_LOSS', 'MAX_OPEN_POSITIONS', 'MAX_POSITION_SIZE')
+
+
+def _coerce(name: str, value, kind: type):
+    """
+    Convert a requested value to the type of the setting it replaces
+
+    Args:
+        name: Parameter or setting name, for the error message
+        value: Requested value
+        kind: str, int or float
+
+    Returns:
+        The converted value
+
+    Raises:
+        ValueError: If the value isn't a positive number of that type
+    """
+    if kind is str:
+        if not isinstance(value, str):
+            raise ValueError(f"{name} must be a string")
+        return value
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if not math.isfinite(number) or number <= 0:
+        raise ValueError(f"{name} must be positive, got {value!r}")
+    if kind is int and not number.is_integer():
+        raise ValueError(f"{name} must be a whole number, got {value!r}")
+    return kind(number)
+
+
+def _coerce_params(params: Dict) -> Dict:
+    """
+    Check and convert a TechnicalStrategy parameter set
+
+    Args:
+        params: Overrides of STRATEGY_PARAMS
+
+    Returns:
+        The converted parameters
+
+    Raises:
+        ValueError: If a parameter is unknown or has an invalid value
+    """
+    if not isinstance(params, dict):
+        raise ValueError("Parameter sets must be objects")
+    unknown = set(params) - set(STRATEGY_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+    return {key: _coerce(key, value, STRATEGY_PARAMS[key]) for key, value in params.items()}
+
+
+def _coerce_settings(settings: Dict) -> Dict:
+    """
+    Check and convert RUNTIME_SETTINGS values
+
+    Args:
+        settings: New values keyed by config attribute
+
+    Returns:
+        The converted settings
+
+    Raises:
+        ValueError: If a setting can't be changed or has an invalid value
+    """
+    unknown = set(settings) - set(RUNTIME_SETTINGS)
+    if unknown:
+        raise ValueError(f"Settings cannot be changed at runtime: {sorted(unknown)}")
+    settings = {name: _coerce(name, value, type(getattr(config, name))) for name, value in settings.items()}
+    timeframe = settings.get('DEFAULT_TIMEFRAME')
+    if timeframe is not None and timeframe not in TIMEFRAME_MAP:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+    return settings
+
+
+class RuntimeController:
+    """
+    Applies universe and parameter changes to a running NautilusTraderApp
+
+    The traded universe is config.SYMBOLS x app.timeframes x
+    app.param_sets. Every change edits that desired state and lets the app
+    start or stop only the feeds and strategies that differ, so everything
+    else keeps running untouched. config.SYMBOLS is edited in place, so
+    services of this process that read it (model scoring) follow without a
+    restart. Risk analytics and shadow trading run in the API server
+    process and keep the symbols it started with. The desired state is
+    saved to CONTROL_STATE_PATH and re-applied on the next start.
+
+    Args:
+        path: JSON file for the desired state
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or config.CONTROL_STATE_PATH)
+        self.app = None
+        self._lock = asyncio.Lock()
+        self._server = None
+        self._task = None
+
+    def load(self, app):
+        """
+        Attach the app and restore the saved universe before strategies start
+
+        Args:
+            app: NautilusTraderApp
+        """
+        self.app = app
+        if not self.path.exists():
+            return
+        try:
+            saved = json.loads(self.path.read_text())
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring runtime control state: {e}")
+            return
+
+        config.SYMBOLS[:] = saved.get('symbols', config.SYMBOLS)
+        for name, value in saved.get('settings', {}).items():
+            try:
+                setattr(config, name, _coerce_settings({name: value})[name])
+            except ValueError as e:
+                print(f"⚠️ Ignoring runtime control setting {name}: {e}")
+        timeframes = saved.get('timeframes', app.timeframes)
+        unknown = [timeframe for timeframe in timeframes if timeframe not in TIMEFRAME_MAP]
+        if unknown:
+            print(f"⚠️ Ignoring runtime control timeframes: {unknown}")
+        app.timeframes[:] = [timeframe for timeframe in timeframes if timeframe in TIMEFRAME_MAP] or app.timeframes
+        param_sets = {}
+        for name, params in (saved.get('param_sets') or {}).items():
+            try:
+                if ':' in name:
+                    raise ValueError("Parameter set names cannot contain ':'")
+                param_sets[name] = _coerce_params(params)
+            except ValueError as e:
+                print(f"⚠️ Ignoring runtime control parameter set {name}: {e}")
+        app.param_sets.clear()
+        app.param_sets.update(param_sets or {'default': {}})
+        print(f"🎛️ Restored runtime universe: {len(config.SYMBOLS)} symbols, "
+              f"timeframes {app.timeframes}, parameter sets {list(app.param_sets)}")
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({
+            'symbols': list(config.SYMBOLS),
+            'timeframes': list(self.app.timeframes),
+            'param_sets': self.app.param_sets,
+            'settings': {name: getattr(config, name) for name in RUNTIME_SETTINGS}
+        }, indent=2))
+        os.replace(tmp, self.path)
+
+    def state(self) -> Dict:
+        """Desired universe and what is currently running"""
+        return {
+            'symbols': list(config.SYMBOLS),
+            'timeframes': list(self.app.timeframes),
+            'param_sets': self.app.param_sets,
+            'settings': {name: getattr(config, name) for name in RUNTIME_SETTINGS},
+            'strategies': sorted(self.app.strategies),
+            'feeds': sorted(f"{symbol}:{timeframe}" for symbol, timeframe in self.app.feeds)
+        }
+
+    async def _apply(self) -> Dict[str, List[str]]:
+        changes = await self.app.apply_universe()
+        self._save()
+        return changes
+
+    async def add_symbols(self, symbols: List[str]) -> Dict[str, List[str]]:
+        """
+        Start trading symbols on every timeframe and parameter set
+
+        Args:
+            symbols: Trading symbols
+
+        Returns:
+            Started and stopped feeds and strategies
+        """
+        async with self._lock:
+            for symbol in symbols:
+                if self.app.data_client.get_symbol_info(symbol) is None:
+                    raise ValueError(f"Unknown symbol: {symbol}")
+            config.SYMBOLS.extend(s for s in dict.fromkeys(symbols) if s not in config.SYMBOLS)
+            return await self._apply()
+
+    async def remove_symbols(self, symbols: List[str]) -> Dict[str, List[str]]:
+        """Stop trading symbols"""
+        async with self._lock:
+            config.SYMBOLS[:] = [s for s in config.SYMBOLS if s not in symbols]
+            return await self._apply()
+
+    async def add_timeframe(self, timeframe: str) -> Dict[str, List[str]]:
+        """Trade every symbol on an additional timeframe"""
+        async with self._lock:
+            if timeframe not in TIMEFRAME_MAP:
+                raise ValueError(f"Unknown timeframe: {timeframe}")
+            if timeframe not in self.app.timeframes:
+                self.app.timeframes.append(timeframe)
+            return await self._apply()
+
+    async def remove_timeframe(self, timeframe: str) -> Dict[str, List[str]]:
+        """Stop trading a timeframe"""
+        async with self._lock:
+            if self.app.timeframes == [timeframe]:
+                raise ValueError("At least one timeframe is required")
+            if timeframe in self.app.timeframes:
+                self.app.timeframes.remove(timeframe)
+            return await self._apply()
+
+    async def set_param_set(self, name: str, params: Dict) -> Dict[str, List[str]]:
+        """
+        Add or change a TechnicalStrategy parameter set
+
+        Values are checked and converted before anything changes. A
+        risk-only change is applied to the running strategies in place.
+        Indicator period changes rebuild that set's strategies, warmed from
+        the bars they already hold, so no history is requested; the set is
+        only replaced once every rebuilt strategy was created.
+
+        Args:
+            name: Parameter set name
+            params: Overrides of STRATEGY_PARAMS
+
+        Returns:
+            Started, stopped and rebuilt strategies
+        """
+        if ':' in name:
+            raise ValueError("Parameter set names cannot contain ':'")
+        params = _coerce_params(params)
+
+        async with self._lock:
+            previous = self.app.param_sets.get(name)
+            changed = set()
+            if previous is not None:
+                changed = {k for k in set(previous) | set(params) if previous.get(k) != params.get(k)}
+            rebuilt = []
+            if changed - {'risk_per_trade'}:
+                rebuilt = self.app.rebuild_strategies(name, params)
+            self.app.param_sets[name] = params
+            if changed == {'risk_per_trade'}:
+                self.app.update_risk(name)
+            changes = await self._apply()
+            changes['rebuilt'] = rebuilt
+            return changes
+
+    async def remove_param_set(self, name: str) -> Dict[str, List[str]]:
+        """Stop the strategies of a parameter set"""
+        async with self._lock:
+            if list(self.app.param_sets) == [name]:
+                raise ValueError("At least one parameter set is required")
+            self.app.param_sets.pop(name, None)
+            return await self._apply()
+
+    async def update_settings(self, settings: Dict) -> Dict[str, List[str]]:
+        """
+        Change RUNTIME_SETTINGS
+
+        A new DEFAULT_TIMEFRAME replaces the old one in the traded
+        timeframes; a new MAX_RISK_PER_TRADE reaches every strategy whose
+        parameter set doesn't override risk_per_trade. All values are
+        checked and converted before any setting changes.
+
+        Args:
+            settings: New values keyed by config attribute
+
+        Returns:
+            Started and stopped feeds and strategies
+        """
+        settings = _coerce_settings(settings)
+        timeframe = settings.get('DEFAULT_TIMEFRAME')
+
+        async with self._lock:
+            if timeframe is not None and timeframe != config.DEFAULT_TIMEFRAME:
+                timeframes = self.app.timeframes
+                if config.DEFAULT_TIMEFRAME in timeframes:
+                    timeframes[timeframes.index(config.DEFAULT_TIMEFRAME)] = timeframe
+                else:
+                    timeframes.append(timeframe)
+                timeframes[:] = list(dict.fromkeys(timeframes))
+            for name, value in settings.items():
+                setattr(config, name, value)
+            if 'MAX_RISK_PER_TRADE' in settings:
+                for name in self.app.param_sets:
+                    self.app.update_risk(name)
+            return await self._apply()
+
+    def start(self, app):
+        """
+        Serve the control API on CONTROL_HOST:CONTROL_PORT
+
+        Args:
+            app: NautilusTraderApp
+        """
+        self.app = app
+        if self._task is None:
+            self._server = uvicorn.Server(uvicorn.Config(
+                control_app,
+                host=config.CONTROL_HOST,
+                port=config.CONTROL_PORT,
+                log_level='warning'
+            ))
+            self._task = asyncio.create_task(self._server.serve())
+            print(f"🎛️ Runtime control API on {config.CONTROL_HOST}:{config.CONTROL_PORT}")
+
+    async def stop(self):
+        """Stop the control API"""
+        if self._task is not None:
+            self._server.should_exit = True
+            await self._task
+            self._task = None
+            self._server = None
+
+
+# Singleton instance
+runtime_controller = RuntimeController()
+
+
+class SymbolsRequest(BaseModel):
+    symbols: List[str]
+
+
+control_app = FastAPI(title="Nautilus Trader Runtime Control")
+
+
+async def _run(change):
+    try:
+        return await change
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@control_app.get("/control")
+async def get_control_state():
+    """현재 거래 유니버스와 실행 중인 피드/전략 조회"""
+    return runtime_controller.state()
+
+
+@control_app.post("/control/symbols")
+async def add_symbols(request: SymbolsRequest):
+    """심볼 추가 (새 심볼만 구독 및 워밍업)"""
+    return await _run(runtime_controller.add_symbols(request.symbols))
+
+
+@control_app.delete("/control/symbols/{symbol}")
+async def remove_symbol(symbol: str):
+    """심볼 제거"""
+    return await _run(runtime_controller.remove_symbols([symbol]))
+
+
+@control_app.post("/control/timeframes/{timeframe}")
+async def add_timeframe(timeframe: str):
+    """타임프레임 추가"""
+    return await _run(runtime_controller.add_timeframe(timeframe))
+
+
+@control_app.delete("/control/timeframes/{timeframe}")
+async def remove_timeframe(timeframe: str):
+    """타임프레임 제거"""
+    return await _run(runtime_controller.remove_timeframe(timeframe))
+
+
+@control_app.put("/control/params/{name}")
+async def set_param_set(name: str, params: Dict):
+    """전략 파라미터 세트 추가/변경"""
+    return await _run(runtime_controller.set_param_set(name, params))
+
+
+@control_app.delete("/control/params/{name}")
+async def remove_param_set(name: str):
+    """전략 파라미터 세트 제거"""
+    return await _run(runtime_controller.remove_param_set(name))
+
+
+@control_app.patch("/control/settings")
+async def update_settings(settings: Dict):
+    """리스크 설정 및 기본 타임프레임 변경"""
+    return await _run(runtime_controller.update_settings(settings))
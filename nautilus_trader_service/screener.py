@@ -0,0 +1,328 @@
+"""
+Screener
+Full-universe indicator scans on stacked (symbols, bars) arrays
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from config import config
+from indicators import compute_indicators
+from mt5_data_client import mt5_data_client
+from trading_calendar import trading_calendar
+
+
+SCREENER_SPEC = {
+    'ema': [12, 26],
+    'rsi': [14],
+    'atr': [14],
+    'macd': [(12, 26, 9)]
+}
+BOLLINGER_PERIOD, BOLLINGER_STD = 20, 2.0
+
+SCREENER_COLUMNS = (
+    'signal_strength', 'close', 'change_pct', 'rsi', 'macd_hist',
+    'atr_pct', 'bb_position', 'ema_trend'
+)
+
+
+class ScreenerUniverse:
+    """
+    Closed-bar windows of every symbol on one timeframe, stacked row-wise
+
+    high/low/close/volume are (symbols, bars) matrices, so one compute_indicators
+    call evaluates the whole universe. On a bar close each row whose
+    newest closed bar follows its window is shifted by one bar in place;
+    rows that missed bars are reloaded.
+
+    Args:
+        timeframe: Timeframe string
+        bars: Window length in bars
+    """
+
+    def __init__(self, timeframe: str, bars: int):
+        self.timeframe = timeframe
+        self.bars = bars
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.high = np.zeros((0, bars))
+        self.low = np.zeros((0, bars))
+        self.close = np.zeros((0, bars))
+        self.volume = np.zeros((0, bars))
+        self.last_time = np.zeros(0, dtype=np.int64)
+        self.results: Dict[str, np.ndarray] = {}
+        self.scanned_at = None
+        self.scan_seconds = 0.0
+
+    def load(self, history: Dict[str, np.ndarray]):
+        """
+        Set windows from rates arrays (the last, still forming, bar is dropped)
+
+        Symbols already loaded are overwritten; symbols with fewer than
+        `bars` closed bars are left out.
+
+        Args:
+            history: Rates array per symbol
+        """
+        complete = {s: r[-self.bars - 1:-1] for s, r in history.items() if len(r) > self.bars}
+        new = [s for s in complete if s not in self.index]
+        if new:
+            for symbol in new:
+                self.index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            grow = ((0, len(new)), (0, 0))
+            self.high = np.pad(self.high, grow)
+            self.low = np.pad(self.low, grow)
+            self.close = np.pad(self.close, grow)
+            self.volume = np.pad(self.volume, grow)
+            self.last_time = np.pad(self.last_time, (0, len(new)))
+
+        for symbol, rates in complete.items():
+            i = self.index[symbol]
+            self.high[i] = rates['high']
+            self.low[i] = rates['low']
+            self.close[i] = rates['close']
+            self.volume[i] = rates['tick_volume']
+            self.last_time[i] = rates['time'][-1]
+
+    def roll(self, latest: Dict[str, np.ndarray]) -> List[str]:
+        """
+        Append newly closed bars
+
+        Args:
+            latest: Last three rates per symbol (two closed bars and the
+                forming one)
+
+        Returns:
+            Symbols that skipped bars and need a full reload
+        """
+        rows, highs, lows, closes, volumes, times, reload = [], [], [], [], [], [], []
+        for symbol, rates in latest.items():
+            i = self.index.get(symbol)
+            if i is None or len(rates) < 3:
+                continue
+            previous, newest = rates[-3], rates[-2]
+            if newest['time'] <= self.last_time[i]:
+                continue
+            if previous['time'] != self.last_time[i]:
+                reload.append(symbol)
+                continue
+            rows.append(i)
+            highs.append(newest['high'])
+            lows.append(newest['low'])
+            closes.append(newest['close'])
+            volumes.append(newest['tick_volume'])
+            times.append(newest['time'])
+
+        if rows:
+            rows = np.array(rows, dtype=np.intp)
+            for matrix, values in ((self.high, highs), (self.low, lows), (self.close, closes), (self.volume, volumes)):
+                matrix[rows, :-1] = matrix[rows, 1:]
+                matrix[rows, -1] = values
+            self.last_time[rows] = times
+        return reload
+
+    def evaluate(self):
+        """Compute indicators and signal columns for every symbol at once"""
+        started = time.perf_counter()
+        if not self.symbols:
+            self.results = {name: np.zeros(0) for name in SCREENER_COLUMNS}
+            return
+
+        ind = compute_indicators(self.high, self.low, self.close, SCREENER_SPEC)
+        last = {name: values[:, -1] for name, values in ind.items()}
+        close = self.close[:, -1]
+
+        # TechnicalStrategy signal rules, one column per symbol
+        ema_trend = np.sign(last['ema_12'] - last['ema_26'])
+        rsi_value = last['rsi_14']
+        rsi_signal = (rsi_value < 30).astype(np.int8) - (rsi_value > 70)
+        macd_signal = np.sign(last['macd_12_26_9'] - last['macd_signal_12_26_9'])
+        # Only the latest band is needed, so skip the rolling-window kernel
+        window = self.close[:, -BOLLINGER_PERIOD:]
+        middle, std = window.mean(axis=1), window.std(axis=1)
+        upper, lower = middle + BOLLINGER_STD * std, middle - BOLLINGER_STD * std
+        bb_signal = (close <= lower).astype(np.int8) - (close >= upper)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.results = {
+                'signal_strength': np.nan_to_num(ema_trend + rsi_signal + macd_signal + bb_signal),
+                'close': close,
+                'change_pct': (close / self.close[:, -2] - 1) * 100,
+                'rsi': rsi_value,
+                'macd_hist': last['macd_hist_12_26_9'],
+                'atr_pct': last['atr_14'] / close * 100,
+                'bb_position': (close - lower) / (upper - lower),
+                'ema_trend': ema_trend
+            }
+        self.scanned_at = time.time()
+        self.scan_seconds = time.perf_counter() - started
+
+    def rank(
+        self,
+        metric: str = 'signal_strength',
+        direction: Optional[str] = None,
+        min_strength: int = 0,
+        limit: int = 50,
+        ascending: bool = False
+    ) -> List[Dict]:
+        """
+        Ranked screener rows
+
+        Args:
+            metric: One of SCREENER_COLUMNS ('signal_strength' ranks by
+                absolute strength)
+            direction: 'long' or 'short' to keep one signal direction
+            min_strength: Minimum absolute signal strength
+            limit: Maximum rows
+            ascending: Sort lowest first
+
+        Returns:
+            Rows with symbol, last closed bar time and SCREENER_COLUMNS
+        """
+        if metric not in SCREENER_COLUMNS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if not self.symbols:
+            return []
+
+        strength = self.results['signal_strength']
+        keep = np.abs(strength) >= min_strength
+        if direction == 'long':
+            keep &= strength > 0
+        elif direction == 'short':
+            keep &= strength < 0
+
+        values = self.results[metric]
+        if metric == 'signal_strength':
+            values = np.abs(values)
+        keep &= np.isfinite(values)
+        candidates = np.flatnonzero(keep)
+        order = candidates[np.argsort(values[candidates] if ascending else -values[candidates], kind='stable')][:limit]
+
+        return [
+            {
+                'symbol': self.symbols[i],
+                'time': int(self.last_time[i]),
+                **{name: (float(self.results[name][i]) if np.isfinite(self.results[name][i]) else None)
+                   for name in SCREENER_COLUMNS}
+            }
+            for i in order.tolist()
+        ]
+
+
+class Screener:
+    """
+    Universe scans per timeframe with incremental re-scans on bar close
+
+    The first request for a timeframe downloads SCREENER_BARS of history
+    for every tradable symbol, in parallel through the terminal pool when
+    MT5_TERMINAL_PATHS is configured; with a single terminal the requests
+    queue (at most `concurrency` at a time) on the data client's MT5
+    thread and run one after another off the event loop. After
+    that a background loop fetches only the last bars of symbols whose
+    market is open, shortly after each bar close.
+
+    Args:
+        data_client: MT5DataClient
+        bars: Window length in bars
+        concurrency: Requests queued on the MT5 thread without a pool
+    """
+
+    def __init__(self, data_client, bars: Optional[int] = None, concurrency: Optional[int] = None):
+        self.data_client = data_client
+        self.bars = bars or config.SCREENER_BARS
+        self.concurrency = concurrency or config.SCREENER_CONCURRENCY
+        self.universes: Dict[str, ScreenerUniverse] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_update: Dict[str, float] = {}
+        self._task = None
+
+    def _schedule(self, timeframe: str):
+        """Next re-scan: shortly after the current bar closes"""
+        seconds = self.data_client._get_timeframe_seconds(timeframe)
+        self._next_update[timeframe] = (time.time() // seconds + 1) * seconds + config.SCREENER_CLOSE_DELAY
+
+    async def _history(self, symbols: List[str], timeframe: str, count: int, use_pool: bool) -> Dict[str, np.ndarray]:
+        history = await self.data_client.backfill_history(
+            symbols, [timeframe], count, concurrency=self.concurrency, use_pool=use_pool
+        )
+        return {symbol: rates for (symbol, _), rates in history.items()}
+
+    async def scan(self, timeframe: str) -> ScreenerUniverse:
+        """
+        Full scan of the broker universe on a timeframe
+
+        Args:
+            timeframe: Timeframe string
+
+        Returns:
+            The evaluated ScreenerUniverse
+        """
+        started = time.time()
+        symbols = self.data_client.get_universe()
+        universe = ScreenerUniverse(timeframe, self.bars)
+        universe.load(await self._history(symbols, timeframe, self.bars + 1, use_pool=True))
+        universe.evaluate()
+        self.universes[timeframe] = universe
+        self._schedule(timeframe)
+        self.start()
+        print(f"🔎 Screened {len(universe.symbols)}/{len(symbols)} symbols on {timeframe} "
+              f"in {time.time() - started:.1f}s")
+        return universe
+
+    async def update(self, timeframe: str):
+        """Incremental re-scan after a bar close"""
+        universe = self.universes[timeframe]
+        now = time.time()
+        cache = self.data_client.symbol_info_cache
+        open_symbols = [s for s in universe.symbols if trading_calendar.is_open(s, cache.get(s), now)]
+
+        latest = await self._history(open_symbols, timeframe, 3, use_pool=False)
+        reload = universe.roll(latest)
+        if reload:
+            universe.load(await self._history(reload, timeframe, self.bars + 1, use_pool=False))
+        universe.evaluate()
+        self._schedule(timeframe)
+
+    async def get(self, timeframe: str) -> ScreenerUniverse:
+        """Evaluated universe for a timeframe, scanning it on first use"""
+        universe = self.universes.get(timeframe)
+        if universe is not None:
+            return universe
+        lock = self._locks.setdefault(timeframe, asyncio.Lock())
+        async with lock:
+            if timeframe not in self.universes:
+                await self.scan(timeframe)
+        return self.universes[timeframe]
+
+    async def _run(self):
+        """Re-scan each screened timeframe after its bar closes"""
+        while True:
+            for timeframe in list(self.universes):
+                if time.time() < self._next_update.get(timeframe, 0):
+                    continue
+                try:
+                    async with self._locks.setdefault(timeframe, asyncio.Lock()):
+                        await self.update(timeframe)
+                except Exception as e:
+                    print(f"❌ Error re-scanning {timeframe}: {e}")
+                    self._schedule(timeframe)
+            await asyncio.sleep(1.0)
+
+    def start(self):
+        """Start the background re-scan loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background re-scan loop"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Singleton instance
+screener = Screener(mt5_data_client)
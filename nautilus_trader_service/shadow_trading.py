@@ -0,0 +1,453 @@
+"""
+Shadow Trading
+Paper trading of many TechnicalStrategy parameter variants on the live feed
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config import config
+from indicators import StreamingATR, StreamingBollinger, StreamingMACD, StreamingRSI
+from mt5_data_client import HistoryBackoff, mt5_data_client
+from price_snapshot import price_snapshot_service
+
+
+# Variant parameters and their TechnicalStrategy defaults
+VARIANT_DEFAULTS = {
+    'fast_ema': 12,
+    'slow_ema': 26,
+    'rsi_period': 14,
+    'atr_period': 14,
+    'bb_period': 20,
+    'bb_std': 2.0,
+    'entry_threshold': 3,
+    'stop_atr': 2.0,
+    'take_atr': 3.0,
+    'risk_per_trade': config.MAX_RISK_PER_TRADE
+}
+
+LEADERBOARD_METRICS = ('net_pnl', 'return', 'equity', 'win_rate', 'profit_factor', 'max_drawdown', 'trades')
+
+
+def variant_grid(grid: Optional[Dict[str, list]] = None) -> Dict[str, np.ndarray]:
+    """
+    Cartesian product of parameter values
+
+    Args:
+        grid: Values per parameter; parameters left out use VARIANT_DEFAULTS
+
+    Returns:
+        One array per parameter, element i belonging to variant i
+    """
+    grid = {**{name: [value] for name, value in VARIANT_DEFAULTS.items()}, **(grid or config.SHADOW_VARIANT_GRID)}
+    names = list(VARIANT_DEFAULTS)
+    combos = [c for c in itertools.product(*(grid[name] for name in names))
+              if c[names.index('fast_ema')] < c[names.index('slow_ema')]]
+    columns = np.array(combos, dtype=np.float64).reshape(-1, len(names)).T
+    return {name: column for name, column in zip(names, columns)}
+
+
+class ShadowBook:
+    """
+    Virtual accounts for every variant on one symbol
+
+    Indicators are computed once per distinct parameter (one MACD per
+    fast/slow pair, one RSI/ATR/Bollinger per period) with the streaming
+    kernels TechnicalStrategy uses, then gathered into per-variant arrays.
+    Signals, exits, sizing and account updates are array operations over
+    all variants, so a bar costs the same handful of numpy calls whether
+    there are ten variants or a thousand.
+
+    Fills are market orders at the latest bid/ask (bar close +/- half the
+    symbol spread when no quote is available), moved slippage_points
+    against the order, plus commission per lot and side.
+
+    Args:
+        symbol: Trading symbol
+        params: Output of variant_grid
+        spec: Cached MT5 symbol specification
+        capital: Starting balance of each virtual account
+    """
+
+    def __init__(self, symbol: str, params: Dict[str, np.ndarray], spec: Dict, capital: float):
+        self.symbol = symbol
+        self.params = params
+        self.capital = capital
+        n = len(params['fast_ema'])
+
+        # Distinct indicators and the variant -> indicator index for each
+        self.macd, self.macd_idx = self._unique(
+            zip(params['fast_ema'].astype(int), params['slow_ema'].astype(int)),
+            lambda key: StreamingMACD(fast=key[0], slow=key[1], signal=9)
+        )
+        self.rsi, self.rsi_idx = self._unique(params['rsi_period'].astype(int), StreamingRSI)
+        self.atr, self.atr_idx = self._unique(params['atr_period'].astype(int), StreamingATR)
+        # k=1 bands give the standard deviation; each variant scales it by bb_std
+        self.bb, self.bb_idx = self._unique(params['bb_period'].astype(int), lambda period: StreamingBollinger(period, 1.0))
+
+        # Fill model
+        spec = spec or {}
+        self.point = spec.get('point', 0.0)
+        self.half_spread = spec.get('spread', 0.0) * self.point / 2
+        self.slippage = config.SHADOW_SLIPPAGE_POINTS * self.point
+        self.commission = config.BACKTEST_COMMISSION_PER_LOT
+        if spec.get('tick_size') and spec.get('tick_value'):
+            self.value_per_price = spec['tick_value'] / spec['tick_size']
+        else:
+            self.value_per_price = spec.get('contract_size', 1.0)
+        self.lot_step = spec.get('lot_step') or 0.01
+        self.min_lot = spec.get('min_lot') or 0.01
+        self.max_lot = min(spec.get('max_lot') or config.MAX_POSITION_SIZE, config.MAX_POSITION_SIZE)
+
+        # Virtual accounts
+        self.side = np.zeros(n, dtype=np.int8)
+        self.volume = np.zeros(n)
+        self.entry = np.zeros(n)
+        self.stop = np.zeros(n)
+        self.take = np.zeros(n)
+        self.entry_cost = np.zeros(n)
+        self.balance = np.full(n, capital, dtype=np.float64)
+        self.equity = self.balance.copy()
+        self.peak = self.balance.copy()
+        self.max_drawdown = np.zeros(n)
+        self.trades = np.zeros(n, dtype=np.int64)
+        self.wins = np.zeros(n, dtype=np.int64)
+        self.gross_profit = np.zeros(n)
+        self.gross_loss = np.zeros(n)
+
+        self.last_bar_time = 0
+        self.bid = np.nan
+        self.ask = np.nan
+
+    @staticmethod
+    def _unique(keys: Iterable, factory):
+        """Build one indicator per distinct key and the per-variant index array"""
+        indicators, index, lookup = [], [], {}
+        for key in keys:
+            key = tuple(int(k) for k in key) if isinstance(key, tuple) else int(key)
+            if key not in lookup:
+                lookup[key] = len(indicators)
+                indicators.append(factory(key))
+            index.append(lookup[key])
+        return indicators, np.array(index, dtype=np.intp)
+
+    def warm(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, times: np.ndarray):
+        """Feed history through the indicators without trading"""
+        for h, l, c in zip(high.tolist(), low.tolist(), close.tolist()):
+            self._update_indicators(h, l, c)
+        if len(times):
+            self.last_bar_time = int(times[-1])
+
+    def _update_indicators(self, high: float, low: float, close: float):
+        for indicator in self.macd:
+            indicator.update(close)
+        for indicator in self.rsi:
+            indicator.update(close)
+        for indicator in self.atr:
+            indicator.update(high, low, close)
+        for indicator in self.bb:
+            indicator.update(close)
+
+    def _quotes(self, close: float):
+        """Current (bid, ask), falling back to the close +/- half spread"""
+        if np.isfinite(self.bid) and np.isfinite(self.ask):
+            return self.bid, self.ask
+        return close - self.half_spread, close + self.half_spread
+
+    def _close(self, mask: np.ndarray, bid: float, ask: float):
+        """Close the positions in mask at the bid (longs) or ask (shorts)"""
+        if not mask.any():
+            return
+        side = self.side[mask]
+        price = np.where(side == 1, bid - self.slippage, ask + self.slippage)
+        volume = self.volume[mask]
+        pnl = side * (price - self.entry[mask]) * volume * self.value_per_price - self.commission * volume
+        self.balance[mask] += pnl
+
+        trade_pnl = pnl - self.entry_cost[mask]
+        self.trades[mask] += 1
+        self.wins[mask] += trade_pnl > 0
+        self.gross_profit[mask] += np.maximum(trade_pnl, 0.0)
+        self.gross_loss[mask] += np.maximum(-trade_pnl, 0.0)
+        self.side[mask] = 0
+        self.volume[mask] = 0.0
+
+    def _mark(self, bid: float, ask: float):
+        """Mark open positions to market and track drawdown"""
+        mark = np.where(self.side == 1, bid, ask)
+        open_pnl = np.where(self.side != 0, self.side * (mark - self.entry) * self.volume * self.value_per_price, 0.0)
+        self.equity = self.balance + open_pnl
+        np.maximum(self.peak, self.equity, out=self.peak)
+        np.maximum(self.max_drawdown, (self.peak - self.equity) / self.peak, out=self.max_drawdown)
+
+    def on_tick(self, bid: float, ask: float):
+        """
+        Check stops and targets of open positions against a quote
+
+        Args:
+            bid: Current bid
+            ask: Current ask
+        """
+        self.bid, self.ask = bid, ask
+        long_exit = (self.side == 1) & ((bid <= self.stop) | (bid >= self.take))
+        short_exit = (self.side == -1) & ((ask >= self.stop) | (ask <= self.take))
+        self._close(long_exit | short_exit, bid, ask)
+        self._mark(bid, ask)
+
+    def on_bar(self, bar_time: int, high: float, low: float, close: float):
+        """
+        Evaluate every variant on a closed bar
+
+        Args:
+            bar_time: Bar open time in epoch seconds
+            high: Bar high
+            low: Bar low
+            close: Bar close
+        """
+        if bar_time <= self.last_bar_time:
+            return
+        self.last_bar_time = bar_time
+        self._update_indicators(high, low, close)
+
+        # Gather indicator values into per-variant arrays
+        fast = np.array([m.fast.value for m in self.macd])[self.macd_idx]
+        slow = np.array([m.slow.value for m in self.macd])[self.macd_idx]
+        macd_line = np.array([m.line for m in self.macd])[self.macd_idx]
+        macd_signal = np.array([m.signal for m in self.macd])[self.macd_idx]
+        rsi = np.array([r.value for r in self.rsi])[self.rsi_idx]
+        atr = np.array([a.value for a in self.atr])[self.atr_idx]
+        bb_middle = np.array([b.middle for b in self.bb])[self.bb_idx]
+        bb_std = np.array([b.upper - b.middle for b in self.bb])[self.bb_idx]
+        ready = (
+            np.array([m.fast.initialized and m.initialized for m in self.macd])[self.macd_idx] &
+            np.array([r.initialized for r in self.rsi])[self.rsi_idx] &
+            np.array([a.initialized for a in self.atr])[self.atr_idx] &
+            np.array([b.initialized for b in self.bb])[self.bb_idx]
+        )
+
+        # Same signal rules as TechnicalStrategy.generate_signals
+        ema_cross = np.sign(fast - slow)
+        rsi_signal = (rsi < 30).astype(np.int8) - (rsi > 70)
+        macd_signal_dir = np.sign(macd_line - macd_signal)
+        k = self.params['bb_std']
+        bb_signal = (close <= bb_middle - k * bb_std).astype(np.int8) - (close >= bb_middle + k * bb_std)
+        strength = np.nan_to_num(ema_cross + rsi_signal + macd_signal_dir + bb_signal)
+
+        bid, ask = self._quotes(close)
+        flat = self.side == 0
+
+        # Exits on the bar close (stop, target, reversal)
+        long_exit = (self.side == 1) & (
+            (close <= self.stop) | (close >= self.take) | ((ema_cross == -1) & (macd_signal_dir == -1))
+        )
+        short_exit = (self.side == -1) & (
+            (close >= self.stop) | (close <= self.take) | ((ema_cross == 1) & (macd_signal_dir == 1))
+        )
+        self._close(long_exit | short_exit, bid, ask)
+
+        # Entries for variants that were flat before this bar
+        threshold = self.params['entry_threshold']
+        direction = np.where(strength >= threshold, 1, np.where(strength <= -threshold, -1, 0)).astype(np.int8)
+        stop_distance = atr * self.params['stop_atr']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            volume = self.balance * self.params['risk_per_trade'] / (stop_distance * self.value_per_price)
+        volume = np.clip(np.floor(volume / self.lot_step) * self.lot_step, self.min_lot, self.max_lot)
+        enter = flat & ready & (direction != 0) & np.isfinite(volume) & (stop_distance > 0)
+
+        if enter.any():
+            side = direction[enter]
+            price = np.where(side == 1, ask + self.slippage, bid - self.slippage)
+            self.side[enter] = side
+            self.volume[enter] = volume[enter]
+            self.entry[enter] = price
+            self.stop[enter] = price - side * stop_distance[enter]
+            self.take[enter] = price + side * atr[enter] * self.params['take_atr'][enter]
+            self.entry_cost[enter] = self.commission * volume[enter]
+            self.balance[enter] -= self.entry_cost[enter]
+
+        self._mark(bid, ask)
+
+    def metrics(self) -> Dict[str, np.ndarray]:
+        """Per-variant account metrics"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            win_rate = np.where(self.trades > 0, self.wins / np.maximum(self.trades, 1), 0.0)
+            profit_factor = np.where(self.gross_loss > 0, self.gross_profit / self.gross_loss,
+                                     np.where(self.gross_profit > 0, np.inf, 0.0))
+        return {
+            'net_pnl': self.equity - self.capital,
+            'return': (self.equity - self.capital) / self.capital,
+            'equity': self.equity,
+            'win_rate': win_rate,
+            'profit_factor': profit_factor,
+            'max_drawdown': self.max_drawdown,
+            'trades': self.trades
+        }
+
+
+class ShadowTradingEngine:
+    """
+    Live paper trading of a parameter grid across symbols
+
+    Closed bars are read once per half bar and ticks come from the price
+    snapshot table, so shadow trading adds no MT5 calls beyond one short
+    bar request per symbol.
+
+    Args:
+        data_client: MT5DataClient
+        price_service: PriceSnapshotService providing live quotes
+        timeframe: Bar timeframe
+        grid: Parameter grid (defaults to SHADOW_VARIANT_GRID)
+        capital: Starting balance of each virtual account
+    """
+
+    def __init__(
+        self,
+        data_client,
+        price_service,
+        timeframe: Optional[str] = None,
+        grid: Optional[Dict[str, list]] = None,
+        capital: Optional[float] = None
+    ):
+        self.data_client = data_client
+        self.price_service = price_service
+        self.timeframe = timeframe or config.DEFAULT_TIMEFRAME
+        self.params = variant_grid(grid)
+        self.capital = capital or config.SHADOW_CAPITAL
+        self.books: Dict[str, ShadowBook] = {}
+        self.started_at = None
+        self._last_poll = 0.0
+        self.backoff = HistoryBackoff()
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def variant_count(self) -> int:
+        return len(self.params['fast_ema'])
+
+    async def seed(self, symbols: Iterable[str]):
+        """
+        Create books for new symbols and warm their indicators from history
+
+        Symbols without history get no book and are retried with backoff.
+
+        Args:
+            symbols: Trading symbols
+        """
+        new = [s for s in dict.fromkeys(symbols) if s not in self.books]
+        if not new:
+            return
+        history = await self.data_client.backfill_history(new, [self.timeframe], config.WARMUP_BARS + 1)
+        for symbol in new:
+            rates = history.get((symbol, self.timeframe))
+            if rates is None or len(rates) < 2:
+                self.backoff.failed(symbol)
+                continue
+            self.backoff.succeeded(symbol)
+            book = ShadowBook(symbol, self.params, self.data_client.get_symbol_info(symbol), self.capital)
+            # The last bar is still forming
+            closed = rates[:-1]
+            book.warm(closed['high'], closed['low'], closed['close'], closed['time'])
+            self.books[symbol] = book
+        print(f"👥 Shadow trading {self.variant_count} variants on {len(self.books)} symbols")
+
+    async def poll_bars(self):
+        """Evaluate the latest closed bar of every symbol"""
+        async with self._lock:
+            for symbol, book in self.books.items():
+                rates = await self.data_client.get_historical_rates(symbol, self.timeframe, 2)
+                if len(rates) == 2:
+                    bar = rates[-2]
+                    book.on_bar(int(bar['time']), float(bar['high']), float(bar['low']), float(bar['close']))
+
+    def on_ticks(self):
+        """Apply the latest sampled quotes to every book"""
+        table, index = self.price_service.table, self.price_service.index
+        for symbol, book in self.books.items():
+            row = index.get(symbol)
+            if row is None:
+                continue
+            bid, ask = table[row, 0], table[row, 1]
+            if np.isfinite(bid) and np.isfinite(ask) and (bid != book.bid or ask != book.ask):
+                book.on_tick(float(bid), float(ask))
+
+    async def _run(self):
+        """Tick loop at the price sample interval, bar poll every half bar"""
+        half_bar = self.data_client._get_timeframe_seconds(self.timeframe) / 2
+        while True:
+            try:
+                wanted = list(dict.fromkeys([*config.SYMBOLS, *self.data_client.subscribed_symbols]))
+                new = self.backoff.due(s for s in wanted if s not in self.books)
+                if new:
+                    await self.seed(new)
+                if time.time() - self._last_poll >= half_bar:
+                    self._last_poll = time.time()
+                    await self.poll_bars()
+                self.on_ticks()
+            except Exception as e:
+                print(f"❌ Error in shadow trading: {e}")
+            await asyncio.sleep(config.PRICE_SAMPLE_INTERVAL)
+
+    def start(self):
+        """Start paper trading in the background"""
+        if self._task is None:
+            self.started_at = time.time()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop paper trading"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def leaderboard(
+        self,
+        metric: str = 'net_pnl',
+        symbol: Optional[str] = None,
+        limit: int = 20,
+        ascending: bool = False
+    ) -> List[Dict]:
+        """
+        Rank (symbol, variant) accounts by a metric
+
+        Args:
+            metric: One of LEADERBOARD_METRICS
+            symbol: Only rank this symbol's variants
+            limit: Maximum rows
+            ascending: Sort lowest first (e.g. max_drawdown)
+
+        Returns:
+            Rows with symbol, variant id, parameters, metrics and open position
+        """
+        if metric not in LEADERBOARD_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+        books = [self.books[symbol]] if symbol in self.books else ([] if symbol else list(self.books.values()))
+        if not books:
+            return []
+
+        metrics = [book.metrics() for book in books]
+        values = np.concatenate([m[metric] for m in metrics]).astype(np.float64)
+        order = np.argsort(values if ascending else -values, kind='stable')[:limit]
+
+        n = self.variant_count
+        rows = []
+        for flat_index in order.tolist():
+            b, v = divmod(flat_index, n)
+            book, m = books[b], metrics[b]
+            rows.append({
+                'symbol': book.symbol,
+                'variant': v,
+                'params': {name: float(column[v]) for name, column in self.params.items()},
+                # Profit factor is infinite without losing trades; JSON has no infinity
+                **{name: (float(m[name][v]) if np.isfinite(m[name][v]) else None) for name in LEADERBOARD_METRICS},
+                'position': ('LONG', None, 'SHORT')[1 - int(book.side[v])]
+            })
+        return rows
+
+
+# Singleton instance
+shadow_trading_engine = ShadowTradingEngine(mt5_data_client, price_snapshot_service)
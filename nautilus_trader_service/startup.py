@@ -0,0 +1,67 @@
+"""
+Startup Profiler
+Times service startup phases and reports readiness
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StartupProfiler:
+    """
+    Records the duration of named startup phases
+
+    Phases are measured from process-relative monotonic time, so the
+    report shows both how long each phase took and when the service
+    became ready.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.ready_at = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a startup phase
+
+        Args:
+            name: Phase name used in the report
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - start) * 1000, 2)
+
+    def mark_ready(self):
+        """Mark the service as ready to answer requests"""
+        if self.ready_at is None:
+            self.ready_at = time.perf_counter()
+            print(f"⚡ Ready in {self.ready_ms:.0f} ms "
+                  f"({', '.join(f'{k}={v:.0f}ms' for k, v in self.phases.items())})")
+
+    @property
+    def ready_ms(self) -> float:
+        if self.ready_at is None:
+            return None
+        return round((self.ready_at - self.started) * 1000, 2)
+
+    def report(self) -> Dict:
+        """
+        Get startup timings
+
+        Returns:
+            Dictionary with readiness and per-phase durations in ms
+        """
+        return {
+            'ready': self.ready_at is not None,
+            'ready_ms': self.ready_ms,
+            'phases_ms': dict(self.phases)
+        }
+
+
+# Singleton instance
+startup_profiler = StartupProfiler()
@@ -0,0 +1,112 @@
+"""
+State Snapshot Store
+Periodic warm-start snapshots of strategy, indicator and symbol cache state
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from config import config
+
+
+class StateSnapshotStore:
+    """
+    Compact on-disk snapshot of the running system state
+
+    A snapshot holds, per symbol, the recent bar window that feeds the
+    strategy indicators plus the strategy position state, and the MT5
+    symbol specification cache. Array values of a strategy state are
+    stored natively in a compressed ``.npz`` file; everything else is
+    JSON in the same file.
+    """
+
+    FILE_NAME = 'snapshot.npz'
+
+    def __init__(self, directory: Optional[str] = None, max_age: Optional[float] = None):
+        self.directory = Path(directory or config.SNAPSHOT_DIR)
+        self.max_age = config.SNAPSHOT_MAX_AGE if max_age is None else max_age
+        self.last_saved = None
+
+    @property
+    def path(self) -> Path:
+        return self.directory / self.FILE_NAME
+
+    def save(self, strategies: Dict, symbol_cache: Dict) -> Path:
+        """
+        Write a snapshot atomically
+
+        Args:
+            strategies: Mapping of symbol to TechnicalStrategy
+            symbol_cache: MT5 symbol specification cache
+
+        Returns:
+            Path of the written snapshot
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        arrays = {}
+        strategy_states = {}
+        for symbol, strategy in strategies.items():
+            state = strategy.export_state()
+            for key in [k for k, v in state.items() if isinstance(v, np.ndarray)]:
+                arrays[f'{key}__{symbol}'] = state.pop(key)
+            strategy_states[symbol] = state
+
+        meta = {
+            'created_at': time.time(),
+            'strategies': strategy_states,
+            'symbol_cache': symbol_cache
+        }
+        arrays['meta'] = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, self.path)
+
+        self.last_saved = meta['created_at']
+        return self.path
+
+    def load(self) -> Optional[Dict]:
+        """
+        Load the latest snapshot if it exists and is fresh enough
+
+        Returns:
+            Dictionary with 'created_at', 'strategies' and 'symbol_cache',
+            or None when no usable snapshot is available
+        """
+        if not self.path.exists():
+            return None
+
+        try:
+            with np.load(self.path) as data:
+                meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+                for name in data.files:
+                    if '__' in name:
+                        key, symbol = name.split('__', 1)
+                        meta['strategies'].setdefault(symbol, {})[key] = data[name]
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable snapshot {self.path}: {e}")
+            return None
+
+        age = time.time() - meta['created_at']
+        if self.max_age and age > self.max_age:
+            print(f"⚠️ Snapshot is {age:.0f}s old, starting cold")
+            return None
+
+        return meta
+
+    def due(self) -> bool:
+        """Check whether the periodic snapshot interval has elapsed"""
+        if self.last_saved is None:
+            return True
+        return time.time() - self.last_saved >= config.SNAPSHOT_INTERVAL
+
+
+# Singleton instance
+state_snapshot_store = StateSnapshotStore()
@@ -5,8 +5,9 @@ Uses multiple technical indicators for trading decisions
 
 import numpy as np
 import pandas as pd
+from collections import deque
 from typing import Optional, Dict
-from datetime import datetime
+from datetime import datetime, timezone
 
 from nautilus_trader.trading.strategy import Strategy
 from nautilus_trader.model.identifiers import InstrumentId
@@ -14,11 +15,18 @@ from nautilus_trader.model.instruments import Instrument
 from nautilus_trader.model.data import Bar, BarType
 from nautilus_trader.model.orders import MarketOrder
 from nautilus_trader.model.position import Position
-from nautilus_trader.indicators.average.ema import ExponentialMovingAverage
-from nautilus_trader.indicators.rsi import RelativeStrengthIndex
-from nautilus_trader.indicators.atr import AverageTrueRange
-from nautilus_trader.indicators.macd import MACD
-from nautilus_trader.indicators.bollinger_bands import BollingerBands
+
+from config import config
+from event_writer import event_writer
+from market_depth import market_depth_service
+from model_scoring import model_scorer, blend_confidence
+from indicators import (
+    StreamingEMA,
+    StreamingRSI,
+    StreamingATR,
+    StreamingMACD,
+    StreamingBollinger
+)
 
 
 class TechnicalStrategy(Strategy):
@@ -31,8 +39,13 @@ class TechnicalStrategy(Strategy):
     - MACD signals
     - Bollinger Bands
     - ATR for position sizing
+    
+    Indicators are the streaming kernels from indicators.py, so values
+    match what the API computes in batch for the same bars.
     """
     
+    INDICATOR_NAMES = ('fast_ema', 'slow_ema', 'rsi', 'atr', 'macd', 'bb')
+    
     def __init__(
         self,
         instrument_id: InstrumentId,
@@ -43,7 +56,8 @@ class TechnicalStrategy(Strategy):
         rsi_period: int = 14,
         atr_period: int = 14,
         bb_period: int = 20,
-        bb_std: float = 2.0
+        bb_std: float = 2.0,
+        warmup_bars: int = 200
     ):
         super().__init__()
         
@@ -59,6 +73,7 @@ class TechnicalStrategy(Strategy):
         self.atr_period = atr_period
         self.bb_period = bb_period
         self.bb_std = bb_std
+        self.warmup_bars = warmup_bars
         
         # Indicators (will be initialized in on_start)
         self.fast_ema = None
@@ -73,6 +88,14 @@ class TechnicalStrategy(Strategy):
         self.position_side = None
         self.entry_price = None
         self.position_size = None
+        self.stop_loss = None
+        self.take_profit = None
+        self.entry_time = None
+        self.entry_record = None
+        
+        # Recent bars (ts_event, open, high, low, close, volume) for warm-start
+        self.bar_history = deque(maxlen=warmup_bars)
+        self._warm_state = None
         
         # Signal tracking
         self.signals = {
@@ -86,30 +109,69 @@ class TechnicalStrategy(Strategy):
         """Called when the strategy starts"""
         self.log.info(f"Starting TechnicalStrategy for {self.instrument_id}")
         
-        # Initialize indicators
-        self.fast_ema = ExponentialMovingAverage(self.fast_ema_period)
-        self.slow_ema = ExponentialMovingAverage(self.slow_ema_period)
-        self.rsi = RelativeStrengthIndex(self.rsi_period)
-        self.atr = AverageTrueRange(self.atr_period)
+        # Strategies added at runtime arrive already warmed up
+        if self.fast_ema is None:
+            self._create_indicators()
+        
+        # Subscribe to market data
+        self.subscribe_bars(self.bar_type)
+        
+        if self._warm_state is not None:
+            # Replay snapshot bars locally, then request only the gap
+            last_ts = self._apply_warm_state(self._warm_state)
+            self._warm_state = None
+            self.request_bars(
+                self.bar_type,
+                start=pd.Timestamp(last_ts, unit='ns', tz='UTC')
+            )
+        elif self.bar_history:
+            # Warmed up at runtime; request only the gap
+            self.request_bars(
+                self.bar_type,
+                start=pd.Timestamp(self.bar_history[-1][0], unit='ns', tz='UTC')
+            )
+        else:
+            # Request historical bars for indicator warmup
+            self.request_bars(self.bar_type, self.warmup_bars)
+    
+    def _create_indicators(self):
+        """Create the streaming indicators from the configured periods"""
+        self.fast_ema = StreamingEMA(self.fast_ema_period)
+        self.slow_ema = StreamingEMA(self.slow_ema_period)
+        self.rsi = StreamingRSI(self.rsi_period)
+        self.atr = StreamingATR(self.atr_period)
         
         # Initialize MACD
-        self.macd = MACD(
-            fast_period=self.fast_ema_period,
-            slow_period=self.slow_ema_period,
-            signal_period=9
+        self.macd = StreamingMACD(
+            fast=self.fast_ema_period,
+            slow=self.slow_ema_period,
+            signal=9
         )
         
         # Initialize Bollinger Bands
-        self.bb = BollingerBands(
-            period=self.bb_period,
+        self.bb = StreamingBollinger(
+            n=self.bb_period,
             k=self.bb_std
         )
+    
+    def warm_up(self, state: Dict) -> int:
+        """
+        Warm the indicators before the strategy starts
         
-        # Subscribe to market data
-        self.subscribe_bars(self.bar_type)
+        Used for strategies added or rebuilt at runtime: the bars are
+        replayed locally, so on_start only requests bars after them.
+        
+        Args:
+            state: 'bar_times' (ns) and (open, high, low, close, volume)
+                rows in 'bars', as produced by export_state
         
-        # Request historical bars for indicator warmup
-        self.request_bars(self.bar_type, 200)
+        Returns:
+            ts_event of the last replayed bar
+        """
+        self._create_indicators()
+        self.bar_history.clear()
+        self._warm_state = None
+        return self._apply_warm_state({'bar_times': state['bar_times'], 'bars': state['bars']})
         
     def on_bar(self, bar: Bar):
         """
@@ -118,6 +180,19 @@ class TechnicalStrategy(Strategy):
         Args:
             bar: The new bar data
         """
+        # Skip bars already replayed from a snapshot
+        if self.bar_history and bar.ts_event <= self.bar_history[-1][0]:
+            return
+        
+        self.bar_history.append((
+            bar.ts_event,
+            float(bar.open),
+            float(bar.high),
+            float(bar.low),
+            float(bar.close),
+            float(bar.volume)
+        ))
+        
         # Update indicators
         self.update_indicators(bar)
         
@@ -135,8 +210,10 @@ class TechnicalStrategy(Strategy):
         if not self.in_position:
             # Check for entry signals
             if signal_strength >= 3:  # Strong buy signal
+                self.log_signal(bar, 'BUY', signal_strength)
                 self.enter_long(bar)
             elif signal_strength <= -3:  # Strong sell signal
+                self.log_signal(bar, 'SELL', signal_strength)
                 self.enter_short(bar)
         else:
             # Check for exit signals
@@ -149,21 +226,149 @@ class TechnicalStrategy(Strategy):
         Args:
             bar: The new bar data
         """
+        self.update_indicators_raw(float(bar.high), float(bar.low), float(bar.close))
+    
+    def update_indicators_raw(self, high: float, low: float, close: float):
+        """
+        Update all technical indicators from raw prices
+        
+        Args:
+            high: Bar high
+            low: Bar low
+            close: Bar close
+        """
         # Update EMAs
-        self.fast_ema.update(bar.close)
-        self.slow_ema.update(bar.close)
+        self.fast_ema.update(close)
+        self.slow_ema.update(close)
         
         # Update RSI
-        self.rsi.update(bar.close)
+        self.rsi.update(close)
         
         # Update ATR
-        self.atr.update(bar)
+        self.atr.update(high, low, close)
         
         # Update MACD
-        self.macd.update(bar.close)
+        self.macd.update(close)
         
         # Update Bollinger Bands
-        self.bb.update(bar.close)
+        self.bb.update(close)
+    
+    def export_state(self) -> Dict:
+        """
+        Export strategy state for a warm-start snapshot
+        
+        Returns:
+            Dictionary with position state, signals and recent bars
+        """
+        return {
+            'position': {
+                'in_position': self.in_position,
+                'position_side': self.position_side,
+                'entry_price': self.entry_price,
+                'position_size': self.position_size,
+                'stop_loss': self.stop_loss,
+                'take_profit': self.take_profit
+            },
+            'signals': dict(self.signals),
+            'indicators': {
+                name: getattr(self, name).get_state()
+                for name in self.INDICATOR_NAMES
+                if getattr(self, name) is not None
+            },
+            'bar_times': np.array([b[0] for b in self.bar_history], dtype=np.int64),
+            'bars': np.array([b[1:] for b in self.bar_history], dtype=np.float64).reshape(-1, 5)
+        }
+    
+    def restore_state(self, state: Dict):
+        """
+        Restore state from a warm-start snapshot
+        
+        Indicators are restored in on_start, or by apply_restored_state
+        for strategies no TradingNode starts, from their saved state (or by
+        replaying the snapshot bars locally for older snapshots), so only
+        bars newer than the snapshot are requested.
+        
+        Args:
+            state: Dictionary produced by export_state
+        """
+        position = state.get('position', {})
+        self.in_position = position.get('in_position', False)
+        self.position_side = position.get('position_side')
+        self.entry_price = position.get('entry_price')
+        self.position_size = position.get('position_size')
+        self.stop_loss = position.get('stop_loss')
+        self.take_profit = position.get('take_profit')
+        self.signals.update(state.get('signals', {}))
+        
+        bars = state.get('bars')
+        if bars is not None and len(bars):
+            self._warm_state = state
+    
+    def apply_restored_state(self) -> Optional[int]:
+        """
+        Apply a restored snapshot now instead of in on_start
+        
+        For strategies no TradingNode starts: indicators and bar history
+        are restored right away and kept current through update_bar.
+        
+        Returns:
+            ts_event of the last restored bar, or None without a snapshot
+        """
+        if self._warm_state is None:
+            return None
+        if self.fast_ema is None:
+            self._create_indicators()
+        self.bar_history.clear()
+        last_ts = self._apply_warm_state(self._warm_state)
+        self._warm_state = None
+        return last_ts
+    
+    def update_bar(self, ts_event: int, open_: float, high: float, low: float, close: float, volume: float):
+        """
+        Add a closed bar to the indicators and the warm-start bar history
+        
+        Only indicator state follows; signals and orders need on_bar under
+        a TradingNode.
+        
+        Args:
+            ts_event: Bar open time (ns)
+            open_, high, low, close, volume: Bar values
+        """
+        if self.bar_history and ts_event <= self.bar_history[-1][0]:
+            return
+        if self.fast_ema is None:
+            self._create_indicators()
+        self.update_indicators_raw(high, low, close)
+        self.bar_history.append((ts_event, open_, high, low, close, volume))
+    
+    def _apply_warm_state(self, state: Dict) -> int:
+        """
+        Replay snapshot bars through the indicators
+        
+        Args:
+            state: Snapshot state with 'bar_times' and (open, high, low,
+                close, volume) rows in 'bars'
+        
+        Returns:
+            ts_event of the last replayed bar
+        """
+        indicator_state = state.get('indicators', {})
+        restored = set(self.INDICATOR_NAMES) <= indicator_state.keys()
+        if restored:
+            for name in self.INDICATOR_NAMES:
+                getattr(self, name).set_state(indicator_state[name])
+        
+        bar_times = state['bar_times'][-self.warmup_bars:]
+        bars = state['bars'][-self.warmup_bars:]
+        for ts_event, (open_, high, low, close, volume) in zip(bar_times.tolist(), bars.tolist()):
+            if not restored:
+                self.update_indicators_raw(high, low, close)
+            self.bar_history.append((ts_event, open_, high, low, close, volume))
+        
+        self.log.info(
+            f"Restored {len(self.bar_history)} bars from snapshot for {self.instrument_id}"
+        )
+        return self.bar_history[-1][0]
     
     def indicators_ready(self) -> bool:
         """
@@ -236,15 +441,16 @@ class TechnicalStrategy(Strategy):
         """
         return sum(self.signals.values())
     
-    def calculate_position_size(self, bar: Bar) -> float:
+    def calculate_position_size(self, bar: Bar, side: str = 'BUY') -> float:
         """
         Calculate position size based on ATR and risk
         
         Args:
             bar: The current bar data
+            side: 'BUY' or 'SELL', for the market depth cap
         
         Returns:
-            Position size in lots
+            Position size in lots, 0 when the book can't fill the minimum lot
         """
         account_balance = self.portfolio.account.balance
         risk_amount = account_balance * self.risk_per_trade
@@ -264,7 +470,15 @@ class TechnicalStrategy(Strategy):
         
         # Apply limits
         min_lot = 0.01
-        max_lot = 1.0
+        max_lot = config.MAX_POSITION_SIZE
+        
+        # Don't take more than the book offers near the touch (depth-subscribed symbols)
+        available = market_depth_service.available_volume(self.instrument_id.symbol.value, side)
+        if available is not None:
+            if available < min_lot:
+                return 0.0
+            max_lot = min(max_lot, np.floor(available / lot_step) * lot_step)
+        
         position_size = max(min_lot, min(max_lot, position_size))
         
         return position_size
@@ -280,6 +494,8 @@ class TechnicalStrategy(Strategy):
             return
         
         position_size = self.calculate_position_size(bar)
+        if position_size <= 0:
+            return
         
         # Create market order
         order = self.order_factory.market(
@@ -296,6 +512,8 @@ class TechnicalStrategy(Strategy):
         self.position_side = 'LONG'
         self.entry_price = bar.close
         self.position_size = position_size
+        self.entry_time = datetime.fromtimestamp(bar.ts_event / 1e9, tz=timezone.utc)
+        self.entry_record = self._indicator_record(self.calculate_signal_strength())
         
         # Calculate stop loss and take profit
         atr_value = self.atr.value
@@ -318,7 +536,9 @@ class TechnicalStrategy(Strategy):
         if self.in_position:
             return
         
-        position_size = self.calculate_position_size(bar)
+        position_size = self.calculate_position_size(bar, 'SELL')
+        if position_size <= 0:
+            return
         
         # Create market order
         order = self.order_factory.market(
@@ -335,6 +555,8 @@ class TechnicalStrategy(Strategy):
         self.position_side = 'SHORT'
         self.entry_price = bar.close
         self.position_size = position_size
+        self.entry_time = datetime.fromtimestamp(bar.ts_event / 1e9, tz=timezone.utc)
+        self.entry_record = self._indicator_record(self.calculate_signal_strength())
         
         # Calculate stop loss and take profit
         atr_value = self.atr.value
@@ -403,16 +625,107 @@ class TechnicalStrategy(Strategy):
         else:
             pnl = (self.entry_price - bar.close) * self.position_size
         
+        self.record_trade(bar, reason, pnl)
+        
         # Reset state
         self.in_position = False
         self.position_side = None
         self.entry_price = None
         self.position_size = None
+        self.entry_time = None
+        self.entry_record = None
         
         self.log.info(
             f"Position Closed: {reason} @ {bar.close:.5f}, P&L: {pnl:.2f}"
         )
     
+    def _persist(self, table: str, record: Dict):
+        """Queue a record for the event writer (needs PERSIST_STRATEGY_ID)"""
+        if not config.PERSIST_STRATEGY_ID:
+            return
+        event_writer.write(table, {
+            'strategy_id': config.PERSIST_STRATEGY_ID,
+            'user_id': config.PERSIST_USER_ID,
+            **record
+        })
+    
+    def _indicator_record(self, signal_strength: int) -> Dict:
+        """Indicator values in strategy_trades column names"""
+        return {
+            'signal_strength': abs(signal_strength) / len(self.signals) * 100,
+            'rsi_value': float(self.rsi.value),
+            'macd_value': float(self.macd.line),
+            'macd_signal': float(self.macd.signal),
+            'macd_histogram': float(self.macd.hist),
+            'ema_12': float(self.fast_ema.value),
+            'ema_26': float(self.slow_ema.value)
+        }
+    
+    def log_signal(self, bar: Bar, signal_type: str, signal_strength: int):
+        """
+        Record an entry signal in strategy_signal_logs
+        
+        The logged strength is blended with the model score when the
+        scoring stage has a current one.
+        
+        Args:
+            bar: The current bar data
+            signal_type: 'BUY' or 'SELL'
+            signal_strength: Sum of indicator signals
+        """
+        symbol = self.instrument_id.symbol.value
+        confidence = abs(signal_strength) / len(self.signals) * 100
+        model_score = model_scorer.score(symbol)
+        factors = [name for name, value in self.signals.items() if value]
+        if model_score is not None:
+            factors.append('model')
+        
+        self._persist('strategy_signal_logs', {
+            'symbol': symbol,
+            'timeframe': str(self.bar_type.spec),
+            'signal_type': signal_type,
+            'signal_strength': blend_confidence(signal_type, confidence, model_score),
+            'market_data': {
+                'time': int(bar.ts_event),
+                'open': float(bar.open),
+                'high': float(bar.high),
+                'low': float(bar.low),
+                'close': float(bar.close),
+                'volume': float(bar.volume)
+            },
+            'indicator_values': self._indicator_record(signal_strength),
+            'decision_factors': factors,
+            'action_taken': not self.in_position,
+            'action_reason': f"signal strength {signal_strength}"
+        })
+    
+    def record_trade(self, bar: Bar, reason: str, pnl: float):
+        """
+        Record a closed trade in strategy_trades
+        
+        Args:
+            bar: The bar the position was closed on
+            reason: Exit reason
+            pnl: Realized P&L in price units x size
+        """
+        exit_time = datetime.fromtimestamp(bar.ts_event / 1e9, tz=timezone.utc)
+        record = {
+            'symbol': self.instrument_id.symbol.value,
+            'action': 'BUY' if self.position_side == 'LONG' else 'SELL',
+            'volume': float(self.position_size),
+            'entry_price': float(self.entry_price),
+            'exit_price': float(bar.close),
+            'exit_reason': reason,
+            'realized_pnl': float(pnl),
+            'exit_time': exit_time,
+            'status': 'closed',
+            **(self.entry_record or {})
+        }
+        if self.entry_time is not None:
+            record['entry_time'] = self.entry_time
+            record['holding_time_minutes'] = int((exit_time - self.entry_time).total_seconds() // 60)
+        self._persist('strategy_trades', record)
+    
     def on_stop(self):
         """Called when the strategy stops"""
         # Close any open positions
@@ -427,6 +740,11 @@ class TechnicalStrategy(Strategy):
         self.position_side = None
         self.entry_price = None
         self.position_size = None
+        self.stop_loss = None
+        self.take_profit = None
+        self.entry_time = None
+        self.entry_record = None
+        self.bar_history.clear()
         self.signals = {
             'ema_cross': 0,
             'rsi': 0,
@@ -0,0 +1,83 @@
+"""
+Fake MetaTrader5 backend for terminal pool tests
+
+The terminal path passed to initialize() selects how this terminal
+behaves: '' answers normally, 'advance' closes a new bar after the
+first rates request, 'crash' exits on the first download, 'hang' never
+answers and 'fail' refuses to initialize.
+"""
+
+import os
+import time
+
+import numpy as np
+
+TIMEFRAME_M1 = 1
+TIMEFRAME_M15 = 15
+TIMEFRAME_H1 = 16385
+COPY_TICKS_ALL = -1
+
+SECONDS = {TIMEFRAME_M1: 60, TIMEFRAME_M15: 900, TIMEFRAME_H1: 3600}
+LATEST = 1_700_000_000
+
+RATES_DTYPE = np.dtype([
+    ('time', np.int64), ('open', np.float64), ('high', np.float64), ('low', np.float64),
+    ('close', np.float64), ('tick_volume', np.uint64), ('spread', np.int32), ('real_volume', np.uint64)
+])
+TICKS_DTYPE = np.dtype([
+    ('time', np.int64), ('bid', np.float64), ('ask', np.float64), ('last', np.float64),
+    ('volume', np.uint64), ('time_msc', np.int64), ('flags', np.uint32), ('volume_real', np.float64)
+])
+
+_mode = ''
+_closed_bars = 0
+
+
+def initialize(path=None, **credentials):
+    global _mode
+    _mode = path or ''
+    return _mode != 'fail'
+
+
+def last_error():
+    return (1, 'Success')
+
+
+def shutdown():
+    pass
+
+
+def _behave():
+    if _mode == 'crash':
+        os._exit(1)
+    if _mode == 'hang':
+        time.sleep(3600)
+
+
+def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    global _closed_bars
+    _behave()
+    step = SECONDS[timeframe]
+    latest = (LATEST // step + _closed_bars) * step
+    if _mode == 'advance':
+        _closed_bars = 1
+    rates = np.zeros(count, dtype=RATES_DTYPE)
+    rates['time'] = latest - step * (start_pos + np.arange(count)[::-1])
+    # Prices derive from the bar time, so overlapping chunks agree
+    rates['close'] = 100 + (rates['time'] // step % 1000) / 100
+    rates['open'] = rates['close'] - 0.01
+    rates['high'] = rates['close'] + 0.02
+    rates['low'] = rates['open'] - 0.02
+    rates['tick_volume'] = 1
+    return rates
+
+
+def copy_ticks_range(symbol, date_from, date_to, flags):
+    _behave()
+    times = np.arange(int(date_from.timestamp()), int(date_to.timestamp()) + 1, 60)
+    ticks = np.zeros(len(times), dtype=TICKS_DTYPE)
+    ticks['time'] = times
+    ticks['time_msc'] = times * 1000
+    ticks['bid'] = 1.1
+    ticks['ask'] = 1.1002
+    return ticks
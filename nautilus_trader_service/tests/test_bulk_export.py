@@ -0,0 +1,78 @@
+"""
+Chunked export encoding and signals
+"""
+
+import asyncio
+import io
+
+import numpy as np
+import pytest
+
+from bulk_export import available, encode_chunks, encode_stream, signal_columns, signal_stream
+
+RATES_DTYPE = np.dtype([
+    ('time', np.int64), ('open', np.float64), ('high', np.float64), ('low', np.float64),
+    ('close', np.float64), ('tick_volume', np.uint64), ('spread', np.int32), ('real_volume', np.uint64)
+])
+
+
+def make_rates(n: int) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    close = 1.1 + np.cumsum(rng.normal(0, 0.001, n))
+    rates = np.zeros(n, dtype=RATES_DTYPE)
+    rates['time'] = 1_700_000_000 + 60 * np.arange(n)
+    rates['close'] = close
+    rates['open'] = np.r_[close[0], close[:-1]]
+    rates['high'] = np.maximum(rates['open'], close) + 0.0005
+    rates['low'] = np.minimum(rates['open'], close) - 0.0005
+    return rates
+
+
+async def aiter_chunks(rates: np.ndarray, size: int):
+    for start in range(0, len(rates), size):
+        yield rates[start:start + size]
+
+
+async def collect(stream):
+    return [part async for part in stream]
+
+
+@pytest.mark.parametrize('fmt', ['ndjson', 'msgpack', 'arrow'])
+def test_stream_matches_single_pass_encoding(fmt):
+    if not available(fmt):
+        pytest.skip(f"{fmt} package not installed")
+    rates = make_rates(1000)
+    columns = {'time': rates['time'], 'close': rates['close']}
+
+    async def parts():
+        for start in range(100, 1000, 300):
+            yield {name: column[start:start + 300] for name, column in columns.items()}
+
+    first = {name: column[:100] for name, column in columns.items()}
+    streamed = b''.join(asyncio.run(collect(encode_stream(fmt, first, parts(), chunk_rows=64))))
+    whole = b''.join(encode_chunks(fmt, columns, chunk_rows=64))
+
+    if fmt == 'ndjson':
+        assert streamed == whole
+    elif fmt == 'msgpack':
+        import msgpack
+
+        streamed, whole = (list(msgpack.Unpacker(io.BytesIO(data))) for data in (streamed, whole))
+        assert streamed[0]['rows'] is None
+        assert b''.join(m['data'][0] for m in streamed[1:]) == b''.join(m['data'][0] for m in whole[1:])
+    else:
+        import pyarrow as pa
+
+        assert pa.ipc.open_stream(streamed).read_all().equals(pa.ipc.open_stream(whole).read_all())
+
+
+@pytest.mark.parametrize('size', [1200, 2500, 5000])
+def test_chunked_signals_match_whole_history(size):
+    rates = make_rates(5000)
+    whole = signal_columns(rates)
+
+    parts = asyncio.run(collect(signal_stream(aiter_chunks(rates, size))))
+    chunked = {name: np.concatenate([part[name] for part in parts]) for name in whole}
+
+    for name, column in whole.items():
+        np.testing.assert_array_equal(chunked[name], column, err_msg=name)
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import os
+import uuid
+from contextlib import asynccontextmanager
+
+import pytest
+
+from event_writer import EventWriter
+
+
+class CheckViolation(Exception):
+    sqlstate = '23514'
+
+
+class FakeConnection:
+    """Transactional stand-in for an asyncpg connection"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.pending = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.pending = []
+        yield
+        self.pool.rows.extend(self.pending)
+
+    async def copy_records_to_table(self, table, records, columns):
+        if self.pool.down:
+            raise ConnectionResetError('connection lost')
+        for row in records:
+            values = dict(zip(columns, row))
+            if values.get('signal_type') == 'BAD':
+                raise CheckViolation('new row violates check constraint')
+            self.pending.append((table, values))
+
+    async def executemany(self, query, rows):
+        await self.copy_records_to_table(query.split()[2], rows, ['session_id', 'current_price'])
+
+
+class FakePool:
+    def __init__(self):
+        self.rows = []
+        self.down = False
+        self.transactions = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.down:
+            raise ConnectionRefusedError('database unreachable')
+        self.transactions += 1
+        yield FakeConnection(self)
+
+    async def close(self):
+        pass
+
+
+def make_writer(tmp_path, batch_size=64):
+    return EventWriter(
+        dsn='',
+        batch_size=batch_size,
+        flush_interval=0.01,
+        spill_path=str(tmp_path / 'spill.jsonl'),
+        dead_letter_path=str(tmp_path / 'dead.jsonl')
+    )
+
+
+def signal(i, signal_type='BUY'):
+    return ('strategy_signal_logs', {'symbol': f'S{i}', 'signal_type': signal_type, 'confidence_score': 50.0})
+
+
+def read_jsonl(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_bad_rows_are_dead_lettered_and_good_rows_written(tmp_path):
+    pool = FakePool()
+    writer = make_writer(tmp_path)
+    writer.pool = pool
+
+    asyncio.run(writer._flush([signal(i, 'BAD' if i in (3, 40) else 'BUY') for i in range(50)]))
+
+    assert [values['symbol'] for _, values in pool.rows] == [f'S{i}' for i in range(50) if i not in (3, 40)]
+    dead = read_jsonl(writer.dead_letter_path)
+    assert [item['record']['symbol'] for item in dead] == ['S3', 'S40']
+    assert 'check constraint' in dead[0]['error']
+    assert not os.path.exists(writer.spill_path)
+    assert writer.get_stats()['healthy']
+
+
+def test_connection_errors_spill_and_replay(tmp_path):
+    pool = FakePool()
+    writer = make_writer(tmp_path)
+    writer.pool = pool
+
+    pool.down = True
+    asyncio.run(writer._flush([signal(i) for i in range(5)]))
+    assert len(read_jsonl(writer.spill_path)) == 5
+    assert not writer.get_stats()['healthy']
+
+    pool.down = False
+    asyncio.run(writer.replay_spill())
+    assert [values['symbol'] for _, values in pool.rows] == [f'S{i}' for i in range(5)]
+    assert not os.path.exists(writer.spill_path)
+
+
+def test_spilled_bad_row_does_not_block_replay(tmp_path):
+    pool = FakePool()
+    writer = make_writer(tmp_path)
+    writer.pool = pool
+    writer._spill([signal(0), signal(1, 'BAD'), signal(2)])
+
+    asyncio.run(writer.replay_spill())
+    asyncio.run(writer.replay_spill())
+
+    assert [values['symbol'] for _, values in pool.rows] == ['S0', 'S2']
+    assert len(read_jsonl(writer.dead_letter_path)) == 1
+    assert not os.path.exists(writer.spill_path)
+
+
+def test_connection_lost_mid_bisect_spills_only_unwritten_rows(tmp_path):
+    pool = FakePool()
+    writer = make_writer(tmp_path)
+    writer.pool = pool
+    original = FakeConnection.copy_records_to_table
+
+    async def copy(self, table, records, columns):
+        # Fail over after the first half has been isolated and written
+        if pool.transactions > 2:
+            pool.down = True
+        return await original(self, table, records, columns)
+
+    FakeConnection.copy_records_to_table = copy
+    try:
+        asyncio.run(writer._flush([signal(i, 'BAD' if i == 0 else 'BUY') for i in range(8)]))
+    finally:
+        FakeConnection.copy_records_to_table = original
+
+    written = {values['symbol'] for _, values in pool.rows}
+    dead = {item['record']['symbol'] for item in read_jsonl(writer.dead_letter_path)}
+    spilled = {item['record']['symbol'] for item in read_jsonl(writer.spill_path)}
+    assert written | dead | spilled == {f'S{i}' for i in range(8)}
+    assert not (written & spilled) and not (dead & spilled)
+
+
+@pytest.mark.skipif(not os.getenv('EVENT_WRITER_TEST_DSN'), reason='EVENT_WRITER_TEST_DSN not set')
+def test_postgres_integration(tmp_path):
+    asyncpg = pytest.importorskip('asyncpg')
+    dsn = os.environ['EVENT_WRITER_TEST_DSN']
+    schema = f'event_writer_test_{uuid.uuid4().hex[:8]}'
+
+    async def run():
+        admin = await asyncpg.connect(dsn)
+        await admin.execute(f'CREATE SCHEMA {schema}')
+        try:
+            await admin.execute(f'''
+                CREATE TABLE {schema}.strategy_signal_logs (
+                    id BIGSERIAL PRIMARY KEY,
+                    symbol TEXT NOT NULL,
+                    signal_type TEXT CHECK (signal_type IN ('BUY', 'SELL', 'HOLD')),
+                    confidence_score NUMERIC(5, 2),
+                    market_data JSONB,
+                    created_at TIMESTAMPTZ DEFAULT now()
+                );
+                CREATE TABLE {schema}.position_risk_monitoring (
+                    session_id TEXT PRIMARY KEY,
+                    current_price NUMERIC(18, 5),
+                    updated_at TIMESTAMPTZ
+                );
+            ''')
+            pool = await asyncpg.create_pool(dsn, server_settings={'search_path': schema})
+            writer = make_writer(tmp_path, batch_size=100)
+            await writer.start(pool=pool)
+            for i in range(200):
+                writer.write('strategy_signal_logs', {
+                    'symbol': f'S{i}',
+                    'signal_type': 'BOGUS' if i == 17 else 'BUY',
+                    # NUMERIC(5, 2) overflows above 999.99; a string fails client-side encoding
+                    'confidence_score': {123: 5000.0, 150: 'n/a'}.get(i, 50.0),
+                    'market_data': {'close': i}
+                })
+            for price in (1.1, 1.2, 1.3):
+                writer.write('position_risk_monitoring', {'session_id': 'abc', 'current_price': price})
+            await writer.stop()
+
+            symbols = {row['symbol'] for row in await admin.fetch(f'SELECT symbol FROM {schema}.strategy_signal_logs')}
+            price = await admin.fetchval(f"SELECT current_price FROM {schema}.position_risk_monitoring WHERE session_id = 'abc'")
+            return symbols, price, writer
+        finally:
+            await admin.execute(f'DROP SCHEMA {schema} CASCADE')
+            await admin.close()
+
+    symbols, price, writer = asyncio.run(run())
+    assert symbols == {f'S{i}' for i in range(200) if i not in (17, 123, 150)}
+    assert float(price) == 1.3
+    dead = read_jsonl(writer.dead_letter_path)
+    assert sorted(item['record']['symbol'] for item in dead) == ['S123', 'S150', 'S17']
+    assert not os.path.exists(writer.spill_path)
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pytest
+
+from indicators import StreamingIndicatorSet, compute_indicators
+
+
+FULL_SPEC = {
+    'sma': [5, 20],
+    'ema': [3, 12, 26],
+    'rsi': [2, 14],
+    'atr': [14],
+    'macd': [(12, 26, 9), (5, 13, 4)],
+    'bollinger': [(20, 2.0)],
+    'stochastic': [(14, 3)],
+    'adx': [14]
+}
+
+
+def make_bars(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    # Flat stretch: zero range for stochastic, no losses for RSI
+    close[60:90] = close[60]
+    high = close + rng.uniform(0, 0.3, n)
+    low = close - rng.uniform(0, 0.3, n)
+    high[60:90] = low[60:90] = close[60:90]
+    return high, low, close
+
+
+def stream(high, low, close, indicators=None, start=0):
+    indicators = indicators or StreamingIndicatorSet(FULL_SPEC)
+    rows = [indicators.update(h, l, c) for h, l, c in zip(high[start:], low[start:], close[start:])]
+    return indicators, {key: np.array([row[key] for row in rows]) for key in rows[0]}
+
+
+def assert_matches(batch, streamed):
+    assert set(batch) == set(streamed)
+    for key, values in streamed.items():
+        np.testing.assert_allclose(values, batch[key], rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=key)
+
+
+def test_streaming_matches_batch():
+    high, low, close = make_bars(300)
+    batch = compute_indicators(high, low, close, FULL_SPEC)
+    indicators, streamed = stream(high, low, close)
+
+    assert_matches(batch, streamed)
+    assert indicators.initialized
+
+
+def test_default_spec_matches_batch():
+    high, low, close = make_bars(200, seed=1)
+    indicators = StreamingIndicatorSet()
+    streamed = [indicators.update(h, l, c) for h, l, c in zip(high, low, close)]
+    batch = compute_indicators(high, low, close)
+
+    for key in batch:
+        np.testing.assert_allclose([row[key] for row in streamed], batch[key], rtol=1e-9, equal_nan=True, err_msg=key)
+
+
+def test_matrix_rows_match_streaming():
+    bars = [make_bars(250, seed=seed) for seed in range(3)]
+    high, low, close = (np.stack(field) for field in zip(*bars))
+    batch = compute_indicators(high, low, close, FULL_SPEC)
+
+    for row, (h, l, c) in enumerate(bars):
+        _, streamed = stream(h, l, c)
+        assert_matches({key: values[row] for key, values in batch.items()}, streamed)
+
+
+@pytest.mark.parametrize('split', [1, 10, 75, 150])
+def test_state_round_trip_mid_stream(split):
+    high, low, close = make_bars(300, seed=2)
+    batch = compute_indicators(high, low, close, FULL_SPEC)
+
+    first, head = stream(high[:split], low[:split], close[:split])
+    state = json.loads(json.dumps(first.get_state()))
+    restored = StreamingIndicatorSet(FULL_SPEC)
+    restored.set_state(state)
+    _, tail = stream(high, low, close, restored, start=split)
+
+    assert_matches(batch, {key: np.concatenate([head[key], tail[key]]) for key in head})
@@ -0,0 +1,31 @@
+"""
+Replay queue keying of MarketCapture
+"""
+
+from datetime import datetime
+
+from market_capture import ReplayBackend, VirtualClock
+
+
+def test_timeframes_and_counts_replay_separately():
+    records = [
+        (1.0, 'copy_rates_from_pos', ('EURUSD', 15, 0, 100), {}, 'm15-seed'),
+        (2.0, 'copy_rates_from_pos', ('EURUSD', 16385, 0, 100), {}, 'h1-seed'),
+        (3.0, 'copy_rates_from_pos', ('EURUSD', 15, 0, 2), {}, 'm15-poll'),
+        (4.0, 'copy_rates_from_pos', ('GBPUSD', 15, 0, 2), {}, 'gbp-poll'),
+    ]
+    backend = ReplayBackend(records, VirtualClock(0.0))
+
+    assert backend.copy_rates_from_pos('EURUSD', 15, 0, 2) == 'm15-poll'
+    assert backend.copy_rates_from_pos('EURUSD', 16385, 0, 100) == 'h1-seed'
+    assert backend.copy_rates_from_pos('EURUSD', 15, 0, 100) == 'm15-seed'
+    assert backend.copy_rates_from_pos('GBPUSD', 15, 0, 2) == 'gbp-poll'
+    assert backend.exhausted
+
+
+def test_date_ranges_are_ignored():
+    recorded = (datetime(2024, 1, 1), datetime(2024, 1, 2))
+    records = [(1.0, 'copy_rates_range', ('EURUSD', 15, *recorded), {}, 'range')]
+    backend = ReplayBackend(records, VirtualClock(0.0))
+
+    assert backend.copy_rates_range('EURUSD', 15, datetime(2026, 5, 1), datetime(2026, 5, 2)) == 'range'
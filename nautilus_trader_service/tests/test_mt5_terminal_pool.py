@@ -0,0 +1,70 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from mt5_terminal_pool import MT5TerminalPool
+
+
+def make_pool(paths):
+    return MT5TerminalPool(paths, backend='fake_mt5', credentials={})
+
+
+def assert_contiguous(rates, count, step):
+    assert len(rates) == count
+    assert (np.diff(rates['time']) == step).all()
+
+
+def test_fetch_rates_across_terminals():
+    with make_pool(['', '']) as pool:
+        history = pool.fetch_rates(['EURUSD', 'GBPUSD'], ['M15', 'H1'], 250, chunk_bars=100)
+
+    assert set(history) == {(s, tf) for s in ('EURUSD', 'GBPUSD') for tf in ('M15', 'H1')}
+    assert_contiguous(history[('EURUSD', 'M15')], 250, 900)
+    assert_contiguous(history[('GBPUSD', 'H1')], 250, 3600)
+
+
+def test_fetch_rates_dedupes_when_bars_close_between_chunks():
+    with make_pool(['advance']) as pool:
+        rates = pool.fetch_rates(['EURUSD'], ['M1'], 1000, chunk_bars=100)[('EURUSD', 'M1')]
+
+    assert_contiguous(rates, 1000, 60)
+
+
+def test_fetch_ticks_in_time_chunks():
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with make_pool(['', '']) as pool:
+        ticks = pool.fetch_ticks(['EURUSD'], start, start + timedelta(hours=5), chunk=timedelta(hours=1))['EURUSD']
+
+    assert len(np.unique(ticks['time'])) == len(ticks) == 5 * 60 + 1
+    assert (np.diff(ticks['time']) > 0).all()
+
+
+def test_dead_worker_jobs_are_reassigned():
+    with make_pool(['', 'crash']) as pool:
+        history = pool.fetch_rates(['EURUSD', 'GBPUSD', 'USDJPY'], ['M15'], 300, chunk_bars=100)
+
+    assert len(history) == 3
+    for rates in history.values():
+        assert_contiguous(rates, 300, 900)
+
+
+def test_hung_worker_times_out_and_is_replaced():
+    with make_pool(['hang', '']) as pool:
+        started = time.monotonic()
+        results = pool.run({i: ('rates', ('EURUSD', 'M15', 0, 10)) for i in range(4)}, timeout=2)
+
+    assert time.monotonic() - started < 30
+    assert all(results[i] is not None and len(results[i]) == 10 for i in range(4))
+
+
+def test_all_workers_lost_raises():
+    with make_pool(['crash']) as pool:
+        with pytest.raises(ConnectionError):
+            pool.run({0: ('rates', ('EURUSD', 'M15', 0, 10))}, timeout=2)
+
+
+def test_failed_terminal_initialization_raises():
+    with pytest.raises(ConnectionError):
+        make_pool(['fail']).start(timeout=30)
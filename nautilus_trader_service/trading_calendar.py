@@ -0,0 +1,178 @@
+"""
+Trading Calendar
+Market session awareness for polling: skips closed instruments and adapts tick polling
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import config
+
+
+SECONDS_PER_WEEK = 7 * 86400
+EPOCH_WEEK_OFFSET = 3 * 86400  # 1970-01-01 was a Thursday
+
+# MT5 SYMBOL_TRADE_MODE_DISABLED
+TRADE_MODE_DISABLED = 0
+
+
+def _span(start_day: int, start: str, end_day: int, end: str) -> List[Tuple[int, int]]:
+    """
+    Build weekly session windows in seconds since Monday 00:00 UTC
+
+    Args:
+        start_day: Weekday the session opens (Monday = 0)
+        start: Opening time 'HH:MM' (UTC)
+        end_day: Weekday the session closes
+        end: Closing time 'HH:MM' (UTC)
+
+    Returns:
+        One window, or two if the session wraps over the week boundary
+    """
+    def seconds(day, hhmm):
+        hours, minutes = hhmm.split(':')
+        return day * 86400 + int(hours) * 3600 + int(minutes) * 60
+
+    open_at, close_at = seconds(start_day, start), seconds(end_day, end)
+    if close_at > open_at:
+        return [(open_at, close_at)]
+    return [(open_at, SECONDS_PER_WEEK), (0, close_at)]
+
+
+# Fallback sessions (UTC, standard time) used when MT5 gives no schedule
+FALLBACK_SESSIONS = {
+    'crypto': [(0, SECONDS_PER_WEEK)],
+    'fx': _span(6, '22:00', 4, '22:00'),
+    'cfd': _span(6, '23:00', 0, '22:00') + [
+        window for day in range(4) for window in _span(day, '23:00', day + 1, '22:00')
+    ],
+    'hk_index': [
+        window for day in range(5)
+        for window in (
+            _span(day, '01:15', day, '04:00') +
+            _span(day, '05:00', day, '08:30') +
+            _span(day, '09:15', day, '19:00')
+        )
+    ]
+}
+
+SYMBOL_SESSIONS = {
+    'BTCUSD': 'crypto', 'ETHUSD': 'crypto', 'SOLUSD': 'crypto', 'XRPUSD': 'crypto',
+    'EURUSD': 'fx', 'GBPUSD': 'fx', 'USDJPY': 'fx', 'AUDUSD': 'fx',
+    'XAUUSD': 'cfd', 'USOUSD': 'cfd', 'NAS100': 'cfd', 'US30': 'cfd',
+    'HKG33': 'hk_index'
+}
+
+
+class TradingCalendar:
+    """
+    Weekly session calendar per symbol
+
+    The MetaTrader5 Python binding does not expose session schedules, so
+    MT5 data is used where it exists: a disabled trade mode closes the
+    symbol and the symbol path ('Crypto\\...', 'Forex\\...') picks the
+    session table for symbols missing from SYMBOL_SESSIONS.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for name, windows in FALLBACK_SESSIONS.items():
+            windows = sorted(windows)
+            self._tables[name] = (
+                np.array([w[0] for w in windows], dtype=np.int64),
+                np.array([w[1] for w in windows], dtype=np.int64)
+            )
+
+    def session_type(self, symbol: str, spec: Optional[Dict] = None) -> str:
+        """
+        Resolve the session table for a symbol
+
+        Args:
+            symbol: Trading symbol
+            spec: Cached MT5 symbol specification, if available
+
+        Returns:
+            Key of FALLBACK_SESSIONS
+        """
+        if symbol in SYMBOL_SESSIONS:
+            return SYMBOL_SESSIONS[symbol]
+
+        path = (spec or {}).get('path', '').lower()
+        if 'crypto' in path:
+            return 'crypto'
+        if 'forex' in path or 'fx' in path:
+            return 'fx'
+        return 'cfd'
+
+    def seconds_until_open(
+        self,
+        symbol: str,
+        spec: Optional[Dict] = None,
+        now: Optional[float] = None
+    ) -> float:
+        """
+        Seconds until the symbol's market opens
+
+        Args:
+            symbol: Trading symbol
+            spec: Cached MT5 symbol specification, if available
+            now: Epoch seconds (defaults to the current time)
+
+        Returns:
+            0 if the market is open, otherwise the wait until the next
+            session opens (capped at CALENDAR_MAX_SLEEP when trading is
+            disabled, so the symbol is re-checked)
+        """
+        if spec and spec.get('trade_mode') == TRADE_MODE_DISABLED:
+            return float(config.CALENDAR_MAX_SLEEP)
+
+        now = time.time() if now is None else now
+        starts, ends = self._tables[self.session_type(symbol, spec)]
+        week_second = (now + EPOCH_WEEK_OFFSET) % SECONDS_PER_WEEK
+
+        idx = np.searchsorted(starts, week_second, side='right') - 1
+        if idx >= 0 and week_second < ends[idx]:
+            return 0.0
+
+        next_start = starts[idx + 1] if idx + 1 < len(starts) else starts[0] + SECONDS_PER_WEEK
+        return float(next_start - week_second)
+
+    def is_open(self, symbol: str, spec: Optional[Dict] = None, now: Optional[float] = None) -> bool:
+        """Check whether the symbol's market is open"""
+        return self.seconds_until_open(symbol, spec, now) == 0.0
+
+
+class AdaptivePollInterval:
+    """
+    Tick polling interval that follows recent tick activity
+
+    Each poll that finds a new tick halves the interval toward the minimum;
+    each empty poll stretches it toward the maximum.
+    """
+
+    def __init__(self, minimum: Optional[float] = None, maximum: Optional[float] = None):
+        self.minimum = minimum or config.TICK_POLL_MIN_INTERVAL
+        self.maximum = maximum or config.TICK_POLL_MAX_INTERVAL
+        self.interval = self.minimum
+
+    def update(self, got_tick: bool) -> float:
+        """
+        Record a poll result
+
+        Args:
+            got_tick: Whether the poll returned a new tick
+
+        Returns:
+            Seconds to wait before the next poll
+        """
+        if got_tick:
+            self.interval = max(self.minimum, self.interval * 0.5)
+        else:
+            self.interval = min(self.maximum, self.interval * 1.5)
+        return self.interval
+
+
+# Singleton instance
+trading_calendar = TradingCalendar()